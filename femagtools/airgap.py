@@ -8,12 +8,74 @@
 
 
 """
+import os
+import multiprocessing
 import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def harmonics(pos, B, pmod, order=0, nmax=9):
+    """return harmonics of one or many airgap induction curves
+
+    The curves of the model section are extended to the full
+    circumference (with alternating sign if pmod is odd) and
+    transformed with a real FFT. The samples are used as they are if
+    they are uniformly spaced, otherwise they are interpolated onto a
+    uniform grid with the same number of samples.
+
+    Args:
+      pos: positions in degrees (shape (n,))
+      B: induction values of one curve (shape (n,)) or of
+         m curves (shape (m, n)) at pos
+      pmod: number of poles in model
+      order: order of base harmonic (referred to full circumference),
+         the harmonic with the largest amplitude if 0
+      nmax: number of harmonics in multiples of the number of poles
+
+    returns dict with keys npoles, nue (harmonic orders),
+      B_nue (amplitudes of nue), order, Bamp and phi0
+      (order, amplitude and phase of base harmonic)
+    """
+    pos = np.asarray(pos, dtype=float)
+    B = np.asarray(B, dtype=float)
+    n = len(pos)
+    dphi = (pos[-1] - pos[0])/(n - 1)
+    nphi = int(round(360/dphi)) + 1
+    ntiles = (nphi-1)//(n - 1)
+    if not np.allclose(np.diff(pos), dphi, rtol=1e-3):
+        # linear interpolation onto uniform grid
+        phi = pos[0] + dphi*np.arange(n)
+        k = np.clip(np.searchsorted(pos, phi, side='right') - 1, 0, n - 2)
+        w = (phi - pos[k])/(pos[k+1] - pos[k])
+        B = B[..., k]*(1 - w) + B[..., k+1]*w
+
+    if pmod % 2:
+        sign = np.array([m % 2 or -1 for m in range(1, ntiles+1)])
+    else:
+        sign = np.ones(ntiles)
+    bx = (B[..., np.newaxis, :-1] *
+          sign[:, np.newaxis]).reshape(B.shape[:-1] + (-1,))
+    N = bx.shape[-1]
+    Y = np.fft.rfft(bx, axis=-1)
+    A = 2*np.abs(Y)/N
+
+    npoles = ntiles*pmod
+    if order:
+        i = np.full(B.shape[:-1], order, dtype=int)
+    else:
+        i = np.argmax(A[..., 1:], axis=-1) + 1
+    Yi = np.take_along_axis(Y, i[..., np.newaxis], axis=-1)[..., 0]
+    nue = np.arange(0, min(nmax*npoles, A.shape[-1]))
+    return dict(npoles=npoles,
+                nue=nue,
+                B_nue=A[..., nue],
+                order=i,
+                Bamp=2*np.abs(Yi)/N,
+                phi0=np.angle(Yi))
+
+
 def read(filename, pmod):
     """read dat file with columns (phi, Br, Bphi)
     returns samples, values, amplitude and phase of base harmonic
@@ -27,44 +89,73 @@ def read(filename, pmod):
         logger.warn("%s has incomplete content", filename)
         return(dict())
 
-    N = 2**10  # The DFT is most efficient when N is a power of 2
-    phi = np.linspace(0, 2*np.pi, N)
-    nphi = int(round(360/((bag[0][-1] - bag[0][0])/(len(bag[0]) - 1)))) + 1
-    ntiles = (nphi-1)//(len(bag[0]) - 1)
-    phitab = np.linspace(0, 2*np.pi, nphi)
-    if pmod % 2:
-        bx = np.append(
-            np.concatenate(
-                [n*bag[1][:-1]
-                 for n in [m % 2 or -1
-                           for m in range(1, ntiles+1)]]),
-            bag[1][0])
-    else:
-        bx = np.append(
-            np.tile(bag[1][:-1], ntiles),
-            bag[1][0])
-
-    br = np.interp(phi, phitab, bx)
-    npoles = ntiles*pmod
-
-    # compute DFT from induction
-    Y = np.fft.fft(br)
-    freq = np.fft.fftfreq(N, d=phi[1]-phi[0])
-    
-    # find the peak (amplitude of base harmonic)
-    i = np.argmax(np.abs(Y[:N//2]))
-    a = 2*np.abs(Y[i])/N
-    T0 = np.abs(1/freq[i])
+    h = harmonics(bag[0], bag[1], pmod)
+    a = float(h['Bamp'])
+    alfa0 = float(h['phi0'])
     logger.info("%s: %s poles B amp %f ",
-                filename, npoles, a)
+                filename, h['npoles'], a)
 
-    alfa0 = np.angle(Y[i])
     alfa = bag[0]/180*np.pi
 
     return dict(Bamp=a,
                 phi0=alfa0,
                 pos=bag[0].tolist(),
                 B=bag[1].tolist(),
-                nue=np.arange(0, 9*npoles).tolist(),
-                B_nue=(2*np.abs(Y[:9*npoles])/N).tolist(),
-                B_fft=(a*np.cos(2*np.pi*alfa/T0+alfa0)).tolist())
+                nue=h['nue'].tolist(),
+                B_nue=h['B_nue'].tolist(),
+                B_fft=(a*np.cos(int(h['order'])*alfa+alfa0)).tolist())
+
+
+def _loadtxt(filename):
+    """return columns of dat file or None if it is missing"""
+    try:
+        return np.loadtxt(filename).T
+    except (IOError, ValueError) as e:
+        logger.warning("%s: %s", filename, e)
+        return None
+
+
+def readall(dirnames, pmod, filename='bag.dat', num_proc=0, nmax=9):
+    """read dat files of many directories (e.g. the task directories
+    of a grid job) and return harmonics of all airgap induction curves
+
+    Args:
+      dirnames: list of directory names
+      pmod: number of poles in model
+      filename: name of dat file in each directory
+      num_proc: number of processes to read the files (sequential if 0)
+      nmax: number of harmonics in multiples of the number of poles
+
+    returns dict with keys dirs (directories with complete dat files
+      and the same positions as the first one),
+      pos, B (shape (num dirs, num positions)) and the keys of harmonics
+    """
+    files = [os.path.join(d, filename) for d in dirnames]
+    if num_proc > 1:
+        pool = multiprocessing.Pool(num_proc)
+        try:
+            bags = pool.map(_loadtxt, files)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        bags = [_loadtxt(f) for f in files]
+
+    dirs, bag = [], []
+    for d, b in zip(dirnames, bags):
+        if b is None or len(b) < 3:
+            logger.warning("%s has incomplete content", d)
+            continue
+        if bag and (b.shape != bag[0].shape or
+                    not np.allclose(b[0], bag[0][0])):
+            logger.warning("%s: positions differ from %s", d, dirs[0])
+            continue
+        dirs.append(d)
+        bag.append(b)
+    if not bag:
+        return dict(dirs=[])
+    pos = bag[0][0]
+    B = np.array([b[1] for b in bag])
+    r = harmonics(pos, B, pmod, nmax=nmax)
+    r.update(dirs=dirs, pos=pos, B=B)
+    return r
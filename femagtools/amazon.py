@@ -10,15 +10,21 @@
     .. note: To use this engine you have to install the boto3 module from amazon
 """
 import os
+import io
 import threading
 import time
 import logging
+import uuid
+import concurrent.futures
 
 import femagtools.job
 from .config import Config
 
 logger = logging.getLogger(__name__)
 
+# minimal size of files which are uploaded only once if used by several tasks
+SHARED_MINSIZE = 16*1024
+
 class MissingConfigurationException(Exception):
     def __init__(self, message):
         Exception.__init__(self, "Missing configuration: {}".format(message))
@@ -43,32 +49,65 @@ class Engine(object):
     This engine uses the boto3 Python module to interact
        with the amazon ec2 and s3 services
 
+    The files of all tasks are stored in one S3 bucket (config option
+    shared_bucket or a new bucket with a unique name) with the key prefix
+    <job id>/<task index>/. Uploads and downloads are run concurrently in a pool
+    of num_threads threads using multipart transfers. The results of a
+    task are downloaded as soon as it is finished.
+    The files of each task are streamed as tar.gz archive (gzip level:
+    config option compresslevel) to S3. Files that are identical in
+    several tasks are uploaded once and copied on the server.
+
     Args:
         buckets (:obj:`list`): Existing buckets with femag calculation files
         configfile (str): Filename of config file
+        num_threads (int): Number of concurrent transfers
+        packsize (int): Number of tasks that are run on one instance
+          (see :func:`femagtools.job.pack_size`)
 
     .. :note: If possible you should use the same location for all services
+       The S3 service can be replaced by a compatible local server
+       with the config option endpoint_url.
 
     """
-    def __init__(self, buckets=None, configfile='config.ini'):
+    def __init__(self, buckets=None, configfile='config.ini', num_threads=8,
+                 packsize=1):
         self.buckets = buckets
         self.job = None
+        self.num_threads = num_threads
+        self.packsize = packsize
+        self.created_buckets = []
+        self.shared_prefix = ''
+
+        # Create instance of config
+        self.config = Config(self.default_config)
+        self.config.from_ini_file(configfile)
 
         # Amazon file storage
         self.s3_resource = self._create_amazon_resource('s3')
         # Amazon Server administration
         self.ec2_resource = self._create_amazon_resource('ec2')
-
-        # Create instance of config
-        self.config = Config(self.default_config)
-        self.config.from_ini_file(configfile)
+        self.transfer_config = self._create_transfer_config()
 
     def _create_amazon_resource(self, resource):
         import boto3
+        if resource == 's3' and self.config.get('ENDPOINT_URL'):
+            return boto3.resource(resource,
+                                  endpoint_url=self.config['ENDPOINT_URL'])
         return boto3.resource(resource)
 
+    def _create_transfer_config(self):
+        """return configuration of multipart transfers"""
+        import boto3.s3.transfer
+        chunksize = int(self.config.get('MULTIPART_CHUNKSIZE', 8*1024*1024))
+        return boto3.s3.transfer.TransferConfig(
+            multipart_threshold=chunksize,
+            multipart_chunksize=chunksize,
+            max_concurrency=self.num_threads)
+
     def _create_data_buckets(self):
-        """Create unique S3 Buckets for calculation
+        """Create the S3 Bucket for calculation and
+        assign a key prefix to every task
 
         Args:
             ACL (str): ACL-Rules for Amazon
@@ -77,18 +116,35 @@ class Engine(object):
         if self.buckets:
             for idx, bucket in enumerate(self.buckets):
                 self.job.tasks[idx].id = bucket['id']
+                self.job.tasks[idx].bucket = bucket.get('bucket', bucket['id'])
+                self.job.tasks[idx].prefix = (
+                    bucket['id'] + '/' if 'bucket' in bucket else '')
                 self.job.tasks[idx].directory = bucket['folder']
             return
 
-        bucketConfiguration = {'LocationConstraint': self.config['SERVER_LOCATION']}
-
-        # Create a bucket for every calculation
-        for t in self.job.tasks:
-            self.s3_resource.create_bucket(ACL=self.config['ACL'],
-                                           Bucket=t.id,
-                                           CreateBucketConfiguration=bucketConfiguration)
-
-        logger.debug("Created buckets")
+        bucket_name = self.config.get('SHARED_BUCKET')
+        if not bucket_name:
+            bucket_name = str(uuid.uuid4())
+            bucketConfiguration = {
+                'LocationConstraint': self.config['SERVER_LOCATION']}
+            self.s3_resource.create_bucket(
+                ACL=self.config['ACL'],
+                Bucket=bucket_name,
+                CreateBucketConfiguration=bucketConfiguration)
+            self.created_buckets.append(bucket_name)
+            logger.debug("Created bucket %s", bucket_name)
+
+        # all keys of this job start with a unique job id
+        job_prefix = '{}/'.format(uuid.uuid4())
+        self.shared_prefix = job_prefix + 'shared/'
+        for i, t in enumerate(self.job.tasks):
+            t.bucket = bucket_name
+            t.prefix = '{}{}/'.format(job_prefix, i)
+
+    def _s3_path(self, task):
+        """return bucket name and key prefix of task as path
+        (used as BUCKET_NAME by the instance)"""
+        return '/'.join([task.bucket, task.prefix]).rstrip('/')
 
     def _upload_files_to_s3(self):
         """Upload all files to Amazon S3 for this calculation
@@ -98,29 +154,90 @@ class Engine(object):
             logger.info("Files are already uploaded")
             return
 
-        threads = []
-        for t in self.job.tasks:
-            thread = threading.Thread(target=self._upload, args=(t, ))
-            threads.append(thread)
-            thread.start()
+        shared = self.job.shared_files(minsize=SHARED_MINSIZE)
+        exclude = {}
+        copies = []
+        for name, digest, data, tasks in shared:
+            for t in tasks:
+                exclude.setdefault(t.id, set()).add(name)
+                copies.append((self.shared_prefix + digest, t, name))
 
         logger.info("Uploading files: ")
-        self._wait_for_threads_finished(threads, "Upload files")
-
-    def _upload(self, task):
-        """Upload thread for uploading one directory
+        with concurrent.futures.ThreadPoolExecutor(self.num_threads) as ex:
+            uploads = [ex.submit(self._upload_shared, f) for f in shared]
+            uploads += [ex.submit(self._upload, t, exclude.get(t.id, ()))
+                        for t in self.job.tasks]
+            for u in uploads:
+                u.result()
+            logger.info("%d shared files are copied to %d tasks",
+                        len(shared), len(exclude))
+            for c in [ex.submit(self._copy, *c) for c in copies]:
+                c.result()
+        logger.info("Upload files is finished")
+
+    def _upload(self, task, exclude=()):
+        """Upload the files of one task as tar.gz archive
+        which is streamed through a pipe
 
         :internal:
 
         Args:
             task (py:class:`CloudTask`): The task which belongs to the uploading folder
+            exclude (set): names of files that are not uploaded
+        """
+        errors = []
+        r, w = os.pipe()
+
+        def write_tar():
+            try:
+                with os.fdopen(w, 'wb') as f:
+                    task.write_tar(
+                        f, int(self.config.get('COMPRESSLEVEL', 1)), exclude)
+            except Exception as e:
+                errors.append(e)
+
+        writer = threading.Thread(target=write_tar)
+        writer.start()
+        name = task.prefix + os.path.basename(task.file)
+        try:
+            with os.fdopen(r, 'rb') as f:
+                self.s3_resource.meta.client.upload_fileobj(
+                    f, task.bucket, name, Config=self.transfer_config)
+        finally:
+            writer.join()
+        if errors:
+            # the reader got EOF and the truncated file was stored
+            self.s3_resource.meta.client.delete_object(
+                Bucket=task.bucket, Key=name)
+            raise errors[0]
+
+    def _upload_shared(self, shared_file):
+        """Upload a file that is used by several tasks
+
+        :internal:
+
+        Args:
+            shared_file (tuple): name, digest, data, tasks
+              (see :meth:`femagtools.job.CloudJob.shared_files`)
         """
-        # Upload one single tar_file
-        task.tar_file.close()
+        name, digest, data, tasks = shared_file
+        client = self.s3_resource.meta.client
+        key = self.shared_prefix + digest
+        if isinstance(data, bytes):
+            client.upload_fileobj(io.BytesIO(data), tasks[0].bucket, key,
+                                  Config=self.transfer_config)
+        else:
+            client.upload_file(data, tasks[0].bucket, key,
+                               Config=self.transfer_config)
 
-        name = os.path.basename(task.file)
-        Body = open(task.file, 'rb')
-        self.s3_resource.Object(task.id, name).put(Body=Body)
+    def _copy(self, key, task, name):
+        """Copy a shared file to the key prefix of task
+
+        :internal:
+        """
+        self.s3_resource.meta.client.copy(
+            dict(Bucket=task.bucket, Key=key), task.bucket,
+            task.prefix + name, Config=self.transfer_config)
 
     def _wait_for_threads_finished(self, threads, operation):
         """Wait until all threads are finished
@@ -133,7 +250,7 @@ class Engine(object):
 
         """
         # Wait until all threads are not running
-        while not all([t.isAlive() is False for t in threads]):
+        while any([t.is_alive() for t in threads]):
             time.sleep(5)
 
         # timer.cancel
@@ -171,23 +288,29 @@ class Engine(object):
         param['DryRun'] = self.config.get('DRY_RUN', False)
 
         threads = []
-        for idx, t in enumerate(self.job.tasks):
-            thread = threading.Thread(target=self._start_instance, args=(param, t))
+        for pack in self.job.packs():
+            tasks = [self.job.tasks[i] for i in pack]
+            thread = threading.Thread(target=self._start_instance,
+                                      args=(dict(param), tasks))
             threads.append(thread)
             thread.start()
 
         self._wait_for_threads_finished(threads, "Start instances")
 
-    def _start_instance(self, param, task):
+    def _start_instance(self, param, tasks):
         """Start one instance
 
         :internal:
 
         Args:
-            task (Task): the task for calculation
+            tasks (:obj:`list`): the tasks (Task) for calculation
+              that are run one after another on this instance
 
         """
-        user_data = self._read_cloud_init(task.id)
+        task = tasks[0]
+        user_data = self._read_cloud_init(
+            self._s3_path(task),
+            [self._s3_path(t) for t in tasks] if len(tasks) > 1 else [])
         if user_data:
             param['UserData'] = user_data
 
@@ -200,7 +323,8 @@ class Engine(object):
         instance.wait_until_running()
         instance.load()  # Reload the data to get public dns etc.
         logger.info("Instance {} is running: Public dns: {}".format(instance.id, instance.public_dns_name))
-        task.ec2_instance = instance.id
+        for t in tasks:
+            t.ec2_instance = instance.id
 
     def _add_tag(self, task_id, instance_id):
         """Add a tag to the instance
@@ -214,10 +338,15 @@ class Engine(object):
         tag = '{}-{}'.format(task_id, self.config.get('COMPANY_NAME', 'femag'))
         self.ec2_resource.create_tags(Resources=[instance_id], Tags=[{'Key': 'Name', 'Value': tag}])
 
-    def _read_cloud_init(self, bucket_name):
+    def _read_cloud_init(self, bucket_name, bucket_names=[]):
         """Read the cloud init file and if there is a line which starts with {{ENV}}
         then put all config options as environment variables.
 
+        Args:
+            bucket_name (str): bucket and key prefix (bucket/prefix)
+              of the (first) task of this instance
+            bucket_names (:obj:`list`): bucket paths of all tasks if the
+              instance runs a pack of tasks (exported as BUCKET_NAMES)
         """
         user_data = ""
         # Set all config options as environment variable
@@ -230,12 +359,46 @@ class Engine(object):
                             user_data += "export {}={}\n".format(key, value)
                         # add other important stuff
                         user_data += "export BUCKET_NAME={}\n".format(bucket_name)
+                        if bucket_names:
+                            user_data += 'export BUCKET_NAMES="{}"\n'.format(
+                                ' '.join(bucket_names))
                         continue
                     user_data += line
         return user_data
 
+    def _list_keys(self, bucket, prefix=''):
+        """return all keys of bucket that start with prefix
+
+        :internal:
+        """
+        client = self.s3_resource.meta.client
+        paginator = client.get_paginator('list_objects_v2')
+        return [o['Key']
+                for page in paginator.paginate(Bucket=bucket, Prefix=prefix)
+                for o in page.get('Contents', [])]
+
+    def _finished_tasks(self, tasks, filename='exit_code'):
+        """return tasks whose exit code file exists
+
+        The keys of all tasks of a bucket are listed with their
+        common prefix (the job id) with one request per 1000 keys.
+
+        :internal:
+        """
+        buckets = {}
+        for t in tasks:
+            buckets.setdefault(t.bucket, []).append(t)
+        finished = []
+        for bucket, btasks in buckets.items():
+            prefix = os.path.commonprefix([t.prefix for t in btasks])
+            prefix = prefix[:prefix.rfind('/') + 1]
+            keys = set(self._list_keys(bucket, prefix))
+            finished += [t for t in btasks if t.prefix + filename in keys]
+        return finished
+
     def _join(self, timeout=20, filename='exit_code'):
-        """Wait until all instances are finished with the calulation.
+        """Wait until all instances are finished with the calulation
+        and download the results of each finished task.
 
         :internal:
 
@@ -243,42 +406,65 @@ class Engine(object):
             timeout (int): How long we wait between a check
             filename (str): What is the filename of the exit_code
         """
-        import botocore       # For exception
-
         finished_tasks = []
-        client = self.s3_resource.meta.client
-        while len(finished_tasks) < len(self.job.tasks):
-            for t in [task for task in self.job.tasks if task not in finished_tasks]:
-                try:
-                    client.get_object(Bucket=t.id, Key=filename)
-                except botocore.exceptions.ClientError:
-                    # Instance not ready
-                    time.sleep(2)
-                    continue
-                finished_tasks.append(t)
-                logger.info("Calculation is finished for instance {}".format(t.id))
-                self.ec2_resource.instances.filter(InstanceIds=[t.ec2_instance]).terminate()
-            time.sleep(timeout)
-
-        logger.info("Calculations are finished")
-
-    def _get_result_data_from_S3(self):
-        """Get all the calculated files to the correct folder
+        with concurrent.futures.ThreadPoolExecutor(self.num_threads) as ex:
+            downloads = []
+            while True:
+                pending = [task for task in self.job.tasks
+                           if task not in finished_tasks]
+                # check instances before the results to catch
+                # the results of instances that stop in between
+                stopped = self._stopped_instances(pending)
+                done = self._finished_tasks(pending, filename)
+                for t in done:
+                    logger.info("Calculation is finished for instance {}".format(t.id))
+                for t in pending:
+                    if t not in done and t.ec2_instance in stopped:
+                        logger.error("Instance %s of task %s stopped without exit code",
+                                     t.ec2_instance, t.id)
+                        done.append(t)
+                for t in done:
+                    finished_tasks.append(t)
+                    downloads.append(ex.submit(self._download, t))
+                    # terminate instance when all its tasks are finished
+                    if all(task in finished_tasks for task in self.job.tasks
+                           if task.ec2_instance == t.ec2_instance):
+                        self.ec2_resource.instances.filter(InstanceIds=[t.ec2_instance]).terminate()
+                if len(finished_tasks) == len(self.job.tasks):
+                    break
+                time.sleep(timeout)
+            logger.info("Calculations are finished")
+            for d in downloads:
+                d.result()
+
+    def _stopped_instances(self, tasks):
+        """return ids of the instances of tasks that are no longer running
 
+        :internal:
         """
-        import boto3
-        client = self.s3_resource.meta.client
-        transfer = boto3.s3.transfer.S3Transfer(client)
-        for t in self.job.tasks:
-            bucket = t.id
-            folder = t.directory
-            files = client.list_objects(Bucket=bucket)['Contents']
-            logger.debug("Starting new folder")
+        ids = sorted(set(t.ec2_instance for t in tasks if t.ec2_instance))
+        if not ids:
+            return set()
+        return set(i.id for i in self.ec2_resource.instances.filter(
+            InstanceIds=ids) if i.state['Name'] in (
+                'shutting-down', 'terminated', 'stopping', 'stopped'))
 
-            for file in files:
-                file_name = file['Key']
-                transfer.download_file(bucket, file_name, os.path.join("{}/{}".format(folder, file_name)))
-                logger.debug("Downloaded file {}".format(file_name))
+    def _download(self, task):
+        """Download all calculated files of task to its directory
+
+        :internal:
+        """
+        client = self.s3_resource.meta.client
+        for key in self._list_keys(task.bucket, task.prefix):
+            name = key[len(task.prefix):]
+            if not name or name.endswith('/'):
+                continue
+            file_name = os.path.join(task.directory, name)
+            if not os.path.isdir(os.path.dirname(file_name)):
+                os.makedirs(os.path.dirname(file_name))
+            client.download_file(task.bucket, key, file_name,
+                                 Config=self.transfer_config)
+            logger.debug("Downloaded file {}".format(file_name))
 
     def _get_status_code(self, filename='exit_code'):
         """Get the status code from the caluclation
@@ -289,19 +475,26 @@ class Engine(object):
         status_code = []
         for t in self.job.tasks:
             dir = "{}/{}".format(t.directory, filename)
-            file = open(dir, 'r')
-            status_code.append(file.read())
+            if not os.path.isfile(dir):
+                # instance stopped without result
+                status_code.append(None)
+                continue
+            with open(dir, 'r') as file:
+                status_code.append(file.read())
         return status_code
 
     def _cleanup(self):
-        threads = []
-        for t in self.job.tasks:
-            thread = threading.Thread(target=self._delete_bucket, args=(t.id, ))
-            threads.append(thread)
-            thread.start()
-
         logger.info("Deleting buckets: ")
-        self._wait_for_threads_finished(threads, "Deleting buckets")
+        with concurrent.futures.ThreadPoolExecutor(self.num_threads) as ex:
+            list(ex.map(self._delete_bucket, self.job.tasks))
+        if self.shared_prefix:
+            for bucket_name in set(t.bucket for t in self.job.tasks):
+                self.s3_resource.Bucket(bucket_name).objects.filter(
+                    Prefix=self.shared_prefix).delete()
+        for bucket_name in self.created_buckets:
+            self.s3_resource.Bucket(bucket_name).delete()
+        self.created_buckets = []
+        logger.info("Deleting buckets is finished")
 
         # Clean up volumes
         client = self.ec2_resource.meta.client
@@ -309,25 +502,31 @@ class Engine(object):
         for v in volumes:
             client.delete_volume(VolumeId=v['VolumeId'])
 
-    def _delete_bucket(self, bucket_name):
-        bucket = self.s3_resource.Bucket(bucket_name)
-        for key in bucket.objects.all():
-            key.delete()
-        bucket.delete()
+    def _delete_bucket(self, task):
+        """delete all files of task and its bucket
+        if it is not shared with other tasks"""
+        bucket = self.s3_resource.Bucket(task.bucket)
+        # batch delete (1000 keys per request)
+        bucket.objects.filter(Prefix=task.prefix).delete()
+        if not task.prefix:
+            bucket.delete()
 
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
     # FEMAG STUFF
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-    def create_job(self, workdir):
+    def create_job(self, workdir, packsize=None):
         """Create a FEMAG :py:class:`CloudJob`
 
         Args:
             workdir (str): The workdir where the calculation files are stored
+            packsize (int): Number of tasks that are run on one instance
+              (default: packsize of engine)
 
         Return:
             Cloud job (:class:`CloudJob`)
         """
-        self.job = femagtools.job.CloudJob(workdir)
+        self.job = femagtools.job.CloudJob(
+            workdir, self.packsize if packsize is None else packsize)
         return self.job
 
     def submit(self):
@@ -341,18 +540,19 @@ class Engine(object):
         self._start_instances()
         return len(self.job.tasks)
 
-    def join( self ):
+    def join(self, interval=20):
         """Wait until all calculations are finished
 
+        Args:
+            interval (int): seconds between two status checks
+
         Return:
             list of all calculations status (C = Ok, X = error) (:obj:`list`)
         """
         status = []
-        # Wait until all tasks are finished
-        self._join(timeout=20, filename=self.config['FINISH_TASK_FILENAME'])
-
-        # get all files
-        self._get_result_data_from_S3()
+        # Wait until all tasks are finished and get all files
+        self._join(timeout=interval,
+                   filename=self.config['FINISH_TASK_FILENAME'])
 
         # Remove buckets if cleanup is set
         if int(self.config.get('DELETE_BUCKETS', 0)):
@@ -360,6 +560,6 @@ class Engine(object):
 
         status = self._get_status_code(filename=self.config['FINISH_TASK_FILENAME'])
         for t, r in zip(self.job.tasks, status):
-            t.status = 'C' if int(r)==0 else 'X'
+            t.status = 'C' if r is not None and int(r) == 0 else 'X'
 
         return status
@@ -118,14 +118,106 @@ class CondorCluster(object):
             return self.getClusterList()
 
 
+event_pat = re.compile(
+    r'^(\d{3}) \((\d+)\.(\d+)\.\d+\) (\S+ \S+) (.*)$')
+retval_pat = re.compile(r'return value (-?\d+)')
+signal_pat = re.compile(r'signal (\d+)')
+separator_pat = re.compile(br'^\.\.\.\r?\n', re.M)
+
+# event codes
+JOB_SUBMITTED = 0
+JOB_EXECUTING = 1
+JOB_TERMINATED = 5
+JOB_ABORTED = 9
+JOB_HELD = 12
+
+
+class UserLog(object):
+    """reads the events of a HTCondor user log incrementally
+
+    Args:
+      filename: name of log file
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.offset = 0
+
+    def events(self):
+        """return list of events that were completely written
+        since the last call
+
+        Each event is a dict with keys code, cluster, proc, time, text
+        and for terminated jobs exit_code (or signal)
+        """
+        try:
+            with open(self.filename, 'rb') as f:
+                f.seek(self.offset)
+                content = f.read()
+        except IOError:
+            return []
+        # consume complete events only (terminated by a line '...')
+        ends = [m.end() for m in separator_pat.finditer(content)]
+        if not ends:
+            return []
+        self.offset += ends[-1]
+        events = []
+        event = None
+        for l in content[:ends[-1]].decode('latin1').splitlines():
+            if l == '...':
+                if event:
+                    events.append(event)
+                event = None
+                continue
+            m = event_pat.match(l)
+            if m and event is None:
+                event = dict(code=int(m.group(1)),
+                             cluster=m.group(2),
+                             proc=int(m.group(3)),
+                             time=m.group(4),
+                             text=m.group(5).strip())
+            elif event and event['code'] == JOB_TERMINATED:
+                m = retval_pat.search(l)
+                if m:
+                    event['exit_code'] = int(m.group(1))
+                m = signal_pat.search(l)
+                if m and 'Abnormal' in l:
+                    event['signal'] = int(m.group(1))
+        return events
+
+
 class Engine(object):
-    """manages calculation tasks in a HTCondor environment"""
+    """manages calculation tasks in a HTCondor environment
 
-    def __init__(self):
-        self.job = None
+    Args:
+      packsize: number of tasks that are run in one condor process
+        (see femagtools.job.pack_size). If greater than 1 no input files
+        are transferred and the job directory must be on a filesystem
+        shared with the execute nodes.
+      parallel: run the tasks of a pack in parallel if True
+    """
 
-    def create_job(self, workdir):
-        self.job = femagtools.job.CondorJob(workdir)
+    def __init__(self, packsize=1, parallel=False):
+        self.job = None
+        self.clusterId = None
+        self.exit_codes = dict()
+        self.packsize = packsize
+        self.parallel = parallel
+
+    def create_job(self, workdir, packsize=None, parallel=None):
+        """create condor job
+
+        Args:
+          workdir: name of job directory
+          packsize: number of tasks that are run in one condor process
+            (default: packsize of engine)
+          parallel: run the tasks of a pack in parallel if True
+            (default: parallel of engine)
+        """
+        self.job = femagtools.job.CondorJob(
+            workdir,
+            self.packsize if packsize is None else packsize,
+            self.parallel if parallel is None else parallel)
         return self.job
 
     def status(self, userdir=None):
@@ -185,31 +277,43 @@ class Engine(object):
                     self.clusterId, self.job.basedir, len(self.job.tasks))
         return self.clusterId
 
-    def join(self):
-        """wait for all tasks to be terminated and return status"""
+    def join(self, interval=0.5):
+        """wait for all tasks to be terminated and return status
+
+        The job events are read from the user log of the cluster.
+        The results of tasks without result_func are read as soon
+        as they are terminated.
+
+        Args:
+          interval: time in s between reads of the user log
+        """
         ret = []
         if self.clusterId:
-            cmd = ["condor_q", self.clusterId]
-            while True:
-                time.sleep(2)
-                cmdout = subprocess.check_output(cmd)
-                tasks = re.findall(self.clusterId+r'\.\d+',
-                                   cmdout.decode('utf-8'))
-                if len(tasks) == 0:
-                    break
-
+            log = UserLog(os.path.join(self.job.basedir,
+                                       self.job.logfile))
+            packs = self.job.packs()
             status = dict()
-            cmdout = subprocess.check_output(
-                ["condor_history", self.clusterId])
-            for jobinfo in re.findall(
-                    r'^\s*{}\.\d+.+$'.format(
-                        self.clusterId),
-                    cmdout.decode('utf-8'), re.M):
-                l = jobinfo.split()
-                taskid = int(l[0].split('.')[-1])
-                status[taskid] = l[5]
-                logger.info('status %d: %s', taskid, l[5])
-                self.job.setExitStatus(taskid, status[taskid])
+            while len(status) < len(self.job.tasks):
+                events = [e for e in log.events()
+                          if e['cluster'] == self.clusterId]
+                if not events:
+                    time.sleep(interval)
+                    continue
+                for e in events:
+                    if e['code'] == JOB_HELD:
+                        logger.warning('process %d held: %s',
+                                       e['proc'], e['text'])
+                        continue
+                    if e['code'] not in (JOB_TERMINATED, JOB_ABORTED):
+                        continue
+                    for taskid in packs[e['proc']]:
+                        status[taskid] = self._task_status(taskid, e)
+                        logger.info('status %d: %s',
+                                    taskid, status[taskid])
+                        self.job.setExitStatus(taskid, status[taskid])
+                        task = self.job.tasks[taskid]
+                        if status[taskid] == 'C' and not task.result_func:
+                            task.result = task.get_results()
 
             for k in sorted(status.keys()):
                 ret.append(status[k])
@@ -219,6 +323,29 @@ class Engine(object):
 
         return ret
 
+    def _task_status(self, taskid, event):
+        """return status of task and save its exit code
+        (packed tasks write their exit code to a file)"""
+        if self.job.packsize > 1:
+            try:
+                with open(os.path.join(self.job.tasks[taskid].directory,
+                                       'exit_code')) as f:
+                    exit_code = int(f.read().strip() or -1)
+            except (IOError, ValueError):
+                return 'X'  # not executed
+        elif event['code'] == JOB_TERMINATED:
+            if 'signal' in event or event.get('exit_code') is None:
+                logger.warning('task %d terminated by signal %s',
+                               taskid, event.get('signal'))
+                return 'X'
+            exit_code = event['exit_code']
+        else:
+            return 'X'
+        self.exit_codes[taskid] = exit_code
+        if exit_code:
+            logger.warning('task %d exit code %s', taskid, exit_code)
+        return 'C'
+
     def queue(self, clusterId):
         cmd = ["condor_q"]
         results = []
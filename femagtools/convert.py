@@ -14,58 +14,295 @@ logger = logging.getLogger('femagtools.convert')
 
 
 output_filetypes = [
-    "msh", "geo", "vtu"]
+    "msh", "geo", "vtu", "xdmf"]
 
+# number of rows written at once by the msh and vtu writers
+CHUNKSIZE = 100000
 
-def _from_isa(isa, filename, target_format,
-              extrude=0, layers=0, recombine=False):
+_gmsh_types = {"line": 1, "triangle": 2, "quad": 3}
+_vtu_cell_types = {"line": 3, "triangle": 5, "quad": 9}
+_vtu_types = {"<f8": "Float64", "<i8": "Int64", "|u1": "UInt8"}
+# xdmf mixed topology cell types (polylines need the number of nodes)
+_xdmf_cell_types = {"line": [2, 2], "triangle": [4], "quad": [5]}
 
-    if not isa.FC_RADIUS:
-        logger.warning("airgap radius is not set in source file")
 
-    airgap_center_elements = []
-    for e in isa.elements:
-        outside = [np.sqrt(v.x**2 + v.y**2) > isa.FC_RADIUS
-                   for v in e.vertices]
-        if any(outside) and not all(outside):
-            airgap_center_elements.append(e)
+def _write_msh(filename, points, point_data, cells, cell_data,
+               field_data, chunksize=CHUNKSIZE):
+    """write mesh in gmsh 2.2 ascii format chunk by chunk
 
-    airgap_center_vertices = [v for e in airgap_center_elements
-                              for v in e.vertices]
+    Arguments:
+        cells: list of (cell type, node indexes) tuples
+        cell_data: dict of name and list of arrays (one per cell block)
+            names gmsh:physical and gmsh:geometrical are written as tags
+    """
+    def write_rows(f, first, a, fmt):
+        for i in range(0, len(a), chunksize):
+            chunk = a[i:i+chunksize]
+            np.savetxt(f, np.column_stack(
+                (np.arange(first + i, first + i + len(chunk)), chunk)),
+                       fmt=fmt)
+
+    with open(filename, "w") as f:
+        f.write("$MeshFormat\n2.2 0 8\n$EndMeshFormat\n")
+        if field_data:
+            entries = sorted((int(v[1]), int(v[0]), k)
+                             for k, v in field_data.items())
+            f.write("$PhysicalNames\n{}\n".format(len(entries)))
+            for e in entries:
+                f.write('{} {} "{}"\n'.format(*e))
+            f.write("$EndPhysicalNames\n")
+
+        f.write("$Nodes\n{}\n".format(len(points)))
+        write_rows(f, 1, points, ["%d"] + 3*["%.16e"])
+        f.write("$EndNodes\n")
+
+        f.write("$Elements\n{}\n".format(sum(len(c) for _, c in cells)))
+        first = 1
+        for k, (cell_type, nodes) in enumerate(cells):
+            tags = np.column_stack((cell_data["gmsh:physical"][k],
+                                    cell_data["gmsh:geometrical"][k]))
+            fmt = "%d {} 2 %d %d".format(_gmsh_types[cell_type]) + \
+                  nodes.shape[1]*" %d"
+            write_rows(f, first, np.hstack((tags, nodes + 1)), fmt)
+            first += len(nodes)
+        f.write("$EndElements\n")
+
+        data = [("NodeData", k, [v]) for k, v in point_data.items()] + \
+               [("ElementData", k, v) for k, v in cell_data.items()
+                if k not in ("gmsh:physical", "gmsh:geometrical")]
+        for section, name, blocks in data:
+            num_comp = 1 if blocks[0].ndim == 1 else blocks[0].shape[1]
+            f.write('${}\n1\n"{}"\n1\n0.0\n3\n0\n{}\n{}\n'.format(
+                section, name, num_comp, sum(len(b) for b in blocks)))
+            first = 1
+            for block in blocks:
+                write_rows(f, first, block, ["%d"] + num_comp*["%.16e"])
+                first += len(block)
+            f.write("$End{}\n".format(section))
+
+
+def _write_vtu(filename, points, point_data, cells, cell_data,
+               chunksize=CHUNKSIZE):
+    """write mesh as VTK unstructured grid (base64 encoded binary)
+    chunk by chunk
 
-    airgap_inner_elements = []
-    airgap_outer_elements = []
-    for e in isa.elements:
-        if e in airgap_center_elements:
-            continue
-        for v in e.vertices:
-            if v not in airgap_center_vertices:
+    Arguments:
+        cells: list of (cell type, node indexes) tuples
+        cell_data: dict of name and list of arrays (one per cell block)
+    """
+    import base64
+
+    def write_array(f, name, blocks, dtype):
+        blocks = [np.asarray(b, dtype=dtype) for b in blocks]
+        vtk_type = _vtu_types[np.dtype(dtype).str]
+        num_comp = 1 if blocks[0].ndim == 1 else blocks[0].shape[1]
+        f.write('<DataArray type="{}" Name="{}"{} format="binary">\n'.format(
+            vtk_type, name,
+            ' NumberOfComponents="{}"'.format(num_comp)
+            if num_comp > 1 else ''))
+        header = np.array(sum(b.nbytes for b in blocks), dtype='<u8')
+        f.write(base64.b64encode(header.tobytes()).decode())
+        # base64 requires chunks with a multiple of 3 bytes
+        rest = b''
+        for block in blocks:
+            for i in range(0, len(block), chunksize):
+                buf = rest + block[i:i+chunksize].tobytes()
+                n = len(buf) - len(buf) % 3
+                f.write(base64.b64encode(buf[:n]).decode())
+                rest = buf[n:]
+        f.write(base64.b64encode(rest).decode())
+        f.write('\n</DataArray>\n')
+
+    num_cells = sum(len(c) for _, c in cells)
+    with open(filename, "w") as f:
+        f.write('<?xml version="1.0"?>\n'
+                '<VTKFile type="UnstructuredGrid" version="0.1" '
+                'byte_order="LittleEndian" header_type="UInt64">\n'
+                '<UnstructuredGrid>\n'
+                '<Piece NumberOfPoints="{}" NumberOfCells="{}">\n'.format(
+                    len(points), num_cells))
+        f.write('<Points>\n')
+        write_array(f, "Points", [points], '<f8')
+        f.write('</Points>\n<Cells>\n')
+        write_array(f, "connectivity", [c for _, c in cells], '<i8')
+        offsets = np.cumsum([c.shape[1] for _, c in cells
+                             for i in range(len(c))])
+        write_array(f, "offsets", [offsets], '<i8')
+        write_array(f, "types",
+                    [np.full(len(c), _vtu_cell_types[t]) for t, c in cells],
+                    '<u1')
+        f.write('</Cells>\n<PointData>\n')
+        for name, values in point_data.items():
+            write_array(f, name, [values], '<f8')
+        f.write('</PointData>\n<CellData>\n')
+        for name, blocks in cell_data.items():
+            write_array(f, name, blocks,
+                        '<i8' if np.asarray(blocks[0]).dtype.kind in 'iu'
+                        else '<f8')
+        f.write('</CellData>\n</Piece>\n</UnstructuredGrid>\n</VTKFile>\n')
+
+
+def _write_xdmf(filename, points, point_data, cells, cell_data,
+                cell_elements, isa, icase=0):
+    """write mesh and element induction of all move steps as
+    xdmf time series with heavy data in hdf5 file.
+    The mesh and static fields are stored only once and
+    referenced by all time steps.
+
+    Arguments:
+        cells: list of (cell type, node indexes) tuples
+        cell_data: dict of name and list of arrays (one per cell block)
+        cell_elements: list of element index arrays (-1 if no element)
+        isa: Isa7 object with element induction data
+        icase: index of load case
+    """
+    import os
+    import re
+    import h5py
+    try:
+        num_steps = isa.get_el_fe_induction(
+            icase, elements=slice(0, 1))[0].shape[1]
+    except (IndexError, KeyError):
+        raise ValueError("no element induction data for load case {}".format(
+            icase))
+    try:
+        pos = np.asarray(isa.pos_el_fe_induction, dtype=float)
+    except (AttributeError, ValueError):
+        pos = np.zeros(0)
+    if len(pos) != num_steps:
+        pos = np.arange(num_steps, dtype=float)
+
+    el = np.concatenate(cell_elements)
+    num_cells = len(el)
+    topology = np.concatenate(
+        [np.hstack((np.tile(_xdmf_cell_types[t], (len(c), 1)), c)).ravel()
+         for t, c in cells]) if cells else np.zeros(0, dtype=int)
+
+    h5name = os.path.splitext(filename)[0] + '.h5'
+    h5ref = os.path.basename(h5name)
+
+    def dsname(name):
+        return re.sub(r'[^A-Za-z0-9_]+', '_', name).strip('_')
+
+    def dataitem(path, shape, dtype):
+        return ('<DataItem Dimensions="{}" NumberType="{}" Precision="{}" '
+                'Format="HDF">{}:{}</DataItem>').format(
+                    ' '.join([str(d) for d in shape]),
+                    'Float' if dtype.kind == 'f' else 'Int',
+                    dtype.itemsize, h5ref, path)
+
+    def attribute(name, center, path, a):
+        return ('<Attribute Name="{}" AttributeType="{}" Center="{}">'
+                '{}</Attribute>').format(
+                    name, 'Vector' if a.ndim > 1 else 'Scalar', center,
+                    dataitem(path, a.shape, a.dtype))
+
+    static = []
+    with h5py.File(h5name, 'w') as h5:
+        h5['points'] = points
+        h5['topology'] = topology
+        mesh = ('<Topology TopologyType="Mixed" NumberOfElements="{}">'
+                '{}</Topology>\n'
+                '<Geometry GeometryType="XYZ">{}</Geometry>').format(
+                    num_cells,
+                    dataitem('/topology', topology.shape, topology.dtype),
+                    dataitem('/points', points.shape, points.dtype))
+        for name, a in point_data.items():
+            path = '/point_data/' + dsname(name)
+            h5[path] = a
+            static.append(attribute(name, 'Node', path, h5[path]))
+        for name, blocks in cell_data.items():
+            if name in ('b', 'Demagnetization'):  # single snapshot only
                 continue
-            if np.sqrt(v.x**2 + v.y**2) > isa.FC_RADIUS:
-                airgap_outer_elements.append(e)
-                break
-            else:
-                airgap_inner_elements.append(e)
-                break
+            path = '/cell_data/' + dsname(name)
+            h5[path] = np.concatenate(blocks)
+            static.append(attribute(name, 'Cell', path, h5[path]))
+
+        steps = []
+        sel = el >= 0
+        b = np.zeros((num_cells, 3))
+        for k in range(num_steps):
+            bx, by = isa.get_el_fe_induction(icase, steps=k)
+            b[sel, 0] = bx[el[sel]]
+            b[sel, 1] = by[el[sel]]
+            path = '/b/{}'.format(k)
+            h5[path] = b
+            steps.append(
+                ('<Grid Name="step_{0}" GridType="Uniform">\n'
+                 '<Time Value="{1}"/>\n{2}\n{3}\n{4}\n</Grid>').format(
+                     k, pos[k], mesh, '\n'.join(static),
+                     attribute('b', 'Cell', path, h5[path])))
+
+    with open(filename, 'w') as f:
+        f.write('<?xml version="1.0"?>\n'
+                '<Xdmf Version="3.0">\n<Domain>\n'
+                '<Grid Name="{}" GridType="Collection" '
+                'CollectionType="Temporal">\n'.format(
+                    os.path.splitext(h5ref)[0]))
+        f.write('\n'.join(steps))
+        f.write('\n</Grid>\n</Domain>\n</Xdmf>\n')
 
-    airgap_outer_vertices = [v for e in airgap_outer_elements
-                             for v in e.vertices]
 
-    airgap_lines = []
-    for e in airgap_center_elements:
-        ev = e.vertices
-        for i, v1 in enumerate(ev):
-            v2 = ev[i-1]
-            if v1 in airgap_outer_vertices and \
-               v2 in airgap_outer_vertices:
-                airgap_lines.append((v1, v2))
+def _from_isa(isa, filename, target_format,
+              extrude=0, layers=0, recombine=False, chunksize=CHUNKSIZE,
+              icase=0):
+
+    if not isa.FC_RADIUS:
+        logger.warning("airgap radius is not set in source file")
 
-    nodechain_links = defaultdict(list)
+    num_nodes = len(isa.nodes)
+    num_elements = len(isa.elements)
+    connectivity = isa.element_connectivity()
+    node_x, node_y = isa.node_pos.T
+    node_outside = np.sqrt(node_x**2 + node_y**2) > isa.FC_RADIUS
+
+    # airgap center elements have vertices on both sides of FC_RADIUS
+    airgap_center_elements = np.zeros(num_elements, dtype=bool)
+    airgap_center_vertices = np.zeros(num_nodes, dtype=bool)
+    for el_idx, nd_idx in connectivity.values():
+        outside = node_outside[nd_idx]
+        center = np.any(outside, axis=1) & ~np.all(outside, axis=1)
+        airgap_center_elements[el_idx] = center
+        airgap_center_vertices[nd_idx[center]] = True
+
+    # the first vertex on an airgap center element decides on
+    # the side of all other elements
+    airgap_inner_elements = np.zeros(num_elements, dtype=bool)
+    airgap_outer_elements = np.zeros(num_elements, dtype=bool)
+    airgap_outer_vertices = np.zeros(num_nodes, dtype=bool)
+    for el_idx, nd_idx in connectivity.values():
+        on_center = airgap_center_vertices[nd_idx]
+        found = np.any(on_center, axis=1) & ~airgap_center_elements[el_idx]
+        first = nd_idx[np.arange(len(nd_idx)), np.argmax(on_center, axis=1)]
+        outer = found & node_outside[first]
+        airgap_outer_elements[el_idx[outer]] = True
+        airgap_inner_elements[el_idx[found & ~node_outside[first]]] = True
+        airgap_outer_vertices[nd_idx[outer]] = True
+
+    # edge i of an element connects vertex i and i-1
+    edges = {nv: (nd_idx, np.roll(nd_idx, 1, axis=1))
+             for nv, (el_idx, nd_idx) in connectivity.items()}
+
+    airgap_lines = set()
+    for nv, (el_idx, nd_idx) in connectivity.items():
+        v1, v2 = edges[nv]
+        center = airgap_center_elements[el_idx]
+        v1, v2 = v1[center], v2[center]
+        sel = airgap_outer_vertices[v1] & airgap_outer_vertices[v2]
+        airgap_lines.update(zip(np.minimum(v1, v2)[sel].tolist(),
+                                np.maximum(v1, v2)[sel].tolist()))
+
+    nodechain_links = defaultdict(set)
     for nc in isa.nodechains:
-        nodechain_links[nc.node1].extend(nc.nodes)
-        nodechain_links[nc.node2].extend(nc.nodes)
+        nodes = [n.key - 1 for n in nc.nodes]
+        nodechain_links[nc.node1.key - 1].update(nodes)
+        nodechain_links[nc.node2.key - 1].update(nodes)
         if nc.nodemid is not None:
-            nodechain_links[nc.nodemid].extend(nc.nodes)
+            nodechain_links[nc.nodemid.key - 1].update(nodes)
+
+    bndcnd = np.array([n.bndcnd for n in isa.nodes], dtype=int)
+    node_on_boundary = np.array([n.on_boundary() for n in isa.nodes],
+                                dtype=bool)
 
     physical_lines = ["v_potential_0",
                       "v_potential_const",
@@ -86,176 +323,83 @@ def _from_isa(isa, filename, target_format,
                                       "Airgap_Outer",
                                       "PM1", "PM2",
                                       "PM3", "PM4"]))
+    surface_ids = {name: i + len(physical_lines) + 1
+                   for i, name in enumerate(physical_surfaces)}
+
+    def is_airgap_line(n1, n2):
+        return (min(n1, n2), max(n1, n2)) in airgap_lines
 
     def physical_line(n1, n2):
-        if (n1, n2) in airgap_lines or (n2, n1) in airgap_lines:
+        if is_airgap_line(n1, n2):
             return 7  # airgap
-        if n1.bndcnd == n2.bndcnd:
+        if bndcnd[n1] == bndcnd[n2]:
             return boundary_condition(n1)
         if boundary_condition(n1) == 1:
             return boundary_condition(n2)
         return boundary_condition(n1)
 
     def boundary_condition(node):
-        if node.bndcnd == 0:
+        if bndcnd[node] == 0:
             return 6  # no condition
-        if node.bndcnd == 1:
+        if bndcnd[node] == 1:
             return 1  # vpot 0
-        if node.bndcnd == 2:
+        if bndcnd[node] == 2:
             return 2  # vpot const
-        if node.bndcnd == 3 or node.bndcnd == 6:
+        if bndcnd[node] == 3 or bndcnd[node] == 6:
             return 4  # periodic -
-        if node.bndcnd == 4 or node.bndcnd == 5:
+        if bndcnd[node] == 4 or bndcnd[node] == 5:
             return 3  # periodic +
-        if node.bndcnd == 8 or node.bndcnd == 9:
+        if bndcnd[node] == 8 or bndcnd[node] == 9:
             return 1  # vpot 0
 
-    def physical_surface(e):
-
-        def surface_id(name):
-            return physical_surfaces.index(name) + len(physical_lines) + 1
-
-        if any(e.mag):
-            if e.mag[0] > 0:
-                if e.mag[1] > 0:
-                    return surface_id("PM1")
-                return surface_id("PM2")
-            if e.mag[1] > 0:
-                return surface_id("PM3")
-            return surface_id("PM4")
-
-        if e in airgap_inner_elements or e in airgap_center_elements:
-            return surface_id("Airgap_Inner")
-
-        if e in airgap_outer_elements:
-            return surface_id("Airgap_Outer")
-
-        sr_key = isa.superelements[e.se_key].sr_key
-        if sr_key == -1:
-            v = e.vertices[0]
-            if np.sqrt(v.x**2 + v.y**2) > isa.FC_RADIUS:
-                return surface_id("Air_Outer")
-            return surface_id("Air_Inner")
-
-        sr = isa.subregions[sr_key]
+    def line_on_boundary(n1, n2):
+        if node_on_boundary[n1] and node_on_boundary[n2]:
+            return n2 in nodechain_links.get(n1, ())
+        return is_airgap_line(n1, n2)
+
+    # element properties
+    el_data = np.array([(e.se_key, e.reluc[0], e.reluc[1],
+                         e.mag[0], e.mag[1], e.loss_density,
+                         bool(e.superelement.subregion and
+                              e.superelement.subregion.winding))
+                        for e in isa.elements], dtype=float).reshape(-1, 7)
+    se_key = el_data[:, 0].astype(int)
+    reluc = el_data[:, 1:3]
+    mag = el_data[:, 3:5]
+    loss_density = el_data[:, 5]
+    in_winding = el_data[:, 6] > 0
+    in_magnet = np.any(mag != 0, axis=1)
+
+    def superelement_surface(se):
+        if se.sr_key == -1:
+            return -1
+        sr = isa.subregions[se.sr_key]
         if sr.wb_key != -1:
             wb = isa.subregions[sr.wb_key]
             if sr.curdir > 0:
-                return surface_id("Winding_{}_-".format(wb.key))
-            return surface_id("Winding_{}_+".format(wb.key))
-
-        return surface_id(sr.name)
-
-    def line_on_boundary(n1, n2):
-        if n1.on_boundary() and n2.on_boundary():
-            if n1 in nodechain_links.keys():
-                return n2 in nodechain_links[n1]
-            else:
-                return False
-        else:
-            return (n1, n2) in airgap_lines or (n2, n1) in airgap_lines
-
-    points = [[n.x, n.y, 0] for n in isa.nodes]
-    vpot = [n.vpot[0] for n in isa.nodes]
-
-    lines = []
-    line_ids = []
-    triangles = []
-    quads = []
-    physical_ids = dict(triangle=[], quad=[])
-    geometrical_ids = dict(triangle=[], quad=[])
-    b = dict(triangle=[], quad=[])
-    h = dict(triangle=[], quad=[])
-    perm = dict(triangle=[], quad=[])
-    iron_losses = dict(triangle=[], quad=[])
-    mag_losses = dict(triangle=[], quad=[])
-    wdg_losses = dict(triangle=[], quad=[])
-    for e in isa.elements:
-        
-        ev = e.vertices
-        
-        for i, v in enumerate(ev):
-            v1, v2 = v, ev[i-1]
-            if line_on_boundary(v1, v2):
-                lines.append([v1.key - 1, v2.key - 1])
-                line_ids.append(physical_line(v1, v2))
-
-        if len(ev) == 3:
-            triangles.append([n.key - 1 for n in ev])
-            cell_type = "triangle"
-
-        elif len(ev) == 4:
-            quads.append([n.key - 1 for n in ev])
-            cell_type = "quad"
-            
-        physical_ids[cell_type].append(physical_surface(e))
-        geometrical_ids[cell_type].append(e.se_key)
-        b[cell_type].append(e.induction())
-        h[cell_type].append(e.demagnetization())
-        perm[cell_type].append(e.permeability())
-        iron_losses[cell_type].append(e.iron_loss_density())
-        mag_losses[cell_type].append(e.mag_loss_density())
-        wdg_losses[cell_type].append(e.wdg_loss_density())
-
-    if target_format == "msh":
-        import meshio
-
-        points = np.array(points)
-        point_data = {"potential": np.array(vpot)}
-
-        cells = []
-        cell_data = defaultdict(list)
-
-        if lines:
-            cells.append(("line", np.array(lines)))
-            cell_data["gmsh:geometrical"].append(np.array(line_ids))
-            cell_data["gmsh:physical"].append(np.array(line_ids))
-            cell_data["b"].append(np.zeros((len(lines), 3)))
-            cell_data["h"].append(np.zeros(len(lines)))
-            cell_data["Rel. Permeability"].append(np.zeros(len(lines)))
-            cell_data["Iron Loss Dens."].append(np.zeros(len(lines)))
-            cell_data["Mag. Loss Dens."].append(np.zeros(len(lines)))
-            cell_data["Wdg. Loss Dens."].append(np.zeros(len(lines)))
-
-        if triangles:
-            cells.append(("triangle", np.array(triangles)))
-            cell_data["gmsh:geometrical"].append(np.array(geometrical_ids["triangle"]))
-            cell_data["gmsh:physical"].append(np.array(physical_ids["triangle"]))
-            cell_data["b"].append(np.array([i + (0,) for i in b["triangle"]]))
-            cell_data["h"].append(np.array(h["triangle"]))
-            cell_data["Rel. Permeability"].append(np.array(perm["triangle"]))
-            cell_data["Iron Loss Dens."].append(np.array(iron_losses["triangle"]))
-            cell_data["Mag. Loss Dens."].append(np.array(mag_losses["triangle"]))
-            cell_data["Wdg. Loss Dens."].append(np.array(wdg_losses["triangle"]))
-
-        if quads:
-            cells.append(("quad", np.array(quads)))
-            cell_data["gmsh:geometrical"].append(np.array(geometrical_ids['quad']))
-            cell_data["gmsh:physical"].append(np.array(physical_ids['quad']))
-            cell_data["b"].append(np.array([i + (0,) for i in b['quad']]))
-            cell_data["h"].append(np.array(h['quad']))
-            cell_data["Rel. Permeability"].append(np.array(perm['quad']))
-            cell_data["Iron Loss Dens."].append(np.array(iron_losses['quad']))
-            cell_data["Mag. Loss Dens."].append(np.array(mag_losses['quad']))
-            cell_data["Wdg. Loss Dens."].append(np.array(wdg_losses['quad']))
-
-        field_data = {}
-        for l in physical_lines:
-            field_data[l] = np.array([physical_lines.index(l) + 1, 1])
-        for s in physical_surfaces:
-            field_data[s] = np.array([physical_surfaces.index(s) + 1
-                                      + len(physical_lines), 2])
-        meshio.write_points_cells(filename,
-                                  points,
-                                  cells,
-                                  point_data,
-                                  cell_data,
-                                  field_data,
-                                  file_format="gmsh22",
-                                  binary=False)
+                return surface_ids["Winding_{}_-".format(wb.key)]
+            return surface_ids["Winding_{}_+".format(wb.key)]
+        return surface_ids[sr.name]
+
+    physical_surface = np.array(
+        [superelement_surface(se) for se in isa.superelements],
+        dtype=int)[se_key] if num_elements else np.zeros(0, dtype=int)
+    air = physical_surface == -1
+    first_vertex_outside = np.zeros(num_elements, dtype=bool)
+    for el_idx, nd_idx in connectivity.values():
+        first_vertex_outside[el_idx] = node_outside[nd_idx[:, 0]]
+    physical_surface[air & first_vertex_outside] = surface_ids["Air_Outer"]
+    physical_surface[air & ~first_vertex_outside] = surface_ids["Air_Inner"]
+    physical_surface[airgap_outer_elements] = surface_ids["Airgap_Outer"]
+    physical_surface[airgap_inner_elements |
+                     airgap_center_elements] = surface_ids["Airgap_Inner"]
+    for name, sel in (("PM1", (mag[:, 0] > 0) & (mag[:, 1] > 0)),
+                      ("PM2", (mag[:, 0] > 0) & (mag[:, 1] <= 0)),
+                      ("PM3", (mag[:, 0] <= 0) & (mag[:, 1] > 0)),
+                      ("PM4", (mag[:, 0] <= 0) & (mag[:, 1] <= 0))):
+        physical_surface[in_magnet & sel] = surface_ids[name]
 
     if target_format == "geo":
-        import meshio
         geo = []
         nc_nodes = set([n for nc in isa.nodechains for n in nc.nodes])
 
@@ -269,7 +413,7 @@ def _from_isa(isa, filename, target_format,
                     nc.key, ", ".join([str(n.key) for n in nc.nodes])))
         used = set()
         for nc in isa.nodechains:
-            n1, n2 = nc.nodes[0], nc.nodes[1]
+            n1, n2 = nc.nodes[0].key - 1, nc.nodes[1].key - 1
             if line_on_boundary(n1, n2):
                 id_ = physical_line(n1, n2)
                 name = physical_lines[id_ - 1]
@@ -300,7 +444,8 @@ def _from_isa(isa, filename, target_format,
             geo.append("Plane Surface({0}) = {{{0}}};".format(se.key))
         used = set()
         for se in isa.superelements:
-            id_ = physical_surface(se.elements[0]) - len(physical_lines)
+            id_ = (physical_surface[se.elements[0].key - 1]
+                   - len(physical_lines))
             name = physical_surfaces[id_ - 1]
             if extrude:
                 geo.append(
@@ -330,70 +475,96 @@ def _from_isa(isa, filename, target_format,
                     "+=" if name in used else "=",
                     se.key))
             used.add(name)
-        
+
         with open(filename, "w") as f:
             f.write("\n".join(geo))
+        return
+
+    # boundary and airgap lines in element order
+    candidates = []
+    for nv, (el_idx, nd_idx) in connectivity.items():
+        v1, v2 = edges[nv]
+        sel = ((node_on_boundary[v1] & node_on_boundary[v2]) |
+               (airgap_outer_vertices[v1] & airgap_outer_vertices[v2]))
+        e, i = np.nonzero(sel)
+        candidates.append(np.column_stack((el_idx[e], i, v1[e, i], v2[e, i])))
+    candidates = np.concatenate(candidates) if candidates else \
+        np.zeros((0, 4), dtype=int)
+    candidates = candidates[np.lexsort((candidates[:, 1], candidates[:, 0]))]
+    lines = np.array([(n1, n2) for n1, n2 in candidates[:, 2:].tolist()
+                      if line_on_boundary(n1, n2)], dtype=int).reshape(-1, 2)
+    line_ids = np.array([physical_line(n1, n2) for n1, n2 in lines.tolist()],
+                        dtype=int)
+
+    # element fields
+    b = np.column_stack((isa.element_induction(), np.zeros(num_elements)))
+    h = np.zeros(num_elements)
+    magn = np.hypot(mag[:, 0], mag[:, 1])
+    alfa = np.arctan2(mag[:, 1], mag[:, 0])
+    hpol = b[:, 0]*np.cos(alfa) + b[:, 1]*np.sin(alfa) - magn
+    demag = ((np.abs(mag[:, 0]) > 1e-5) | (np.abs(mag[:, 1]) > 1e-5)) & \
+        (hpol < 0)
+    h[demag] = np.abs(hpol[demag] * np.abs(reluc[demag, 0])
+                      / (4*np.pi*1e-7 * 1000))
+    perm = np.ones(num_elements)
+    sel = reluc[:, 0] < 1
+    perm[sel] = 1/reluc[sel, 0]
+    iron = np.any(reluc != 1, axis=1) & ~in_magnet
+    iron_losses = np.where(iron, loss_density, 0)
+    mag_losses = np.where(in_magnet, loss_density, 0)
+    wdg_losses = np.where(in_winding, loss_density, 0)
+
+    points = np.column_stack((isa.node_pos, np.zeros(num_nodes)))
+    point_data = {"potential": np.array([n.vpot[0] for n in isa.nodes])}
 
-    if target_format == "vtu":
-        import meshio
-        assert len(points) == len(vpot)
-        assert len(lines) == len(line_ids)
-        assert len(triangles) == len(physical_ids['triangle']) == len(geometrical_ids['triangle']) == len(b['triangle']) == len(h['triangle']) == len(perm['triangle'])
-        assert len(quads) == len(physical_ids['quad']) == len(geometrical_ids['quad']) == len(b['quad']) == len(h['quad']) == len(perm['quad'])
-
-        points = np.array(points)
-        point_data = {"potential": np.array(vpot)}
-
-        cells = []
-        cell_data = defaultdict(list)
-
-        if lines:
-            cells.append(("line", np.array(lines)))
-            cell_data["GeometryIds"].append(np.array(line_ids))
-            cell_data["PhysicalIds"].append(np.array(line_ids))
-            cell_data["b"].append(np.zeros((len(lines), 3)))
-            cell_data["Demagnetization"].append(np.zeros(len(lines)))
-            cell_data["Rel. Permeability"].append(np.zeros(len(lines)))
-            cell_data["Iron Loss Dens."].append(np.zeros(len(lines)))
-            cell_data["Mag. Loss Dens."].append(np.zeros(len(lines)))
-            cell_data["Wdg. Loss Dens."].append(np.zeros(len(lines)))
-
-        if triangles:
-            cells.append(("triangle", np.array(triangles)))
-            cell_data["GeometryIds"].append(np.array(geometrical_ids['triangle']))
-            cell_data["PhysicalIds"].append(np.array(physical_ids['triangle']))
-            cell_data["b"].append(np.array([i + (0,) for i in b['triangle']]))
-            cell_data["Demagnetization"].append(np.array(h['triangle']))
-            cell_data["Rel. Permeability"].append(np.array(perm['triangle']))
-            cell_data["Iron Loss Dens."].append(np.array(iron_losses['triangle']))
-            cell_data["Mag. Loss Dens."].append(np.array(mag_losses['triangle']))
-            cell_data["Wdg. Loss Dens."].append(np.array(wdg_losses['triangle']))
-
-        if quads:
-            cells.append(("quad", np.array(quads)))
-            cell_data["GeometryIds"].append(np.array(geometrical_ids['quad']))
-            cell_data["PhysicalIds"].append(np.array(physical_ids['quad']))
-            cell_data["b"].append(np.array([i + (0,) for i in b['quad']]))
-            cell_data["Demagnetization"].append(np.array(h['quad']))
-            cell_data["Rel. Permeability"].append(np.array(perm['quad']))
-            cell_data["Iron Loss Dens."].append(np.array(iron_losses['quad']))
-            cell_data["Mag. Loss Dens."].append(np.array(mag_losses['quad']))
-            cell_data["Wdg. Loss Dens."].append(np.array(wdg_losses['quad']))
+    if target_format == "msh":
+        names = ("gmsh:geometrical", "gmsh:physical", "b", "h",
+                 "Rel. Permeability", "Iron Loss Dens.",
+                 "Mag. Loss Dens.", "Wdg. Loss Dens.")
+    else:
+        names = ("GeometryIds", "PhysicalIds", "b", "Demagnetization",
+                 "Rel. Permeability", "Iron Loss Dens.",
+                 "Mag. Loss Dens.", "Wdg. Loss Dens.")
+
+    cells = []
+    cell_data = defaultdict(list)
+    cell_elements = []
+    if len(lines):
+        cells.append(("line", lines))
+        cell_elements.append(np.full(len(lines), -1))
+        for name, values in zip(names, (
+                line_ids, line_ids, np.zeros((len(lines), 3)))):
+            cell_data[name].append(values)
+        for name in names[3:]:
+            cell_data[name].append(np.zeros(len(lines)))
+
+    for nv, cell_type in ((3, "triangle"), (4, "quad")):
+        if nv not in connectivity:
+            continue
+        el_idx, nd_idx = connectivity[nv]
+        cells.append((cell_type, nd_idx))
+        cell_elements.append(el_idx)
+        for name, values in zip(names, (
+                se_key, physical_surface, b, h, perm,
+                iron_losses, mag_losses, wdg_losses)):
+            cell_data[name].append(values[el_idx])
 
+    if target_format == "msh":
         field_data = {}
         for l in physical_lines:
             field_data[l] = np.array([physical_lines.index(l) + 1, 1])
         for s in physical_surfaces:
-            field_data[s] = np.array([physical_surfaces.index(s) + 1
-                                      + len(physical_lines), 2])
-        meshio.write_points_cells(filename,
-                                  points,
-                                  cells,
-                                  point_data=point_data,
-                                  cell_data=cell_data,
-                                  field_data=field_data,
-                                  file_format="vtu",
-                                  binary=True)
+            field_data[s] = np.array([surface_ids[s], 2])
+        _write_msh(filename, points, point_data, cells, cell_data,
+                   field_data, chunksize)
+
+    if target_format == "vtu":
+        _write_vtu(filename, points, point_data, cells, cell_data,
+                   chunksize)
+
+    if target_format == "xdmf":
+        _write_xdmf(filename, points, point_data, cells, cell_data,
+                    cell_elements, isa, icase)
 
 
 def _nastran_real_to_float(s):
@@ -567,6 +738,41 @@ def to_vtu(source, filename, infile_type=None):
         raise ValueError("cannot convert {} to .vtu".format(source))
 
 
+def to_xdmf(source, filename, icase=0, infile_type=None):
+    """
+    Convert a femag model with element induction data to a xdmf
+    time series (the mesh is written only once to a hdf5 file
+    with the same basename and is shared by all move steps).
+
+    Arguments:
+        source: instance of isa7.Isa7 or name of an I7/ISA7/NC file
+        filename: name of converted file
+        icase: index of load case (0: no load)
+        infile_type: format of source file
+    """
+    if isinstance(source, isa7.Isa7):
+        _from_isa(source, filename, "xdmf", icase=icase)
+
+    elif type(source) == str:
+        if infile_type:
+            file_ext = infile_type.lower()
+        else:
+            file_ext = source.split(".")[-1].lower()
+
+        if file_ext in ["isa7", "i7"]:
+            isa = isa7.read(source)
+            _from_isa(isa, filename, "xdmf", icase=icase)
+        elif file_ext == "nc":
+            from femagtools import nc
+            with nc.read(source) as isa:
+                _from_isa(isa, filename, "xdmf", icase=icase)
+        else:
+            raise ValueError(
+                "cannot convert files of format {} to .xdmf".format(file_ext))
+    else:
+        raise ValueError("cannot convert {} to .xdmf".format(source))
+
+
 def main(argv=None):
     # Parse command line arguments.
     parser = _get_parser()
@@ -583,6 +789,8 @@ def main(argv=None):
                recombine=args.recombine)
     elif args.output_format == 'vtu':
         to_vtu(args.infile, args.outfile)
+    elif args.output_format == 'xdmf':
+        to_xdmf(args.infile, args.outfile)
     else:
         raise ValueError(
                 "unsupported output format {}".format(args.output_format))
@@ -10,6 +10,8 @@ import os
 import json
 import logging
 import threading
+import concurrent.futures
+import femagtools.bch
 import femagtools.femag
 import femagtools.job
 import time
@@ -33,10 +35,28 @@ def publish_receive(message):
         logger.info('%s: len %d', topic, len(content.strip()))
 
 
+def read_bch(content):
+    """return bch.Reader of BCH file content (bytes)"""
+    bch = femagtools.bch.Reader()
+    bch.read(content.decode('latin1'))
+    return bch
+
+
 class AsyncFemag(threading.Thread):
-    def __init__(self, queue, port, host):
+    """send femag tasks of queue to docker container
+
+    Args:
+      queue: task queue
+      port: port number of dispatcher
+      host: hostname of dispatcher
+      executor: thread pool to parse results (parse in this thread if None)
+      keep_files: write result files to task directory if True
+    """
+    def __init__(self, queue, port, host, executor=None, keep_files=False):
         threading.Thread.__init__(self)
         self.queue = queue
+        self.executor = executor
+        self.keep_files = keep_files
         self.container = femagtools.femag.ZmqFemag(
             port, host)
 
@@ -83,19 +103,27 @@ class AsyncFemag(threading.Thread):
                     status, content = self.container.getfile(bchfile)
                     logging.info("get results %s: status %s len %d",
                                  task.id, status, len(content))
-                    with open(os.path.join(task.directory,
-                                           bchfile), 'wb') as f:
-                        f.write(content)
+                    if self.keep_files or task.result_func:
+                        with open(os.path.join(task.directory,
+                                               bchfile), 'wb') as f:
+                            f.write(content)
+                    if not task.result_func:
+                        if self.executor:
+                            task.result = self.executor.submit(
+                                read_bch, content)
+                        else:
+                            task.result = read_bch(content)
                 else:
                     task.status = 'X'
                     logger.warn("%s: %s", task.id, r[0]['message'])
-            except (KeyError, IndexError):
+            except Exception as e:
                 task.status = 'X'
-
-            logger.info("Task %s end status %s",
-                        task.id, task.status)
-            ret = self.container.release()
-            self.queue.task_done()
+                logger.error("%s: %s", task.id, e)
+            finally:
+                logger.info("Task %s end status %s",
+                            task.id, task.status)
+                self.container.release()
+                self.queue.task_done()
         self.container.close()
 
 
@@ -109,13 +137,19 @@ class Engine(object):
          dispatcher (str): hostname of dispatcher
          port (int): port number of dispatcher
          num_threads: number of threads to send requests
+         num_parsers: number of threads to parse results
+           (parse in request threads if 0)
+         keep_files: write result files to task directories if True
     """
     def __init__(self, dispatcher='127.0.0.1', port=5000,
-                 num_threads=5):
+                 num_threads=5, num_parsers=0, keep_files=False):
         self.port = port
         self.dispatcher = dispatcher
         self.num_threads = num_threads
+        self.num_parsers = num_parsers
+        self.keep_files = keep_files
         self.async_femags = None
+        self.executor = None
         
     def create_job(self, workdir):
         """Create a FEMAG :py:class:`CloudJob`
@@ -141,8 +175,12 @@ class Engine(object):
             
         logger.info("Request %d workers on %s",
                     self.num_threads, self.dispatcher )
+        if self.num_parsers > 0:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                self.num_parsers)
         self.async_femags = [AsyncFemag(self.queue,
-                                        self.port, self.dispatcher)
+                                        self.port, self.dispatcher,
+                                        self.executor, self.keep_files)
                              for i in range(self.num_threads)]
 
         for async_femag in self.async_femags:
@@ -167,4 +205,13 @@ class Engine(object):
         for async_femag in self.async_femags:
             async_femag.join()
 
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            for t in self.job.tasks:
+                if (isinstance(t.result, concurrent.futures.Future) and
+                        t.result.exception() is not None):
+                    logger.error("Task %s: %s", t.id, t.result.exception())
+                    t.status = 'X'
+
         return [t.status for t in self.job.tasks]
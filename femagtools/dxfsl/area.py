@@ -225,6 +225,15 @@ class Area(object):
 
         self.alpha = round(alpha_angle(self.min_angle, self.max_angle), 3)
 
+    def signature(self, dist_step, alpha_step):
+        """ return the quantized distances and angle of the area as hashable
+            key. Areas which are equal within a tolerance smaller than the
+            steps have keys which differ by at most 1 in each position.
+        """
+        return (int(np.floor(self.min_dist/dist_step)),
+                int(np.floor(self.max_dist/dist_step)),
+                int(np.floor(self.alpha/alpha_step)))
+
     def minmax_angle_dist_from_center(self, center, dist):
         circ = Circle(Element(center=center, radius=dist))
         s = self.area[0]
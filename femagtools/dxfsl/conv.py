@@ -7,6 +7,8 @@
 import sys
 import os
 import io
+import glob
+import multiprocessing
 import femagtools
 from femagtools.dxfsl.converter import convert
 import argparse
@@ -16,11 +18,61 @@ import logging.config
 logger = logging.getLogger(__name__)
 
 
+def _convert(args):
+    """convert a single file in a worker process"""
+    dxfile, kwargs = args
+    try:
+        return dxfile, convert(dxfile, **kwargs)
+    except Exception as ex:
+        logger.error("%s: %s", dxfile, ex)
+        return dxfile, dict(error=str(ex))
+
+
+def write_fsl(dxfile, res):
+    if res is None or 'fsl' not in res:
+        logger.warning("%s: no fsl created %s", dxfile,
+                       (res or {}).get('error', ''))
+        return
+    basename = os.path.basename(dxfile).split('.')[0]
+    with io.open(basename + '.fsl', 'w', encoding='utf-8') as f:
+        f.write('\n'.join(res['fsl']))
+
+
+def convert_dir(dirname, num_proc=0, **kwargs):
+    """convert all DXF files of a directory with one worker per file
+    and write the fsl files to the current directory
+
+    Arguments:
+      dirname: name of directory with DXF files
+      num_proc: number of processes (number of cpus if 0)
+      kwargs: arguments of convert
+    """
+    dxfiles = sorted(set(glob.glob(os.path.join(dirname, '*.dxf')) +
+                         glob.glob(os.path.join(dirname, '*.DXF'))))
+    if not dxfiles:
+        logger.warning("no DXF files found in %s", dirname)
+        return {}
+    num_proc = min(num_proc or multiprocessing.cpu_count(), len(dxfiles))
+    logger.info("convert %d files with %d processes",
+                len(dxfiles), num_proc)
+    tasks = [(d, kwargs) for d in dxfiles]
+    if num_proc > 1:
+        pool = multiprocessing.Pool(num_proc)
+        try:
+            results = dict(pool.imap_unordered(_convert, tasks))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = dict([_convert(t) for t in tasks])
+    return {d: results[d] for d in dxfiles}
+
+
 def main():
     argparser = argparse.ArgumentParser(
         description='Process DXF file and create a plot or FSL file.')
     argparser.add_argument('dxfile',
-                           help='name of DXF file')
+                           help='name of DXF file or directory of DXF files')
     argparser.add_argument('--inner',
                            help='name of inner element',
                            dest='inner',
@@ -113,6 +165,11 @@ def main():
                            help='print information in logfile',
                            dest='debug',
                            action="store_true")
+    argparser.add_argument('-j', '--jobs',
+                           help='number of processes',
+                           dest='jobs',
+                           type=int,
+                           default=0)
     argparser.add_argument('--version',
                            help='show version of some packages',
                            dest='version',
@@ -179,6 +236,29 @@ def main():
         if not (args.show_plots or args.show_areas or args.view):
             args.write_fsl = True
 
+    if os.path.isdir(args.dxfile):
+        if args.show_plots or args.show_areas or args.view:
+            logger.error("plots are not available for a directory")
+            sys.exit(1)
+        results = convert_dir(args.dxfile,
+                              num_proc=args.jobs,
+                              rtol=args.rtol,
+                              atol=args.atol,
+                              symtol=args.sym_tolerance,
+                              mindist=args.mindist,
+                              split=args.split,
+                              inner_name=args.inner,
+                              outer_name=args.outer,
+                              part=part,
+                              airgap=args.airgap,
+                              airgap2=args.airgap2,
+                              da=args.da,
+                              dy=args.dy,
+                              write_fsl=True)
+        for dxfile, res in results.items():
+            write_fsl(dxfile, res)
+        return
+
     res = convert(args.dxfile,  # DXF-Filename
                   rtol=args.rtol,    # relative pickdist toleranz
                   atol=args.atol,    # absolute pickdist toleranz
@@ -198,13 +278,11 @@ def main():
                   show_areas=args.show_areas,
                   write_fsl=args.write_fsl,
                   write_png=args.write_png,
-                  debug_mode=args.debugger)
+                  debug_mode=args.debugger,
+                  num_proc=args.jobs)
 
     if args.write_fsl:
-        if res is not None:
-            basename = os.path.basename(args.dxfile).split('.')[0]
-            with io.open(basename + '.fsl', 'w', encoding='utf-8') as f:
-                f.write('\n'.join(res['fsl']))
+        write_fsl(args.dxfile, res)
 
 
 if __name__ == "__main__":
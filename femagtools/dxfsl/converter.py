@@ -7,6 +7,16 @@
  Authors: Ronald Tanner, Beat Holm
 """
 import os
+import io
+import hashlib
+import inspect
+import json
+import pickle
+import collections
+import tempfile
+import multiprocessing
+import femagtools
+from femagtools.dxfsl import area
 from femagtools.dxfsl.geom import Geometry, dxfshapes, femshapes
 from femagtools.dxfsl.shape import Shape
 from femagtools.dxfsl.fslrenderer import FslRenderer, agndst
@@ -91,6 +101,46 @@ def symmetry_search(machine,
     return machine_ok
 
 
+def _symmetry_search(args):
+    """symmetry search of a machine part in a worker process"""
+    machine, kwargs = args
+    machine = symmetry_search(machine, None, **kwargs)
+    return machine, area.area_number
+
+
+def symmetry_search_parts(machine, inner_name, outer_name,
+                          symtol=0.0, num_proc=0):
+    """copy the inner and outer part of the machine and search
+    their symmetry axes. The parts are independent until they are synced
+    with each other and are processed in parallel if num_proc > 1.
+
+    returns tuple of inner and outer machine
+    """
+    parts = [(True, dict(kind=inner_name, is_inner=True, symtol=symtol,
+                         show_plots=False)),
+             (False, dict(kind=outer_name, is_outer=True, symtol=symtol,
+                          show_plots=False))]
+    if num_proc > 1:
+        pool = multiprocessing.Pool(min(num_proc, len(parts)))
+        try:
+            results = pool.map(_symmetry_search,
+                               [(machine.copy(0.0, 2*np.pi, True, inside),
+                                 kwargs)
+                                for inside, kwargs in parts])
+        finally:
+            pool.close()
+            pool.join()
+        # keep the area numbers unique
+        area.area_number = max([n for m, n in results] + [area.area_number])
+    else:
+        results = [_symmetry_search((machine.copy(0.0, 2*np.pi, True, inside),
+                                     kwargs))
+                   for inside, kwargs in parts]
+    machine_inner, machine_outer = [m for m, n in results]
+    machine_inner.set_inner()
+    return machine_inner, machine_outer
+
+
 def convert(dxfile,
             rtol=1e-03,
             atol=0.005,
@@ -111,7 +161,11 @@ def convert(dxfile,
             show_areas=False,
             write_fsl=True,
             write_png=False,
-            debug_mode=False):
+            debug_mode=False,
+            num_proc=0):
+    """convert a DXF (or FEMAG fem) file and return a dict with fsl and
+    model parameters. The inner and outer parts of the machine are
+    searched in parallel if num_proc > 1 and no plots are shown."""
     layers = ()
     conv = {}
 
@@ -216,7 +270,12 @@ def convert(dxfile,
     machine.repair_hull()
     machine.geom.delete_all_appendices()
 
-    if machine.has_airgap():
+    if machine.has_airgap() and not show_plots:
+        machine_inner, machine_outer = symmetry_search_parts(
+            machine, inner_name, outer_name,
+            symtol=symtol, num_proc=num_proc)
+
+    elif machine.has_airgap():
         machine_inner = machine.copy(0.0, 2*np.pi, True, True)
         machine_inner = symmetry_search(machine_inner,
                                         p,  # plot
@@ -240,6 +299,8 @@ def convert(dxfile,
                                         cols=2,  # columns
                                         num=4)   # start num
 
+    if machine.has_airgap():
+        # merge point: both parts are synced and processed in sequence
         machine_inner.sync_with_counterpart(machine_outer)
 
         machine_inner.search_subregions()
@@ -433,6 +494,117 @@ def convert(dxfile,
     return conv
 
 
+# directory of cached conversion results (no disk cache if None)
+# Note: the cache files are pickles that are loaded without any check,
+# the directory must not be writable by untrusted users
+DXFCACHE = os.environ.get('FEMAGTOOLS_DXFCACHE', None)
+# max number of entries in the memory and disk cache
+# (least recently used are removed)
+DXFCACHE_SIZE = 100
+_conv_cache = collections.OrderedDict()
+
+
+def cache_key(dxfile, **kwargs):
+    """return hash of file content, femagtools version
+    and all parameters of convert"""
+    params = inspect.signature(convert).bind(dxfile, **kwargs)
+    params.apply_defaults()
+    params = dict(params.arguments)
+    del params['dxfile']
+    params['name'] = os.path.basename(dxfile).split('.')[0]
+    params['version'] = femagtools.__version__
+    h = hashlib.sha256()
+    with open(dxfile, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    h.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def convert_cached(dxfile, cachedir=DXFCACHE, **kwargs):
+    """return result of convert from memory or disk cache
+
+    The result is stored in the cache if the conversion succeeds.
+    Conversions with plots are never cached. The memory and the disk
+    cache keep the DXFCACHE_SIZE most recently used results (see also
+    clear_cache). The cache files are pickles which are loaded without
+    verification: use only a private cachedir.
+
+    Arguments:
+      dxfile: name of DXF file
+      cachedir: directory of cache files (memory cache only if empty)
+      kwargs: arguments of convert
+    """
+    if any(kwargs.get(k) for k in ('view_only', 'show_plots',
+                                   'show_areas', 'write_png')):
+        return convert(dxfile, **kwargs)
+    key = cache_key(dxfile, **kwargs)
+    if key in _conv_cache:
+        logger.info("%s: cached", dxfile)
+        _conv_cache.move_to_end(key)
+        return pickle.loads(_conv_cache[key])
+    fname = os.path.join(cachedir, key + '.pkl') if cachedir else ''
+    if fname and os.path.isfile(fname):
+        try:
+            with open(fname, 'rb') as f:
+                data = f.read()
+            conv = pickle.loads(data)
+            _remember(key, data)
+            os.utime(fname)
+            logger.info("%s: read from cache %s", dxfile, fname)
+            return conv
+        except Exception as ex:
+            logger.warning("%s: invalid cache file %s", fname, ex)
+
+    conv = convert(dxfile, **kwargs)
+    if not conv or 'error' in conv or 'fsl' not in conv:
+        return conv
+    data = pickle.dumps(conv)
+    _remember(key, data)
+    if fname:
+        tmpname = ''
+        try:
+            os.makedirs(cachedir, exist_ok=True)
+            fd, tmpname = tempfile.mkstemp(dir=cachedir, suffix='.tmp')
+            with io.open(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmpname, fname)
+            _evict_cache(cachedir)
+        except OSError as ex:
+            logger.warning("cannot write cache %s: %s", fname, ex)
+            if tmpname and os.path.exists(tmpname):
+                os.remove(tmpname)
+    return conv
+
+
+def clear_cache():
+    """remove all conversion results from the memory cache"""
+    _conv_cache.clear()
+
+
+def _remember(key, data):
+    """store data in the memory cache and remove the least recently
+    used entries if there are more than DXFCACHE_SIZE"""
+    _conv_cache[key] = data
+    _conv_cache.move_to_end(key)
+    while len(_conv_cache) > DXFCACHE_SIZE:
+        _conv_cache.popitem(last=False)
+
+
+def _evict_cache(cachedir, size=None):
+    """remove the least recently used cache files
+    if there are more than size (default DXFCACHE_SIZE)"""
+    files = [os.path.join(cachedir, f) for f in os.listdir(cachedir)
+             if f.endswith('.pkl')]
+    size = DXFCACHE_SIZE if size is None else size
+    if len(files) <= size:
+        return
+    files.sort(key=os.path.getmtime)
+    for f in files[:len(files) - size]:
+        logger.debug("remove cache file %s", f)
+        os.remove(f)
+
+
 def create_femag_parameters(m_inner, m_outer, nodedist=1):
     if not (m_inner and m_outer):
         return {}
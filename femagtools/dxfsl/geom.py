@@ -71,26 +71,73 @@ def plot_area(area):
 ndec = 6  # number of decimals to round to
 
 
+class BoxIndex(object):
+    """bounding boxes of the output elements of intersect_and_split
+
+    The boxes are enlarged by the tolerance of the intersection tests.
+    Elements with disjoint boxes can neither overlap nor intersect.
+    """
+    def __init__(self, elements, rtol, atol):
+        self.elements = elements
+        self.rtol = rtol
+        self.atol = atol
+        self.boxes = np.empty((256, 4))
+        self.size = 0
+
+    def box(self, e):
+        try:
+            xmin, xmax, ymin, ymax = e.minmax()
+        except AttributeError:
+            return (-np.inf, np.inf, -np.inf, np.inf)
+        tol = self.atol + self.rtol*max(abs(xmin), abs(xmax),
+                                        abs(ymin), abs(ymax))
+        return (xmin - tol, xmax + tol, ymin - tol, ymax + tol)
+
+    def update(self):
+        n = len(self.elements)
+        if n > len(self.boxes):
+            self.boxes = np.resize(self.boxes, (max(n, 2*len(self.boxes)), 4))
+        for i in range(self.size, n):
+            self.boxes[i] = self.box(self.elements[i])
+        self.size = n
+
+    def candidates(self, el, start, stop):
+        """return indexes of elements in range(start, stop)
+        whose boxes overlap the box of el in ascending order"""
+        self.update()
+        xmin, xmax, ymin, ymax = self.box(el)
+        b = self.boxes[start:stop]
+        sel = ((b[:, 0] <= xmax) & (b[:, 1] >= xmin) &
+               (b[:, 2] <= ymax) & (b[:, 3] >= ymin))
+        return (start + np.nonzero(sel)[0]).tolist()
+
+
 def intersect_and_split(inp_elements, rtol, atol):
     logger.info("Load input elements ... ")
     out_elements = []
+    index = BoxIndex(out_elements, rtol, atol)
     for e in inp_elements:
         out_size = len(out_elements)
-        intersect_and_split_element(e, out_elements, 0, out_size, rtol, atol)
+        intersect_and_split_element(e, out_elements, 0, out_size, rtol, atol,
+                                    index)
     logger.info(" ... loaded")
     return out_elements
 
 
 def intersect_and_split_element(el, out_elements, out_start,
-                                out_size, rtol, atol):
+                                out_size, rtol, atol, index=None):
     # appends splitted elements
     # Unchanged out_size prevents repeated processing in recursive calls
-    for x in range(out_start, out_size):
+    if index is None:
+        candidates = range(out_start, out_size)
+    else:
+        candidates = index.candidates(el, out_start, out_size)
+    for x in candidates:
         split_el = add_or_split(el, x, out_elements, rtol, atol)
         if len(split_el) > 0:
             for e in split_el:
                 intersect_and_split_element(e, out_elements, x+1,
-                                            out_size, rtol, atol)
+                                            out_size, rtol, atol, index)
             return
     out_elements.append(el)
 
@@ -549,6 +596,38 @@ def single_path(edges):
 nodes_filecount = 0
 
 
+class NodeIndex(object):
+    """spatial hash of nodes with cell size atol
+
+    Nodes within distance atol of a point are found in the 3x3 cells
+    around the cell of the point. The insertion order is kept to select
+    the same node as a scan of all nodes in case of equal distances.
+    """
+    def __init__(self, nodes, atol):
+        self.atol = atol
+        self.cells = {}
+        self.count = 0
+        for n in nodes:
+            self.add(n)
+
+    def cell(self, p):
+        return (int(np.floor(p[0]/self.atol)),
+                int(np.floor(p[1]/self.atol)))
+
+    def add(self, n):
+        self.cells.setdefault(self.cell(n), {})[n] = self.count
+        self.count += 1
+
+    def neighbors(self, p):
+        """return nodes close to p in insertion order"""
+        i, k = self.cell(p)
+        nodes = [(seq, n)
+                 for ci in (i-1, i, i+1)
+                 for ck in (k-1, k, k+1)
+                 for n, seq in self.cells.get((ci, ck), {}).items()]
+        return [n for seq, n in sorted(nodes, key=lambda x: x[0])]
+
+
 class Geometry(object):
     """collection of connected shapes"""
     def __init__(self, elements=[],
@@ -578,6 +657,8 @@ class Geometry(object):
         self.atol = atol
         self.debug = debug
         self.num_edges = 0
+        self._node_index = None
+        self._half_edges = None
         i = 0
 
         def get_elements(elements, split):
@@ -595,7 +676,7 @@ class Geometry(object):
                 except Exception as ex:
                     logger.warn("EXCEPTION %s", ex)
                     if e:  # must be a circle
-                        self.g.add_node(e.center, object=e)
+                        self.add_node(e.center, object=e)
             i += 1
 
         self.num_edges = self.number_of_edges()
@@ -632,6 +713,7 @@ class Geometry(object):
                        round(n[1] + offset[1], ndec))
                    for n in self.g.nodes()}
         nx.relabel_nodes(self.g, mapping, copy=False)
+        self._node_index = None
 
     def rotate(self, alpha):
         """rotates all objects by angle alpha"""
@@ -646,6 +728,7 @@ class Geometry(object):
                        round(r[1], ndec))
                    for n, r in zip(self.g.nodes(), rotnodes)}
         nx.relabel_nodes(self.g, mapping, copy=False)
+        self._node_index = None
 
     def scale(self, factor):
         """scales all objects"""
@@ -657,6 +740,7 @@ class Geometry(object):
                        round(factor * n[1], ndec))
                    for n in self.g.nodes()}
         nx.relabel_nodes(self.g, mapping, copy=False)
+        self._node_index = None
         self.diameters = tuple([factor*d for d in self.diameters])
 
     def find_nodes0(self, *points):
@@ -665,10 +749,34 @@ class Geometry(object):
                        for x in p])
                 for p in points]
 
+    def node_index(self):
+        """return spatial index of all nodes"""
+        if self._node_index is None:
+            self._node_index = NodeIndex(self.g, self.atol)
+        return self._node_index
+
     def find_nodes(self, *points, **kwargs):
         """return closest nodes to points in arg within pickdist"""
+        if 'g' in kwargs:
+            return self._find_nodes_in_graph(kwargs['g'], *points)
+        index = self.node_index()
         n = []
-        nodes = list(kwargs.get('g', self.g))
+        for p in points:
+            nodes = [x for x in index.neighbors(p) if x in self.g]
+            if nodes:
+                c = np.asarray(nodes) - p
+                dist = np.sqrt(np.einsum('ij, ij->i', c, c))
+                idx = dist.argmin()
+                if dist[idx] < self.atol:
+                    n.append(nodes[idx])
+                    continue
+            n.append((round(p[0], ndec), round(p[1], ndec)))
+        return n
+
+    def _find_nodes_in_graph(self, g, *points):
+        """return closest nodes of graph g to points within pickdist"""
+        n = []
+        nodes = list(g)
         if nodes:
             anodes = np.asarray(nodes)
             for p in points:
@@ -748,8 +856,20 @@ class Geometry(object):
 
         entity.set_nodes(n1, n2)
         logger.debug("add_edge %s - %s", n1, n2)
+        self._index_nodes(n1, n2)
         self.g.add_edge(n1, n2, object=entity)
 
+    def add_node(self, n, **attr):
+        self._index_nodes(n)
+        self.g.add_node(n, **attr)
+
+    def _index_nodes(self, *nodes):
+        """add new nodes to spatial index"""
+        if self._node_index is not None:
+            for n in nodes:
+                if n not in self.g:
+                    self._node_index.add(n)
+
     def get_edge(self, eg):
         return [[e[0], e[1], e[2]['object']] for e in self.g.edges(data=True)
                 if e[2]['object'] is eg]
@@ -1064,16 +1184,42 @@ class Geometry(object):
         return (corners[0].point(), corners[len(corners)-1].point())
 
     def get_angle(self, alpha1, alpha2):
-        if np.isclose(alpha1, alpha2, 0.001, 0.001):
+        # same as np.isclose(alpha1, alpha2, 0.001, 0.001) for scalars
+        if abs(alpha1 - alpha2) <= 0.001 + 0.001*abs(alpha2):
             return 0.0
         return alpha_angle(alpha1, alpha2)
 
+    def half_edges(self, n):
+        """return neighbors of node n (without nodes close to n)
+        and the matrix of neighbors close to each other
+        (cached while the areas are created)"""
+        if self._half_edges is not None and n in self._half_edges:
+            return self._half_edges[n]
+        nbrs = [m for m in self.g.neighbors(n)
+                if not points_are_close(m, n)]
+        p = np.array(nbrs).reshape((-1, 2))
+        close = np.logical_and(
+            np.isclose(p[:, np.newaxis, 0], p[np.newaxis, :, 0]),
+            np.isclose(p[:, np.newaxis, 1], p[np.newaxis, :, 1]))
+        if self._half_edges is not None:
+            self._half_edges[n] = (nbrs, close)
+        return nbrs, close
+
     def get_edge_neighbors_list(self, alpha, info):
         n1 = info['n1']
         n2 = info['n2']
 
-        nbrs = [n for n in self.g.neighbors(n2)
-                if not (points_are_close(n, n1) or points_are_close(n, n2))]
+        if self._half_edges is None:
+            nbrs = [n for n in self.g.neighbors(n2)
+                    if not (points_are_close(n, n1) or
+                            points_are_close(n, n2))]
+        else:
+            nbrs, close = self.half_edges(n2)
+            try:
+                k = nbrs.index(n1)
+                nbrs = [n for n, c in zip(nbrs, close[:, k]) if not c]
+            except ValueError:
+                nbrs = [n for n in nbrs if not points_are_close(n, n1)]
         if len(nbrs) == 0:
             logger.debug("      FATAL: no neighbors of %s available ???", n2)
             return []
@@ -1210,6 +1356,16 @@ class Geometry(object):
         return nbrs2[0][2]
 
     def get_edge_info(self, n1, n2):
+        if self._half_edges is not None:
+            info = self._half_edges.get((n1, n2))
+            if info is None:
+                info = self._half_edges[(n1, n2)] = self._edge_info(n1, n2)
+            info = dict(info)
+            info['tracked'] = info['data'][info['x']]
+            return info
+        return self._edge_info(n1, n2)
+
+    def _edge_info(self, n1, n2):
         e_dict = self.g.get_edge_data(n1, n2)
         if not e_dict:
             raise ValueError("Fatal: no edge-data found from {} to {}"
@@ -1372,16 +1528,31 @@ class Geometry(object):
 
     def create_list_of_areas(self, crunch=False):
         """ return list of areas for each node and their neighbors
+
+        The neighbors and edge infos of all half-edges are cached during
+        the traversal. Identical areas are found by a hash of their
+        distances from the center.
         """
         if len(self.area_list) > 0:
             # list already available
             return
 
+        def area_key(a):
+            # relative tolerance of is_identical is far below 1e-4
+            return (int(np.floor(np.log1p(a.min_dist)*1e4)),
+                    int(np.floor(np.log1p(a.max_dist)*1e4)))
+
+        area_index = {}
+
         def append(area_list, a):
-            for area in area_list:
-                if area.is_identical(a):
-                    return
+            i, k = area_key(a)
+            for key in ((i+di, k+dk) for di in (-1, 0, 1)
+                        for dk in (-1, 0, 1)):
+                for area in area_index.get(key, []):
+                    if area.is_identical(a):
+                        return
             area_list.append(a)
+            area_index.setdefault((i, k), []).append(a)
 
         logger.debug("create new area list")
 
@@ -1395,30 +1566,35 @@ class Geometry(object):
             nx.set_edge_attributes(self.g, False, 2)
 
         crunched = 0
-        for n in self.g.nodes():
-            if self.debug:
-                print('.', end='', flush=True)
-
-            finished = False
-            while not finished:
-                finished = True
-                nbrs = [nbr for nbr in self.g.neighbors(n)]
-                for next_n in nbrs:
-                    result = self.get_new_area(n, next_n, len(nbrs) < 3)
-                    if result['ok']:
-                        area = result['area']
-                        a = Area(area, self.center, 0.0)
-                        logger.debug("Area %s found", a.identifier())
-                        if crunch:
-                            c = a.crunch_area(self)
-                        else:
-                            c = 0
-                        append(self.area_list, a)
-                        crunched += c
-                        if c > 0:
-                            # take care! may be there are new neighbors for n
-                            finished = False
-                            break
+        self._half_edges = {}
+        try:
+            for n in self.g.nodes():
+                if self.debug:
+                    print('.', end='', flush=True)
+
+                finished = False
+                while not finished:
+                    finished = True
+                    nbrs = [nbr for nbr in self.g.neighbors(n)]
+                    for next_n in nbrs:
+                        result = self.get_new_area(n, next_n, len(nbrs) < 3)
+                        if result['ok']:
+                            area = result['area']
+                            a = Area(area, self.center, 0.0)
+                            logger.debug("Area %s found", a.identifier())
+                            if crunch:
+                                c = a.crunch_area(self)
+                            else:
+                                c = 0
+                            append(self.area_list, a)
+                            crunched += c
+                            if c > 0:
+                                # take care! may be there are new neighbors
+                                self._half_edges = {}
+                                finished = False
+                                break
+        finally:
+            self._half_edges = None
 
         logger.debug("%s areas found and %s elements concatenated",
                      len(self.area_list), crunched)
@@ -1812,12 +1988,25 @@ class Geometry(object):
 
         arealist.sort()
 
+        # the steps of the area signatures exceed the tolerances of is_equal
+        dist_step = (max(sym_tolerance, 0.0) +
+                     1e-3*max([a.max_dist for a in arealist]) + 0.011)
+        alpha_step = 0.1
+        signatures = {}
+
         def add(areas, a):
+            i, j, k = a.signature(dist_step, alpha_step)
             if not a.is_circle():
-                for area in areas:
-                    if area.is_equal(a, sym_tolerance):
-                        area.increment(a)
+                candidates = sorted([x for key in ((i+di, j+dj, k+dk)
+                                                   for di in (-1, 0, 1)
+                                                   for dj in (-1, 0, 1)
+                                                   for dk in (-1, 0, 1))
+                                     for x in signatures.get(key, [])])
+                for x in candidates:
+                    if areas[x].is_equal(a, sym_tolerance):
+                        areas[x].increment(a)
                         return
+            signatures.setdefault((i, j, k), []).append(len(areas))
             areas.append(a)
 
         arealist_match = []
@@ -18,20 +18,24 @@ unit_pattern = re.compile('\[([A-Za-z/0-9 ]+)\]')
 num_pattern = re.compile(r'([+-]?\d+(?:\.\d+)?(?:[eE][+-]\d+)?)\s*')
 
 
-def read(filename):
+def read(filename, aslist=False):
     """read ERG file
     returns dict with array values
+
+    Args:
+      filename: name of ERG file
+      aslist: return lists instead of arrays
     """
     head = []
     units = []
-    m = []
+    lines = []
     with io.open(filename,
                  errors='ignore') as f:
         for l in f:
             if head and units:
-                n = num_pattern.findall(l)
-                if n:
-                    m.append([float(x) for x in n])
+                # numeric block
+                lines = [l] + f.readlines()
+                break
             elif head:
                 u = unit_pattern.findall(l)
                 if u:
@@ -41,13 +45,20 @@ def read(filename):
                 if h:
                     head = h
 
-    m = np.array(m).T
+    try:
+        m = np.loadtxt(lines, ndmin=2).T
+    except ValueError:
+        m = np.array([[float(x) for x in n]
+                      for n in [num_pattern.findall(l)
+                                for l in lines] if n]).T
     ncols = len(set(m[1]))
     i1 = np.reshape(m[0], (-1, ncols)).T[0]
     nrows = len(i1)
 
-    res = {k: (np.reshape(x, (nrows, ncols)).T[::-1]).tolist()
+    res = {k: np.reshape(x, (nrows, ncols)).T[::-1]
            for k, x in zip(head[2:], m[2:])}
-    res['i1'] = i1.tolist()
-    res['beta'] = m[1][:ncols][::-1].tolist()
+    res['i1'] = i1
+    res['beta'] = m[1][:ncols][::-1]
+    if aslist:
+        return {k: v.tolist() for k, v in res.items()}
     return res
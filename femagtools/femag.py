@@ -785,6 +785,14 @@ class ZmqFemag(BaseFemag):
                                  self.create_fsl(modelpars,
                                                  simulation),
                                  pub_consumer=pub_consumer)
+        return self._read_result(response, simulation, pub_consumer)
+
+    def _read_result(self, response, simulation, pub_consumer=None):
+        """return BCH results of fsl response
+
+        Raises:
+           FemagError
+        """
         r = json.loads(response[0])
         if r['status'] != 'ok':
             raise FemagError(r['message'])
@@ -819,6 +827,65 @@ class ZmqFemag(BaseFemag):
             return bch
         raise FemagError(r['message'])
 
+    def load_model(self, pmMachine, pub_consumer=None):
+        """create or open model and keep it loaded for subsequent
+        calls of run_analysis
+        Args:
+          pmMachine: dict with machine parameters or name of model
+
+        Raises:
+           FemagError
+        """
+        if isinstance(pmMachine, str):
+            modelpars = dict(name=pmMachine)
+        else:
+            modelpars = dict(pmMachine)
+        modelpars['exit_on_end'] = 'false'
+        modelpars['exit_on_error'] = 'false'
+        response = self.send_fsl(['save_model("close")'] +
+                                 self.create_fsl(modelpars, {}),
+                                 pub_consumer=pub_consumer)
+        r = json.loads(response[0])
+        if r['status'] != 'ok':
+            self.model = None
+            raise FemagError(r['message'])
+        return r
+
+    def run_analysis(self, simulation, pub_consumer=None):
+        """run analysis on the loaded model and return BCH results
+        Args:
+          simulation; dict with simulation parameters
+
+        Raises:
+           FemagError
+        """
+        if not getattr(self, 'model', None):
+            raise FemagError("no model loaded")
+        simulation = dict(simulation)
+        builder = femagtools.fsl.Builder()
+        builder.prepare_fea(self.model, simulation)
+        if self.model.is_complete():
+            builder.prepare_poc(self.model, simulation)
+        response = self.send_fsl(builder.create_analysis(simulation),
+                                 pub_consumer=pub_consumer)
+        return self._read_result(response, simulation, pub_consumer)
+
+    def run_analyses(self, simulations, pub_consumer=None):
+        """run list of analyses on the loaded model
+        and return list of BCH results (or dict with error message
+        if an analysis failed)
+        Args:
+          simulations; list of dicts with simulation parameters
+        """
+        results = []
+        for simulation in simulations:
+            try:
+                results.append(self.run_analysis(simulation, pub_consumer))
+            except FemagError as ex:
+                logger.error("analysis failed: %s", ex)
+                results.append(dict(error=str(ex)))
+        return results
+
 
 class FemagReadStream(Thread):
     def __init__(self, sub_socket, pub_consumer):
@@ -10,6 +10,7 @@
 import os
 import re
 import glob
+import multiprocessing
 import numpy as np
 import logging
 
@@ -51,6 +52,24 @@ def _readSections(f):
     yield section
 
 
+def _read_table(lines, ncols):
+    """return array of numeric table rows (index and ncols values)
+    without index column, rows with other number of values are ignored"""
+    a = np.fromstring(' '.join(lines), sep=' ')
+    nrows = a.size//(ncols + 1)
+    if a.size == nrows*(ncols + 1):
+        a = a.reshape(nrows, ncols + 1)
+        if np.all(a[:, 0] == np.arange(1, nrows + 1)):
+            return a[:, 1:]
+    # irregular table: parse line by line
+    m = []
+    for l in lines:
+        rec = l.split()[1:]
+        if len(rec) == ncols:
+            m.append([float(x) for x in rec])
+    return np.array(m, dtype=float).reshape(-1, ncols)
+
+
 class ForceDensity(object):
 
     def __init__(self):
@@ -104,12 +123,8 @@ class ForceDensity(object):
         d['column_units'] = {k: u for k, u in zip(labels,
                                                   [unit_pat.findall(u)[0]
                                                    for u in cols[1::2]])}
-        m = []
-        for l in content[4:]:
-            rec = l.split()[1:]
-            if len(rec) == len(labels):
-                m.append([float(x) for x in rec])
-        d.update({k: v for k, v in zip(labels, list(zip(*m)))})
+        m = _read_table(content[4:], len(labels))
+        d.update({k: tuple(v) for k, v in zip(labels, m.T.tolist())})
 
         self.positions.append(d)
 
@@ -131,20 +146,33 @@ class ForceDensity(object):
                     self.__read_position(s)
 
     def fft(self):
-        """return FFT of FN"""
-        import scipy.fftpack
+        """return FFT of FN
+
+        The FN values of one period (positions and X) are transformed
+        and mapped to the harmonic orders of the full circumference.
+        """
         try:
             ntiles = int(360/self.positions[0]['X'][-1])
-            FN = np.tile(
-                np.array([p['FN'][:-1] for p in self.positions[:-1]]),
-                (ntiles, ntiles))
+            FN = np.array([p['FN'][:-1] for p in self.positions[:-1]])
         except AttributeError:
             return []
 
-        N = FN.shape[0]
-        fdn = scipy.fftpack.fft2(FN)
+        P, M = FN.shape
+        N = ntiles*P
         dim = N//ntiles//2
-        return np.abs(fdn)[1:dim, 1:dim]/N
+        # orders of the full circumference that are multiples of ntiles
+        order = np.arange(ntiles, dim, ntiles)
+        fdn = np.zeros((dim-1, dim-1))
+        if not len(order):
+            return fdn
+        # 2d spectrum of one period with real input symmetry
+        fd = np.abs(np.fft.rfft2(FN))
+        k, l = np.meshgrid(order//ntiles, order//ntiles, indexing='ij')
+        conj = l > M//2
+        k = np.where(conj, -k % P, k)
+        l = np.where(conj, M - l, l)
+        fdn[np.ix_(order-1, order-1)] = ntiles*fd[k, l]/P
+        return fdn
     
     def items(self):
         return [(k, getattr(self, k)) for k in ('version',
@@ -172,26 +200,39 @@ def read(filename):
     return f
 
 
-def readall(workdir='.'):
+def readall(workdir='.', num_proc=0):
     """collect all recent PLT files
     returns list of ForceDensity objects
+
+    Args:
+      workdir: name of directory with PLT files
+      num_proc: number of processes (sequential if 0)
     """
     plt = dict()
     pltfiles = sorted(glob.glob(os.path.join(workdir, '*_*.PLT*')))
     base = os.path.basename(pltfiles[-1])
     lastserie = filename_pat.match(base).groups()[1]
+    files = []
     for p in pltfiles:
         base = os.path.basename(p)
         m = filename_pat.match(base)
         if m and lastserie == m.groups()[1]:
-            model, i, k = m.groups()
-            fdens = ForceDensity()
-            fdens.read(p)
-            logging.info("%s: %s", p, fdens.title)
-            if model in plt:
-                plt[model].append(fdens)
-            else:
-                plt[model] = [fdens]
+            files.append((m.groups()[0], p))
+    if num_proc > 1:
+        pool = multiprocessing.Pool(num_proc)
+        try:
+            results = pool.map(read, [p for _, p in files])
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [read(p) for _, p in files]
+    for (model, p), fdens in zip(files, results):
+        logging.info("%s: %s", p, fdens.title)
+        if model in plt:
+            plt[model].append(fdens)
+        else:
+            plt[model] = [fdens]
     return plt
 
 
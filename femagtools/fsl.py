@@ -13,7 +13,7 @@ import mako.lookup
 import os
 import re
 import sys
-from femagtools.dxfsl.converter import convert
+from femagtools.dxfsl.converter import convert_cached, DXFCACHE
 from . import __version__
 logger = logging.getLogger(__name__)
 
@@ -22,8 +22,31 @@ class FslBuilderError(Exception):
     pass
 
 
+# directory of compiled templates (optional)
+TEMPLATE_CACHE = os.environ.get('FEMAGTOOLS_TEMPLATE_CACHE', None)
+_lookups = {}
+
+
+def template_lookup(dirs, module_directory=None):
+    """return process-wide template lookup of directories
+    which keeps the compiled templates in memory
+    and in module_directory if set"""
+    key = (tuple(dirs), module_directory)
+    if key not in _lookups:
+        _lookups[key] = mako.lookup.TemplateLookup(
+            directories=dirs,
+            module_directory=module_directory,
+            disable_unicode=False, input_encoding='utf-8',
+            output_encoding='utf-8',
+            default_filters=['decode.utf8'])
+    return _lookups[key]
+
+
 class Builder:
-    def __init__(self):
+    def __init__(self, dxfcache=DXFCACHE, module_directory=TEMPLATE_CACHE):
+        """dxfcache: directory of cached DXF conversion results
+        (no disk cache if empty, see dxfsl.converter.convert_cached)
+        module_directory: directory of compiled templates"""
         if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
             # lookup up files in pyinstaller bundle
             logging.debug("Frozen!")
@@ -32,14 +55,11 @@ class Builder:
         else:
             dirs = [os.path.join(os.path.dirname(__file__), 'templates'),
                     os.path.join(os.getcwd(), '.')]
-        self.lookup = mako.lookup.TemplateLookup(
-            directories=dirs,
-            disable_unicode=False, input_encoding='utf-8',
-            output_encoding='utf-8',
-            default_filters=['decode.utf8'])
+        self.lookup = template_lookup(dirs, module_directory)
 
         self.fsl_stator = False
         self.fsl_magnet = False
+        self.dxfcache = dxfcache
 
     def create_stator_model(self, model):
         mcv = ["mcvkey_yoke = '{}'"
@@ -66,7 +86,8 @@ class Builder:
         params['airgap'] = -1.0
         pos = 'in' if model.external_rotor else 'out'
         params['part'] = ('stator', pos)
-        conv = convert(model.stator['dxffile']['name'], **params)
+        conv = convert_cached(model.stator['dxffile']['name'],
+                              cachedir=self.dxfcache, **params)
 
         model.stator['num_slots'] = conv.get('tot_num_slot')
         self.set_diameter_parameter(model, conv)
@@ -189,7 +210,8 @@ class Builder:
         pos = 'out' if model.external_rotor else 'in'
         params['part'] = ('rotor', pos)
         logger.info("Conv rotor from %s", templ + '.dxf')
-        conv = convert(model.magnet[templ]['name'], **params)
+        conv = convert_cached(model.magnet[templ]['name'],
+                              cachedir=self.dxfcache, **params)
         model.set_value('poles', int(conv.get('num_poles')))
         self.set_diameter_parameter(model, conv)
         if model.get('da2'):
@@ -274,7 +296,7 @@ class Builder:
         params['airgap'] = model.dxffile.get('airgap', 0.0)
         params['nodedist'] = model.dxffile.get('nodedist', 1)
 
-        conv = convert(dxfname, **params)
+        conv = convert_cached(dxfname, cachedir=self.dxfcache, **params)
 
         model.set_value('poles', conv.get('num_poles'))
         model.set_value('outer_diam', conv.get('dy1') * 1e-3)
@@ -384,8 +406,8 @@ class Builder:
         else:
             return []
 
-    def create(self, model, fea, magnets=None):
-        "create model and analysis function"
+    def prepare_fea(self, model, fea):
+        """add lfe, move_action and windings of model to fea"""
         try:
             fea['lfe'] = model.get('lfe')
         except AttributeError:
@@ -398,31 +420,38 @@ class Builder:
             fea.update(model.windings)
         except AttributeError:
             pass
-        
+
+    def prepare_poc(self, model, fea):
+        """set poc file name and rotation range of complete model in fea"""
+        if 'num_poles' in model.windings:
+            num_poles = model.windings['num_poles']
+        else:
+            num_poles = model.get('poles')
+        if 'poc' in fea:
+            poc = fea['poc']
+            poc.pole_pitch = 2*360/num_poles
+            fea['pocfilename'] = poc.filename()
+        else:
+            fea['pocfilename'] = (model.get('name') +
+                                  '_' + str(num_poles) +
+                                  'p.poc')
+
+        if 'phi_start' not in fea:
+            fea['phi_start'] = 0.0
+        if 'range_phi' not in fea:
+            fea['range_phi'] = 720/model.get('poles')
+
+    def create(self, model, fea, magnets=None):
+        "create model and analysis function"
+        self.prepare_fea(model, fea)
+
         if model.is_complete():
             logger.info("create new model and simulation")
             fslmodel = self.create_model(model, magnets)
-            if 'num_poles' in model.windings:
-                num_poles = model.windings['num_poles']
-            else:
-                num_poles = model.get('poles')
-            if 'poc' in fea:
-                poc = fea['poc']
-                poc.pole_pitch = 2*360/num_poles
-                fea['pocfilename'] = poc.filename()
-            else:
-                fea['pocfilename'] = (model.get('name') +
-                                      '_' + str(num_poles) +
-                                      'p.poc')
-
-            if 'phi_start' not in fea:
-                fea['phi_start'] = 0.0
-            if 'range_phi' not in fea:
-                fea['range_phi'] = 720/model.get('poles')
-            
+            self.prepare_poc(model, fea)
             return (fslmodel + self.create_analysis(fea) +
                     ['save_model("close")'])
-        
+
         logger.info("create open model and simulation")
         return (self.open_model(model) + 
                 self.create_analysis(fea) +
@@ -142,9 +142,10 @@ class Engine():
 
         # task.id is the uuid generated name for the bucket
         bucket = gcs.get_bucket(task.id)
-        # Close the tar file
-        task.tar_file.close()
-        
+        # Create the tar file
+        with open(task.file, 'wb') as f:
+            task.write_tar(f)
+
         blob = storage.Blob(os.path.basename(task.file), bucket)
         with open(task.file, 'rb') as file:
                 blob.upload_from_file(file)
@@ -21,6 +21,8 @@ import femagtools.moproblem
 import femagtools.getset
 import shutil
 import functools
+import re
+import concurrent.futures
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +75,75 @@ def create_parameter_range(domain):
     return np.array(s).T
 
 
+# scale factors of values in the FSL templates (mm, percent, rpm)
+FSL_SCALES = (1, 1e3, 100, 60, 1e-3)
+
+
+def fsl_template(render, samples):
+    """return a function that creates the FSL of decision values x
+    from a single rendered FSL with placeholders or None if this FSL
+    does not match the rendered FSL of all samples (e.g. if the
+    templates compute with the decision values other than
+    scaling them by FSL_SCALES)
+
+    Arguments:
+      render: function that returns the FSL lines of decision values x
+      samples: list of decision values to verify the template
+    """
+    n = len(samples[0])
+    # placeholders: unique numbers with exact str representation
+    placeholders = [np.float64(8765432.125 + k) for k in range(n)]
+    tokens = {}
+    for k, p in enumerate(placeholders):
+        for s in FSL_SCALES:
+            tokens.setdefault(str(p*s if s != 1 else p), []).append((k, s))
+    if any(len(v) > 1 for v in tokens.values()):
+        return None
+    try:
+        text = '\n'.join(render(placeholders))
+    except Exception as ex:
+        logger.debug("no fsl template: %s", ex)
+        return None
+    pattern = re.compile('|'.join(re.escape(t)
+                                  for t in sorted(tokens, key=len,
+                                                  reverse=True)))
+    parts = pattern.split(text)
+    index = [tokens[t][0] for t in pattern.findall(text)]
+
+    def fill(x):
+        fsl = [parts[0]]
+        for (k, s), p in zip(index, parts[1:]):
+            fsl += [str(x[k]*s if s != 1 else x[k]), p]
+        return ''.join(fsl).split('\n')
+
+    for x in samples:
+        if fill(x) != render(x):
+            logger.info("fsl template not applicable")
+            return None
+    logger.info("fsl template with %d placeholders", len(index))
+    return fill
+
+
+def write_task_files(tasks, num_threads=4):
+    """add files to tasks in parallel threads
+
+    Arguments:
+      tasks: list of tuples (task, list of (filename, content))
+      num_threads: number of threads
+    """
+    def add_files(args):
+        task, files = args
+        for fname, content in files:
+            task.add_file(fname, content)
+
+    if num_threads > 1 and len(tasks) > 1:
+        with concurrent.futures.ThreadPoolExecutor(num_threads) as ex:
+            list(ex.map(add_files, tasks))
+    else:
+        for t in tasks:
+            add_files(t)
+
+
 class Grid(object):
     """Parameter variation calculation"""
     def __init__(self, workdir,
@@ -137,8 +208,15 @@ class Grid(object):
         return model_files
     
     def __call__(self, opt, pmMachine, operatingConditions,
-                 engine, bchMapper=None):
-        """calculate objective vars for all decision vars"""
+                 engine, bchMapper=None, num_threads=4, use_template=False):
+        """calculate objective vars for all decision vars
+
+        The task files are written in num_threads threads.
+        If use_template is True the FSL of all tasks is filled into a
+        single rendered FSL if this matches the rendered FSL of some
+        samples (see fsl_template). Only use this if the FSL does not
+        depend on the decision values other than by inserting them.
+        """
 
         self.stop = False  # make sure the calculation will start. thomas.maier/OSWALD
 
@@ -185,6 +263,27 @@ class Grid(object):
             fea.poc.pole_pitch = 2*360/model.get('poles')
             fea.pocfilename = fea.poc.filename()
 
+        def build():
+            if immutable_model:
+                return (builder.create_open(model) +
+                        builder.create_fe_losses(model) +
+                        builder.create_analysis(fea) +
+                        ['save_model("close")'])
+            return (builder.create_model(model, self.femag.magnets) +
+                    builder.create_analysis(fea) +
+                    ['save_model("close")'])
+
+        def render(x):
+            prob.prepare(x, fea if immutable_model else [model, fea])
+            return build()
+
+        create_fsl = None
+        if use_template:
+            create_fsl = fsl_template(
+                render, [par_range[i]
+                         for i in sorted({0, len(par_range)//2,
+                                          len(par_range)-1})])
+
         elapsedTime = 0
         self.bchmapper_data = []  # clear bch data
         # split x value (par_range) array in handy chunks:
@@ -221,35 +320,26 @@ class Grid(object):
                         p, len(par_range)//len(population)+1,
                         np.shape(f))
             job.cleanup()
+            taskfiles = []
             for k, x in enumerate(population):
                 task = job.add_task(self.result_func)
                 if immutable_model:
                     prob.prepare(x, fea)
-                    for m in modelfiles:
-                        task.add_file(m)
-                    task.add_file(
-                        'femag.fsl',
-                        builder.create_open(model) +
-                        builder.create_fe_losses(model) +
-                        builder.create_analysis(fea) +
-                        ['save_model("close")'])
-                        
+                    files = [(m, None) for m in modelfiles]
                 else:
                     prob.prepare(x, [model, fea])
                     logger.info("prepare %s", x)
-                    for mc in self.femag.copy_magnetizing_curves(
-                            model,
-                            task.directory):
-                        task.add_file(mc)
-
-                    task.add_file(
-                        'femag.fsl',
-                        builder.create_model(model, self.femag.magnets) +
-                        builder.create_analysis(fea) +
-                        ['save_model("close")'])
+                    files = [(mc, None)
+                             for mc in self.femag.copy_magnetizing_curves(
+                                     model,
+                                     task.directory)]
+                files.append(('femag.fsl',
+                              create_fsl(x) if create_fsl else build()))
                 if hasattr(fea, 'poc'):
-                    task.add_file(fea.pocfilename,
-                                  fea.poc.content())
+                    files.append((fea.pocfilename,
+                                  fea.poc.content()))
+                taskfiles.append((task, files))
+            write_task_files(taskfiles, num_threads)
 
             tstart = time.time()
             status = engine.submit()
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+    femagtools.ironloss
+    ~~~~~~~~~~~~~~~~~~~
+
+    Calculate iron losses from the element induction of a FEMAG model
+
+    The induction waveforms of all elements are transformed with a
+    batched FFT and the losses of each harmonic are evaluated with the
+    Jordan (hysteresis and eddy current) or Steinmetz loss formula.
+"""
+import logging
+import multiprocessing
+import numpy as np
+from femagtools import losscoeffs as lc
+
+logger = logging.getLogger(__name__)
+
+# number of elements per FFT batch
+CHUNKSIZE = 10000
+
+
+def losscoeffs(mcv):
+    """return loss coefficients of a magnetizing curve
+
+    The coefficients ch, ch_freq, cw, cw_freq, b_coeff of the curve are used
+    if cw is set. Otherwise the Steinmetz coefficients are fitted
+    to the loss table of the curve.
+
+    Arguments:
+        mcv: mcv dict (see mcv.Reader.get_results) or mcv.Reader
+    """
+    if hasattr(mcv, 'get_results'):
+        mcv = mcv.get_results()
+    c = {k: float(mcv.get(k) or 0) for k in ('ch', 'ch_freq', 'cw', 'cw_freq',
+                                              'b_coeff', 'fo', 'Bo')}
+    c['rho'] = float(mcv.get('rho') or 7.65)
+    c['fillfac'] = float(mcv.get('fillfac') or 1.0)
+    if c['cw']:
+        return c
+    losses = mcv.get('losses') or {}
+    if not losses.get('pfe'):
+        raise ValueError("{} has no loss coefficients".format(
+            mcv.get('name', 'mcv')))
+    fo = c['fo'] or 50.0
+    Bo = c['Bo'] or 1.5
+    c['cw'], c['cw_freq'], c['b_coeff'] = lc.fitsteinmetz(
+        losses['f'], losses['B'], losses['pfe'], Bo, fo)
+    c['ch'] = 0.0
+    c['fo'], c['Bo'] = fo, Bo
+    return c
+
+
+def harmonics(b, nmax=0):
+    """return amplitudes of harmonics 1 .. nmax of waveforms
+
+    Arguments:
+        b: array of waveforms with samples of one period in last axis
+        nmax: highest harmonic (all if 0)
+    """
+    n = b.shape[-1]
+    bk = 2*np.abs(np.fft.rfft(b, axis=-1))/n
+    if n % 2 == 0:
+        bk[..., -1] /= 2  # nyquist frequency
+    if nmax:
+        return bk[..., 1:nmax+1]
+    return bk[..., 1:]
+
+
+def _chunk_losses(args):
+    """return hysteresis and eddy current loss density (W/kg)
+    of a chunk of elements with induction b1, b2"""
+    b1, b2, freq, nmax, c = args
+    f = freq*np.arange(1, b1.shape[-1]//2 + 1)
+    if nmax:
+        f = f[:nmax]
+    ph = np.zeros(b1.shape[0])
+    pw = np.zeros(b1.shape[0])
+    for b in (b1, b2):
+        bk = harmonics(b, nmax)
+        fb = (bk/c['Bo'][:, np.newaxis])**c['b_coeff'][:, np.newaxis]
+        fo = f/c['fo'][:, np.newaxis]
+        ph += np.sum(c['ch'][:, np.newaxis] *
+                     fo**c['ch_freq'][:, np.newaxis]*fb, axis=1)
+        pw += np.sum(c['cw'][:, np.newaxis] *
+                     fo**c['cw_freq'][:, np.newaxis]*fb, axis=1)
+    return ph, pw
+
+
+def element_losses(isa, coeffs, freq, icase=0, subregions=None, nmax=0,
+                   chunksize=CHUNKSIZE, num_proc=0, scale_factor=None):
+    """return iron losses of all elements and subregions
+
+    The induction samples of each element cover one period of the
+    waveform, the last sample (which closes the period) is ignored.
+    Both induction components are transformed separately and the
+    losses of all harmonics are summed up.
+
+    Arguments:
+        isa: Isa7 object with element induction data
+        coeffs: loss coefficients (see losscoeffs) or dict of subregion name
+          and loss coefficients
+        freq: frequency of the sampled period in Hz
+        icase: index of load case
+        subregions: names of subregions to include (all keys of coeffs
+          or all iron elements if None)
+        nmax: highest harmonic (all if 0)
+        chunksize: number of elements per batch
+        num_proc: number of processes (sequential if 0)
+        scale_factor: scale factor of subregion losses
+          (default number of poles / simulated poles)
+
+    returns dict with keys
+        elements: element indexes
+        hysteresis, eddy, total: element losses in W of the simulated model
+        subregions: dict of subregion name and dict with
+          hysteresis, eddy, total losses in W
+    """
+    if 'cw' in coeffs:
+        srcoeffs = {None: coeffs}
+    else:
+        srcoeffs = coeffs
+    if subregions is None and None not in srcoeffs:
+        subregions = list(srcoeffs)
+
+    # select elements and assign coefficients
+    el, srnames, cindex = [], [], []
+    clist = list(srcoeffs.values())
+    ckeys = list(srcoeffs)
+    for i, e in enumerate(isa.elements):
+        sr = e.superelement.subregion
+        name = sr.name.strip() if sr else ''
+        if subregions is not None:
+            if name not in subregions:
+                continue
+        elif e.reluc == (1.0, 1.0) or np.any(e.mag):
+            continue  # no iron element
+        try:
+            k = ckeys.index(name if name in srcoeffs else None)
+        except ValueError:
+            raise ValueError("no loss coefficients for subregion {}".format(
+                name))
+        el.append(i)
+        srnames.append(name)
+        cindex.append(k)
+    el = np.array(el, dtype=int)
+    cindex = np.array(cindex, dtype=int)
+    if not len(el):
+        raise ValueError("no iron elements found")
+
+    c = {k: np.array([float(cx.get(k, d)) for cx in clist])[cindex]
+         for k, d in (('ch', 0), ('ch_freq', 1), ('cw', 0),
+                      ('cw_freq', 2), ('b_coeff', 2),
+                      ('fo', 50), ('Bo', 1.5),
+                      ('rho', 7.65), ('fillfac', 1))}
+    # iron mass in kg (area in mm2, rho in kg/dm3)
+    area = np.array([isa.elements[i].area for i in el])
+    mass = area*1e-6*isa.ARM_LENGTH*c['rho']*1e3*c['fillfac']
+
+    def chunks():
+        for i in range(0, len(el), chunksize):
+            b1, b2 = isa.get_el_fe_induction(icase,
+                                             elements=el[i:i+chunksize])
+            if b1.shape[1] < 3:
+                raise ValueError(
+                    "no element induction data for load case {}".format(
+                        icase))
+            yield (b1[:, :-1], b2[:, :-1], freq, nmax,
+                   {k: v[i:i+chunksize] for k, v in c.items()})
+
+    if num_proc > 1:
+        pool = multiprocessing.Pool(num_proc)
+        try:
+            results = list(pool.imap(_chunk_losses, chunks()))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_chunk_losses(args) for args in chunks()]
+
+    hyst = np.concatenate([r[0] for r in results])*mass
+    eddy = np.concatenate([r[1] for r in results])*mass
+    logger.info("Iron losses of %d elements: %g W", len(el),
+                np.sum(hyst + eddy))
+
+    if scale_factor is None:
+        scale_factor = 2*isa.POLPAAR_ZAHL/isa.NO_POLES_SIM
+    srnames = np.array(srnames)
+    srlosses = {}
+    for name in dict.fromkeys(srnames):
+        sel = srnames == name
+        srlosses[name] = dict(
+            hysteresis=scale_factor*np.sum(hyst[sel]),
+            eddy=scale_factor*np.sum(eddy[sel]),
+            total=scale_factor*np.sum(hyst[sel] + eddy[sel]))
+    return dict(elements=el,
+                hysteresis=hyst,
+                eddy=eddy,
+                total=hyst + eddy,
+                subregions=srlosses)
@@ -11,7 +11,7 @@ import sys
 import pdb
 import re
 import numpy as np
-from collections import Counter
+from collections import Counter, defaultdict
 
 logger = logging.getLogger('femagtools.isa7')
 
@@ -614,18 +614,92 @@ class Isa7(object):
         # positions of all elements
         self.element_pos = np.array([e.center
                                      for e in self.elements])
-        
+        # positions of all nodes
+        self.node_pos = np.array([n.xy for n in self.nodes])
+        self._connectivity = None
+
         self.FC_RADIUS = reader.FC_RADIUS
         self.POLPAAR_ZAHL = reader.POLPAAR_ZAHL
         self.NO_POLES_SIM = reader.NO_POLES_SIM
         self.ARM_LENGTH = reader.ARM_LENGTH*1e-3  # in m
-        self.pos_el_fe_induction = reader.pos_el_fe_induction
-        self.el_fe_induction_1 = np.asarray(
-            [e for e in reader.el_fe_induction_1 if e[0]]).T/1000
-        self.el_fe_induction_2 = np.asarray(
-            [e for e in reader.el_fe_induction_2 if e[0]]).T/1000
-        self.eddy_cu_vpot = np.asarray(
-            [e for e in reader.eddy_cu_vpot if e[0]]).T/1000
+        if hasattr(reader, 'read_el_fe_induction'):
+            # lazy reader: induction data is read on demand
+            self._reader = reader
+            try:
+                self.pos_el_fe_induction = reader.pos_el_fe_induction
+            except KeyError:
+                self.pos_el_fe_induction = []
+            self._el_fe_induction = None
+        else:
+            self._reader = None
+            self.pos_el_fe_induction = reader.pos_el_fe_induction
+            self._el_fe_induction = [
+                np.asarray([e for e in b if e[0]]).T/1000
+                for b in (reader.el_fe_induction_1,
+                          reader.el_fe_induction_2,
+                          reader.eddy_cu_vpot)]
+
+    def _read_el_fe_induction(self):
+        """read full induction arrays from lazy reader"""
+        if self._el_fe_induction is None:
+            arrays = []
+            for name in ('el_fe_induction_1', 'el_fe_induction_2',
+                         'eddy_cu_vpot'):
+                a = np.asarray(getattr(self._reader, name))
+                if a.ndim == 3:  # (cases, steps, elements)
+                    a = a[:, np.newaxis]
+                arrays.append(a.T/1000)
+            self._el_fe_induction = arrays
+        return self._el_fe_induction
+
+    @property
+    def el_fe_induction_1(self):
+        """first induction component of all elements in T,
+        shape (num elements, num steps, 1, num load cases)"""
+        return self._read_el_fe_induction()[0]
+
+    @property
+    def el_fe_induction_2(self):
+        """second induction component of all elements in T,
+        shape (num elements, num steps, 1, num load cases)"""
+        return self._read_el_fe_induction()[1]
+
+    @property
+    def eddy_cu_vpot(self):
+        """vector potential of eddy current elements"""
+        return self._read_el_fe_induction()[2]
+
+    def get_el_fe_induction(self, icase=0, steps=slice(None),
+                            elements=slice(None)):
+        """return both induction components (in T) of load case icase
+        as arrays with shape (num elements, num steps).
+        Only the requested part is read from a lazy reader.
+
+        Arguments:
+            icase: index of load case
+            steps: index or slice of move steps
+            elements: index, slice or list of element indexes
+        """
+        if self._reader is not None and self._el_fe_induction is None:
+            return [np.asarray(b, dtype=float)/1000
+                    for b in self._reader.read_el_fe_induction(
+                        icase, steps, elements)]
+        return [b[elements, steps, 0, icase]
+                for b in (self.el_fe_induction_1,
+                          self.el_fe_induction_2)]
+
+    def close(self):
+        """close the file of a lazy reader (induction data that was
+        not read yet is not available afterwards)"""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     def get_subregion(self, name):
         """return subregion by name"""
@@ -644,6 +718,57 @@ class Isa7(object):
         k = np.argmin(np.linalg.norm(self.element_pos - (x, y), axis=1))
         return self.elements[k]
 
+    def element_connectivity(self):
+        """return dict of (element indexes, node indexes) arrays
+        grouped by the number of element vertices (all indexes 0-based)"""
+        if self._connectivity is None:
+            groups = defaultdict(lambda: ([], []))
+            for i, e in enumerate(self.elements):
+                el_idx, nd_idx = groups[len(e.vertices)]
+                el_idx.append(i)
+                nd_idx.append([v.key - 1 for v in e.vertices])
+            self._connectivity = {
+                nv: (np.array(el_idx, dtype=int),
+                     np.array(nd_idx, dtype=int).reshape(-1, nv))
+                for nv, (el_idx, nd_idx) in sorted(groups.items())}
+        return self._connectivity
+
+    def element_induction(self):
+        """return induction components of all elements
+        as array of shape (num elements, 2) (see Element.induction)"""
+        b = np.zeros((len(self.elements), 2))
+        if not self.elements:
+            return b
+        x, y = self.node_pos.T
+        vpot = np.array([n.vpot[0] for n in self.nodes])
+        el_type = np.array([e.el_type for e in self.elements])
+        length = np.array([e.superelement.length for e in self.elements])
+
+        def tri_induction(n1, n2, n3, lfe):
+            y31 = y[n3] - y[n1]
+            y21 = y[n2] - y[n1]
+            x13 = x[n1] - x[n3]
+            x21 = x[n2] - x[n1]
+            a21 = vpot[n2] - vpot[n1]
+            a31 = vpot[n3] - vpot[n1]
+            delta = lfe * (y31 * x21 + y21 * x13)
+            return np.array(((x13 * a21 + x21 * a31) / delta,
+                             (y21 * a31 - y31 * a21) / delta)).T
+
+        for nv, (el_idx, nd_idx) in self.element_connectivity().items():
+            if nv == 3:
+                sel = el_type[el_idx] == 1
+                n = nd_idx[sel].T
+                b[el_idx[sel]] = tri_induction(n[0], n[1], n[2],
+                                               length[el_idx[sel]])
+            elif nv == 4:
+                sel = el_type[el_idx] == 2
+                n = nd_idx[sel].T
+                lfe = length[el_idx[sel]]
+                b[el_idx[sel]] = (tri_induction(n[0], n[1], n[2], lfe) +
+                                  tri_induction(n[2], n[3], n[0], lfe))/2
+        return b
+
     def get_super_element(self, x, y):
         """return superelement at pos x,y"""
         e = self.get_element(x, y)
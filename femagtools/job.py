@@ -17,6 +17,8 @@ import femagtools.config as cfg
 import logging
 import uuid
 import importlib
+import concurrent.futures
+import math
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +29,42 @@ femagfile_error = ['ms_error',
                    'Fortran runtime error',
                    'Exception system errors']
 
+# wrapper script of packed condor tasks: runs femag in each task directory
+# given as argument (one after another or in parallel) and writes the
+# exit code of each run to the file exit_code in the task directory
+packscript = """#!/bin/sh
+for d in "$@"; do
+  (cd "$d" || exit
+   {femag} -b {fsl} </dev/null >femag.out 2>femag.err
+   echo $? >exit_code){bg}
+done
+wait
+"""
+
+
+def pack_size(duration, overhead, num_tasks=0, num_slots=0,
+              efficiency=0.8):
+    """return number of tasks to be run in one slot so that the
+    estimated solve time is at least efficiency of the slot time
+
+    Args:
+      duration: estimated duration of one task in s
+      overhead: scheduling and startup time of a slot in s
+      num_tasks: total number of tasks
+      num_slots: number of available slots (pack size is limited
+        so that all slots are used if num_tasks and num_slots are set)
+      efficiency: required fraction of solve time
+    """
+    if duration > 0:
+        k = int(math.ceil(round(
+            efficiency*overhead/((1 - efficiency)*duration), 9)))
+    else:
+        k = num_tasks or 1
+    if num_tasks and num_slots:
+        k = min(k, int(math.ceil(num_tasks/num_slots)))
+    return max(1, k)
+
+
 # https://python-3-patterns-idioms-test.readthedocs.io/en/latest/Factory.html
 class TaskFactory:
     factories = {}
@@ -65,6 +103,8 @@ class Task(object):
         self.status = None
         self.fsl_file = None
         self.id = id
+        # result received in memory (bch.Reader or Future)
+        self.result = None
         
     def add_file(self, fname, content=None):
         """adds a file required by this task
@@ -91,7 +131,12 @@ class Task(object):
         """returns result of most recent BCH file (or project specific results if result_func is set)"""
         if self.result_func:
             return self.result_func(self)
-        
+
+        if self.result is not None:
+            if isinstance(self.result, concurrent.futures.Future):
+                self.result = self.result.result()
+            return self.result
+
         result = femagtools.bch.Reader()
         # read latest bch file if any
         bchfile_list = sorted(glob.glob(os.path.join(
@@ -154,13 +199,20 @@ class Task(object):
         
 
 class CloudTask(Task):
+    """task whose files are transferred as tar.gz archive
+
+    The archive is not created before it is written
+    with :meth:`write_tar` (to a file or a stream).
+    """
     def __init__(self, id, directory, result_func=None):
         super(self.__class__, self).__init__(id, directory, result_func)
-        import tarfile
         self.file = "{}.tar.gz".format(self.directory)
-        self.tar_file = tarfile.open(self.file, "w:gz")
+        # list of (name, filename or content as bytes)
+        self.entries = []
         # Used for amazon
         self.ec2_instance = None
+        self.bucket = id
+        self.prefix = ''
 
     def add_file(self, fname, content=None):
         base = os.path.basename(fname)
@@ -168,20 +220,40 @@ class CloudTask(Task):
         if os.path.splitext(base)[-1] == '.fsl':
             self.fsl_file = base
 
-        info = self.tar_file.tarinfo()
-        info.name = base
         if content is None:
-            info.size = os.path.getsize(fname)
-            self.tar_file.addfile(info, open(fname, 'rb'))
+            self.entries.append((base, fname))
             return
 
-        import io
         if type(content) is list:
             content = '\n'.join(content)
-        info.size = len(content)
-        data = io.BytesIO(str.encode(content))
-        self.tar_file.addfile(info, data)
-        
+        self.entries.append((base, content.encode('utf-8')))
+
+    def write_tar(self, fileobj, compresslevel=1, exclude=()):
+        """write all files as gzip compressed tar archive
+
+        Args:
+          fileobj: writable file object (need not be seekable)
+          compresslevel: gzip compression level 1 (fast) .. 9 (small)
+          exclude: names of files that are not included
+        """
+        import gzip
+        import io
+        import tarfile
+        import time
+        with gzip.GzipFile(fileobj=fileobj, mode='wb',
+                           compresslevel=compresslevel) as gz:
+            with tarfile.open(fileobj=gz, mode='w|') as tar:
+                for name, data in self.entries:
+                    if name in exclude:
+                        continue
+                    if isinstance(data, bytes):
+                        info = tarfile.TarInfo(name)
+                        info.size = len(data)
+                        info.mtime = time.time()
+                        tar.addfile(info, io.BytesIO(data))
+                    else:
+                        tar.add(data, arcname=name)
+
     class Factory:
         def create(self, id, dir, result_func): return CloudTask(
                 id, dir, result_func)
@@ -195,6 +267,8 @@ class Job(object):
         self.runDirPrefix = ''
         self.basedir = basedir
         self.tasks = []
+        # number of tasks that are run in one slot
+        self.packsize = 1
 
     def cleanup(self):
         """removes all task directories of previous run"""
@@ -218,16 +292,32 @@ class Job(object):
         "set exit status of task"
         self.tasks[taskid].status = status
 
+    def packs(self):
+        """return list of task index lists with packsize tasks each"""
+        k = max(1, self.packsize)
+        return [list(range(i, min(i + k, len(self.tasks))))
+                for i in range(0, len(self.tasks), k)]
+
     def get_results(self):
         for t in self.tasks:
             yield t.get_results()
 
 
 class CondorJob(Job):
-    """represents a femag job that is to be run in HT Condor"""
-    def __init__(self, basedir):
+    """represents a femag job that is to be run in HT Condor
+
+    Args:
+      basedir: name of job directory
+      packsize: number of tasks that are run in one condor process
+      parallel: run the tasks of a pack in parallel if True
+    """
+    def __init__(self, basedir, packsize=1, parallel=False):
         super(self.__class__, self).__init__(basedir)
-    
+        # user log with the events of all tasks
+        self.logfile = 'femag.log'
+        self.packsize = packsize
+        self.parallel = parallel
+
     def prepareDescription(self):
         # create a flatten list of all files to be transferred
         transfer_files = [item for sublist in
@@ -243,6 +333,8 @@ class CondorJob(Job):
                 fslFilename = f
                 break
         numRuns = len(self.tasks)
+        if self.packsize > 1:
+            return self._preparePackedDescription(OpSys, fslFilename)
 # $(Process)                os.path.join(self.basedir, self.runDirPrefix)),
         submit = [
             'InitialDir   = {}/{}$(Process)'.format(
@@ -251,7 +343,8 @@ class CondorJob(Job):
             'Executable   = {}'.format(cfg.get_executable()),
             'Arguments    = -b {}'.format(fslFilename),
             'Output       = femag.out',
-            'Log          = femag.log',
+            'Log          = {}'.format(
+                os.path.join(self.basedir, self.logfile)),
             'Error        = femag.err',
             'Notification = never',
             'input        = /dev/null',
@@ -264,13 +357,92 @@ class CondorJob(Job):
             submitFile.writelines('\n'.join(submit))
         return filename
 
+    def _preparePackedDescription(self, OpSys, fslFilename):
+        """write wrapper script and submit description with one
+        condor process per pack of tasks (no file transfer: basedir
+        must be shared with the execute nodes)"""
+        if OpSys != "LINUX":
+            raise ValueError("task packing is not supported on {}".format(
+                OpSys))
+        script = os.path.join(self.basedir, 'femag-pack.sh')
+        with open(script, 'w') as f:
+            f.write(packscript.format(
+                femag=cfg.get_executable(),
+                fsl=os.path.basename(fslFilename),
+                bg=' &' if self.parallel else ''))
+        os.chmod(script, 0o755)
+        packs = self.packs()
+        submit = [
+            'InitialDir   = {}'.format(self.basedir),
+            'Universe     = vanilla',
+            'Executable   = {}'.format(script),
+            'Arguments    = $(taskdirs)',
+            'Output       = femag-pack$(Process).out',
+            'Log          = {}'.format(
+                os.path.join(self.basedir, self.logfile)),
+            'Error        = femag-pack$(Process).err',
+            'Notification = never',
+            'input        = /dev/null',
+            'requirements = (OpSys=="{}") && Arch=="x86_64"'.format(OpSys)]
+        if self.parallel:
+            submit.append('request_cpus = {}'.format(self.packsize))
+        submit += ['Queue taskdirs from ('] + [
+            ' '.join([os.path.relpath(self.tasks[i].directory,
+                                      self.basedir) for i in p])
+            for p in packs] + [')', '']
+        filename = os.path.join(self.basedir, "femag.submit")
+        with open(filename, 'w') as submitFile:
+            submitFile.writelines('\n'.join(submit))
+        return filename
+
 
 class CloudJob(Job):
     """Inheritance of :py:class:`Job`
 
-    Represents a femag amazon job"""
-    def __init__(self, basedir):
+    Represents a femag amazon job
+
+    Args:
+      basedir: name of job directory
+      packsize: number of tasks that are run on one instance
+    """
+    def __init__(self, basedir, packsize=1):
         super(self.__class__, self).__init__(basedir)
+        self.packsize = packsize
+
+    def shared_files(self, minsize=0):
+        """return files that are identical in more than one task
+
+        Args:
+          minsize: minimal size of files in bytes
+
+        Return:
+          list of tuples (name, digest, data, tasks) with the sha1 digest,
+          the filename or content (bytes) and the tasks
+          that include the file
+        """
+        import hashlib
+        digests = {}
+        files = {}
+        for t in self.tasks:
+            for name, data in t.entries:
+                if isinstance(data, bytes):
+                    if len(data) < minsize:
+                        continue
+                    digest = hashlib.sha1(data).hexdigest()
+                else:
+                    if data not in digests:
+                        digests[data] = None
+                        if os.path.getsize(data) >= minsize:
+                            with open(data, 'rb') as f:
+                                digests[data] = hashlib.sha1(
+                                    f.read()).hexdigest()
+                    digest = digests[data]
+                    if digest is None:
+                        continue
+                f = files.setdefault((name, digest), (name, digest, data, []))
+                if not f[3] or f[3][-1] is not t:
+                    f[3].append(t)
+        return [f for f in files.values() if len(f[3]) > 1]
 
     def add_task(self, result_func=None):
         "adds a new :py:class:`CloudTask` to this job"
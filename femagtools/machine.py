@@ -64,7 +64,7 @@ def invpark(a, q, d):
 def betai1(iq, id):
     """return beta and amplitude of dq currents"""
     return (np.arctan2(id, iq),
-            la.norm((id, iq), axis=0)/np.sqrt(2.0))
+            np.hypot(id, iq)/np.sqrt(2.0))
 
 
 def iqd(beta, i1):
@@ -131,7 +131,8 @@ class PmRelMachine(object):
         self.io = (1, -1)
         
     def torque_iqd(self, iq, id):
-        "torque at q-d-current"
+        "torque at q-d-current (scalars or arrays)"
+        iq, id = np.asarray(iq), np.asarray(id)
         psid, psiq = self.psi(iq, id)
         tq = self.m*self.p/2*(psid*iq - psiq*id)
         return tq
@@ -145,11 +146,14 @@ class PmRelMachine(object):
         return res.x
 
     def uqd(self, w1, iq, id):
-        """return uq, ud of frequency w1 and d-q current"""
+        """return uq, ud of frequency w1 and d-q current
+        (scalars or arrays)"""
+        iq, id = np.asarray(iq), np.asarray(id)
         psid, psiq = self.psi(iq, id)
         uqd = (self.r1*iq + w1*(self.ls*id + psid),
                self.r1*id - w1*(self.ls*iq + psiq))
-        logger.debug('beta i1 %s u1 %f', betai1(iq, id), la.norm(uqd))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('beta i1 %s u1 %s', betai1(iq, id), la.norm(uqd))
         return uqd
     
     def w1_umax(self, u, iq, id):
@@ -525,34 +529,38 @@ class PmRelMachineLdq(PmRelMachine):
             self.i1range = (0, np.max(i1))
             psid = np.sqrt(2)*np.asarray(kwargs['psid'])
             psiq = np.sqrt(2)*np.asarray(kwargs['psiq'])
-            self.psid = lambda x, y: ip.RectBivariateSpline(
-                beta, i1, psid, kx=kx, ky=ky).ev(x, y)
-            self.psiq = lambda x, y: ip.RectBivariateSpline(
-                beta, i1, psiq, kx=kx, ky=ky).ev(x, y)
+            self.psid = ip.RectBivariateSpline(
+                beta, i1, psid, kx=kx, ky=ky).ev
+            self.psiq = ip.RectBivariateSpline(
+                beta, i1, psiq, kx=kx, ky=ky).ev
             return
         if len(i1) < 4 or len(beta) < 4:
             if len(i1) == len(beta):
-                self.ld = lambda x, y: ip.interp2d(beta, i1, ld.T)(x, y)
-                self.psim = lambda x, y: ip.interp2d(beta, i1, psim.T)(x, y)
-                self.lq = lambda x, y: ip.interp2d(beta, i1, lq.T)(x, y)
-                logger.debug("interp2d beta %s i1 %s", beta, i1)
+                # bilinear interpolation, evaluated pointwise
+                self.ld = ip.RectBivariateSpline(
+                    beta, i1, np.asarray(ld), kx=1, ky=1).ev
+                self.psim = ip.RectBivariateSpline(
+                    beta, i1, np.asarray(psim), kx=1, ky=1).ev
+                self.lq = ip.RectBivariateSpline(
+                    beta, i1, np.asarray(lq), kx=1, ky=1).ev
+                logger.debug("bilinear beta %s i1 %s", beta, i1)
                 return
             elif len(i1) == 1:
-                self.ld = lambda x, y: ip.InterpolatedUnivariateSpline(
-                    beta, ld, k=1)(x)
-                self.psim = lambda x, y: ip.InterpolatedUnivariateSpline(
-                    beta, psim, k=1)(x)
-                self.lq = lambda x, y: ip.InterpolatedUnivariateSpline(
-                    beta, lq, k=1)(x)
+                ldfun = ip.InterpolatedUnivariateSpline(beta, ld, k=1)
+                psimfun = ip.InterpolatedUnivariateSpline(beta, psim, k=1)
+                lqfun = ip.InterpolatedUnivariateSpline(beta, lq, k=1)
+                self.ld = lambda x, y: ldfun(x)
+                self.psim = lambda x, y: psimfun(x)
+                self.lq = lambda x, y: lqfun(x)
                 logger.debug("interpolatedunivariatespline beta %s", beta)
                 return
             if len(beta) == 1:
-                self.ld = lambda x, y: ip.InterpolatedUnivariateSpline(
-                    i1, ld, k=1)(y)
-                self.psim = lambda x, y: ip.InterpolatedUnivariateSpline(
-                    i1, ld, k=1)(y)
-                self.lq = lambda x, y: ip.InterpolatedUnivariateSpline(
-                    i1, lq, k=1)(y)
+                ldfun = ip.InterpolatedUnivariateSpline(i1, ld, k=1)
+                psimfun = ip.InterpolatedUnivariateSpline(i1, ld, k=1)
+                lqfun = ip.InterpolatedUnivariateSpline(i1, lq, k=1)
+                self.ld = lambda x, y: ldfun(y)
+                self.psim = lambda x, y: psimfun(y)
+                self.lq = lambda x, y: lqfun(y)
                 logger.debug("interpolatedunivariatespline i1 %s", i1)
                 return
             
@@ -561,30 +569,38 @@ class PmRelMachineLdq(PmRelMachine):
             
         self.betarange = min(beta), max(beta)
         self.i1range = (0, np.max(i1))
-        self.ld = lambda x, y: ip.RectBivariateSpline(
-            beta, i1, np.asarray(ld)).ev(x, y)
-        self.psim = lambda x, y: ip.RectBivariateSpline(
-            beta, i1, np.asarray(psim)).ev(x, y)
-        self.lq = lambda x, y: ip.RectBivariateSpline(
-            beta, i1, np.asarray(lq)).ev(x, y)
+        self.ld = ip.RectBivariateSpline(
+            beta, i1, np.asarray(ld)).ev
+        self.psim = ip.RectBivariateSpline(
+            beta, i1, np.asarray(psim)).ev
+        self.lq = ip.RectBivariateSpline(
+            beta, i1, np.asarray(lq)).ev
         logger.debug("rectbivariatespline beta %s i1 %s", beta, i1)
            
     def psi(self, iq, id):
-        """return psid, psiq of currents iq, id"""
-        beta, i1 = betai1(np.asarray(iq), np.asarray(id))
-        logger.debug('beta %f (%f, %f) i1 %f %f',
-                     beta, self.betarange[0], self.betarange[1],
-                     i1, self.i1range[1])
-        if (self.betarange[0] <= beta <= self.betarange[1] and
-            i1 <= 1.01*self.i1range[1]):
-            if self.psid:
-                return (self.psid(beta, i1), self.psiq(beta, i1))
-
-            psid = self.ld(beta, i1)*id + np.sqrt(2)*self.psim(beta, i1)
-            psiq = self.lq(beta, i1)*iq
-            return (psid, psiq)
-
-        return (np.nan, np.nan)
+        """return psid, psiq of currents iq, id
+
+        iq, id may be scalars or arrays of any (broadcastable) shape.
+        Values outside of beta and i1 range are set to NaN."""
+        iq, id = np.broadcast_arrays(np.asarray(iq, dtype=float),
+                                     np.asarray(id, dtype=float))
+        beta, i1 = betai1(iq, id)
+        inrange = ((self.betarange[0] <= beta) &
+                   (beta <= self.betarange[1]) &
+                   (i1 <= 1.01*self.i1range[1]))
+        psid = np.full(beta.shape, np.nan)
+        psiq = np.full(beta.shape, np.nan)
+        b, i = beta[inrange], i1[inrange]
+        if self.psid:
+            psid[inrange] = self.psid(b, i)
+            psiq[inrange] = self.psiq(b, i)
+        else:
+            psid[inrange] = (self.ld(b, i)*id[inrange] +
+                             np.sqrt(2)*self.psim(b, i))
+            psiq[inrange] = self.lq(b, i)*iq[inrange]
+        if psid.ndim == 0:
+            return (psid[()], psiq[()])
+        return (psid, psiq)
 
     def iqdmin(self, i1):
         """max iq, min id for given current"""
@@ -634,28 +650,29 @@ class PmRelMachinePsidq(PmRelMachine):
         
         if np.any(psid.shape < (4, 4)):
             if psid.shape[0] > 1 and psid.shape[1] > 1:
-                self._psid = ip.interp2d(iq, id, psid.T)
-                self._psiq = ip.interp2d(iq, id, psiq.T)
+                # bilinear interpolation, evaluated pointwise
+                self._psid = ip.RectBivariateSpline(
+                    iq, id, psid, kx=1, ky=1).ev
+                self._psiq = ip.RectBivariateSpline(
+                    iq, id, psiq, kx=1, ky=1).ev
                 return
             if len(id) == 1 or psid.shape[1] == 1:
-                self._psid = lambda x, y: ip.InterpolatedUnivariateSpline(
-                    iq, psid)(x)
-                self._psiq = lambda x, y: ip.InterpolatedUnivariateSpline(
-                    iq, psiq)(x)
+                psidfun = ip.InterpolatedUnivariateSpline(iq, psid)
+                psiqfun = ip.InterpolatedUnivariateSpline(iq, psiq)
+                self._psid = lambda x, y: psidfun(x)
+                self._psiq = lambda x, y: psiqfun(x)
                 return
             if len(iq) == 1 or psid.shape[0] == 1:
-                self._psid = lambda x, y: ip.InterpolatedUnivariateSpline(
-                    id, psid)(y)
-                self._psiq = lambda x, y: ip.InterpolatedUnivariateSpline(
-                    id, psiq)(y)
+                psidfun = ip.InterpolatedUnivariateSpline(id, psid)
+                psiqfun = ip.InterpolatedUnivariateSpline(id, psiq)
+                self._psid = lambda x, y: psidfun(y)
+                self._psiq = lambda x, y: psiqfun(y)
                 return
             raise ValueError("unsupported array size {}x{}".format(
                 len(psid.shape[0]), psid.shape[1]))
             
-        self._psid = lambda x, y: ip.RectBivariateSpline(
-            iq, id, psid).ev(x, y)
-        self._psiq = lambda x, y: ip.RectBivariateSpline(
-            iq, id, psiq).ev(x, y)
+        self._psid = ip.RectBivariateSpline(iq, id, psid).ev
+        self._psiq = ip.RectBivariateSpline(iq, id, psiq).ev
 
     def psi(self, iq, id):
         return (self._psid(iq, id),
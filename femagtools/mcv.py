@@ -10,6 +10,8 @@
 """
 import json
 import functools
+import hashlib
+import pickle
 import sys
 import copy
 import logging
@@ -81,41 +83,49 @@ M_LOSS_FREQ = 20
 MUE0 = 4e-7*np.pi  # 1.2566371E-06
 
 
+def _induction_steps(bk02, db2, bmax):
+    """return squared induction values bk02 + k*db2 (k = 1, 2, ..)
+    up to the first value whose root is not below bmax"""
+    if db2 > 0:
+        n = max(int((bmax**2 - bk02)/db2), 0) + 2
+    elif db2 < 0:
+        n = max(int(bk02/-db2), 0) + 2
+    else:
+        raise ValueError("invalid db2 {}".format(db2))
+    while True:
+        bk12 = np.cumsum(np.concatenate(([bk02], np.full(n, db2))))[1:]
+        with np.errstate(invalid='ignore'):
+            bk1 = np.sqrt(bk12)
+        k = np.nonzero(~(bk1 <= bmax))[0]
+        if len(k):
+            return bk12[:k[0]+1], bk1[:k[0]+1]
+        n *= 2
+
+
 def approx(db2, curve):
     """return nuer, bi2, a, b approx for curve"""
-    nuek0 = (curve['hi'][1] - curve['hi'][0]) / \
-            (curve['bi'][1]-curve['bi'][0])
-    bk02 = curve['bi'][1]**2
-    nuer = [MUE0*nuek0]
-    bi2 = [bk02]
-    a = []
-    b = []
-
-    bk1 = 0.0
-    while bk1 <= curve['bi'][-1]:
-        bk12 = bk02 + db2
-        bk1 = np.sqrt(bk12)
-        j = 1
-        while j < len(curve['bi']) and bk1 > curve['bi'][j]:
-            j += 1
-        j -= 1
-        bdel = curve['bi'][j] - curve['bi'][j-1]
-        c1 = (curve['hi'][j] - curve['hi'][j-1])/bdel
-        c2 = curve['hi'][j-1] - c1*curve['bi'][j-1]
-
-        nuek1 = c1 + c2/bk1
-        a.append(MUE0*(bk12*nuek0 -
-                       bk02*nuek1)/db2)
-        b.append(MUE0*(nuek1 - nuek0)/db2)
-        nuek0 = nuek1
-        bk02 = bk12
-
-        nuer.append(MUE0*nuek1)
-        bi2.append(bk12)
-
-    a.append(1.0)
-    b.append(MUE0*curve['hi'][-1]-curve['bi'][-1])
-    return dict(nuer=nuer, a=a, b=b, bi2=bi2)
+    bi = np.asarray(curve['bi'], dtype=float)
+    hi = np.asarray(curve['hi'], dtype=float)
+    nuek0 = (hi[1] - hi[0])/(bi[1] - bi[0])
+    bk02 = bi[1]**2
+    bk12, bk1 = _induction_steps(bk02, db2, bi[-1])
+    # index of first value not below bk1 (starting at 1) minus 1
+    notbelow = ~(bk1[:, np.newaxis] > bi[np.newaxis, 1:])
+    j = np.where(np.any(notbelow, axis=1),
+                 np.argmax(notbelow, axis=1) + 1, len(bi)) - 1
+    bdel = bi[j] - bi[j-1]
+    c1 = (hi[j] - hi[j-1])/bdel
+    c2 = hi[j-1] - c1*bi[j-1]
+    nuek1 = c1 + c2/bk1
+    nuek = np.concatenate(([nuek0], nuek1))
+    bk2 = np.concatenate(([bk02], bk12))
+    a = MUE0*(bk2[1:]*nuek[:-1] - bk2[:-1]*nuek[1:])/db2
+    b = MUE0*(nuek[1:] - nuek[:-1])/db2
+
+    return dict(nuer=(MUE0*nuek).tolist(),
+                a=a.tolist() + [1.0],
+                b=b.tolist() + [MUE0*curve['hi'][-1]-curve['bi'][-1]],
+                bi2=bk2.tolist())
 
     
 def findNotNone(l):
@@ -232,18 +242,18 @@ class Writer(Mcv):
             return len(s)
         elif isinstance(d, int) or isinstance(d, float):
             return 4
+        elif isinstance(d, np.ndarray):
+            return 4 * d.size
         elif isinstance(d, list):
             le = 4 * len(d)
             if len(d) and isinstance(d[0], tuple):
                 le *= len(d[0])
             return le
-        elif isinstance(d, zip):
-            import copy
-            dc = copy.deepcopy(d)
-            return 4 * sum(len(i) for i in dc)
         return None
 
     def writeBlock(self, d):
+        if isinstance(d, zip):
+            d = list(d)
         le = self.getBlockLength(d)
         self.fp.write(struct.pack('i', le))
         if isinstance(d, string_types):
@@ -256,16 +266,21 @@ class Writer(Mcv):
             self.fp.write(struct.pack('i', d))
         elif isinstance(d, float):
             self.fp.write(struct.pack('f', d))
+        elif isinstance(d, np.ndarray):
+            self.fp.write(d.astype(np.float32).tobytes())
         elif isinstance(d, list):
-            for i in d:
-                self.writeData(i)
-        elif isinstance(d, zip):  # python3
-            for i in d:
-                self.writeData(i)
+            self.fp.write(self.packData(d))
         else:
             pass
         self.fp.write(struct.pack('i', le))
 
+    def packData(self, d):
+        """return list of int and float values (or tuples) as bytes"""
+        values = [x for i in d
+                  for x in (i if isinstance(i, tuple) else (i,))]
+        return struct.pack(''.join('i' if isinstance(x, int) else 'f'
+                                   for x in values), *values)
+
     def writeData(self, d):
         if isinstance(d, string_types):
             self.fp.write(bytes(d).decode('utf-8').encode('latin1'))
@@ -316,6 +331,15 @@ class Writer(Mcv):
             mi.extend([0.0] * (maxLen - len(mi)))
         return np.array(m).transpose(1, 0).tolist()
 
+    def columns(self, values):
+        """return lists of values as columns of float32 array
+        padded with zeros to MC1_NIMAX rows"""
+        a = np.zeros((self.MC1_NIMAX, len(values)), dtype=np.float32)
+        for i, v in enumerate(values):
+            v = v[:self.MC1_NIMAX]
+            a[:len(v), i] = v
+        return a
+
     def writeBinaryFile(self, fillfac=None):
         curve = self._prepare(fillfac)
         # write line, version_mc_curve
@@ -353,34 +377,17 @@ class Writer(Mcv):
         for K in range(0, self.mc1_curves):
             logger.debug(" K %d  Bi, Hi %d", K,  len(curve[K].get('bi', [])))
             # hi, bi
-            lb = curve[K].get('bi', [])
-            lh = curve[K].get('hi', [])
-            self.writeBlock(zip(*[
-                [float(lb[j]) if j < len(lb) else 0.
-                 for j in range(self.MC1_NIMAX)],
-                [float(lh[j]) if j < len(lh) else 0.
-                 for j in range(self.MC1_NIMAX)]]))
+            self.writeBlock(self.columns([curve[K].get('bi', []),
+                                          curve[K].get('hi', [])]))
 
             # bi2, nuer
-            lb = curve[K]['bi2']
-            ln = curve[K]['nuer']
-            self.writeBlock(zip(*[
-                [float(lb[j]) if j < len(lb) else 0.
-                 for j in range(self.MC1_NIMAX)],
-                [float(ln[j]) if j < len(ln) else 0.
-                 for j in range(self.MC1_NIMAX)]]))
+            self.writeBlock(self.columns([curve[K]['bi2'],
+                                          curve[K]['nuer']]))
 
             # a, b, c, d
-            la = curve[K].get('a', [0.]*self.MC1_NIMAX)
-            lb = curve[K].get('b', [0.]*self.MC1_NIMAX)
-            self.writeBlock(zip(*[
-                [float(la[j]) if j < len(la) else 0.
-                 for j in range(self.MC1_NIMAX)],
-                [float(lb[j]) if j < len(lb) else 0.
-                 for j in range(self.MC1_NIMAX)],
-                [0.]*50,
-                [0.]*50
-            ]))
+            self.writeBlock(self.columns([curve[K].get('a', []),
+                                          curve[K].get('b', []),
+                                          [], []]))
 
             #
             if self.version_mc_curve == self.ORIENTED_VERSION_MC_CURVE or \
@@ -465,7 +472,7 @@ class Reader(Mcv):
             elif d == float:
                 res = self.getReal()
             elif isinstance(d, list):
-                res = [self.readData(i) for i in d]
+                res = self.unpackData(d)
             else:
                 pass
 
@@ -484,13 +491,22 @@ class Reader(Mcv):
             # must be float?
             return self.getReal()
 
+    def unpackData(self, d):
+        """read list of int and float values with a single read"""
+        fmt = ''.join('i' if t == int else 'f' for t in d)
+        block = self.fp.read(4*len(fmt))
+        n = len(block)//4
+        if n < len(fmt):
+            if 'i' in fmt[n:]:
+                raise struct.error("incomplete block")
+            # missing reals are nan
+            return list(struct.unpack(fmt[:n], block[:4*n])) + \
+                [float('nan')]*(len(fmt) - n)
+        return list(struct.unpack(fmt, block))
+
     def getString(self, length=1):
         block = self.fp.read(length)
-        st = []
-        for i in range(0, len(block)):
-            (s,) = struct.unpack('c', block[i:i+1])
-            st.append(s.decode('latin1'))
-        return ''.join(st)
+        return block.decode('latin1')
 
     def getInteger(self, length=4):
         block = self.fp.read(length)
@@ -744,6 +760,8 @@ class MagnetizingCurve(object):
           a single mcv or
           a directory"""
         self.mcv = {}
+        # written files by (name, fillfac, digest of mcv)
+        self._files = {}
         if isinstance(mcvpar, list):
             logger.info("MagnetizingCurve is list")
             for m in mcvpar:
@@ -819,6 +837,7 @@ class MagnetizingCurve(object):
         return None
 
     def recalc(self):
+        self._files = {}
         for m in self.mcv:
             curve = self.mcv[m]['curve'][0]
             mi = MC1_MIMAX-2
@@ -844,39 +863,29 @@ class MagnetizingCurve(object):
 
             self.mcv[m]['db2'] = (curve['bi'][-1]**2 -
                                   curve['bi'][0]**2)/(mi-1)
-            nuek0 = (curve['hi'][1] - curve['hi'][0]) / \
-                    (curve['bi'][1]-curve['bi'][0])
-            for j1 in range(len(curve['bi'])):
-                    bk02 = curve['bi'][j1]**2
-                    if bk02 > 0:
-                        break
-            curve['nuer'] = [MUE0*nuek0]
-            curve['bi2'] = [bk02]
-            curve['a'] = []
-            curve['b'] = []
-
-            bk1 = 0.0
-            while bk1 <= curve['bi'][-1]:
-                bk12 = bk02 + self.mcv[m]['db2']
-                bk1 = np.sqrt(bk12)
-                j = 2
-                while j < len(curve['bi']) and bk1 <= curve['bi'][j]:
-                    j += 1
-                j -= 1
-                bdel = curve['bi'][j] - curve['bi'][j1]
-                c1 = (curve['hi'][j] - curve['hi'][j1])/bdel
-                c2 = curve['hi'][j1] - c1*curve['bi'][j1]
-
-                nuek1 = c1 + c2/bk1
-
-                curve['a'].append(MUE0*(bk12*nuek0 -
-                                        bk02*nuek1)/self.mcv[m]['db2'])
-                curve['b'].append(MUE0*(nuek1 - nuek0)/self.mcv[m]['db2'])
-                nuek0 = nuek1
-                bk02 = bk12
-
-                curve['nuer'].append(MUE0*nuek1)
-                curve['bi2'].append(bk12)
+            db2 = self.mcv[m]['db2']
+            bi = np.asarray(curve['bi'])
+            hi = np.asarray(curve['hi'])
+            nuek0 = (hi[1] - hi[0])/(bi[1] - bi[0])
+            j1 = np.nonzero(bi**2 > 0)[0]
+            j1 = j1[0] if len(j1) else len(bi) - 1
+            bk02 = bi[j1]**2
+            bk12, bk1 = _induction_steps(bk02, db2, bi[-1])
+            below = bk1[:, np.newaxis] > bi[np.newaxis, 2:]
+            j = np.where(np.any(below, axis=1),
+                         np.argmax(below, axis=1) + 2, len(bi)) - 1
+            bdel = bi[j] - bi[j1]
+            c1 = (hi[j] - hi[j1])/bdel
+            c2 = hi[j1] - c1*bi[j1]
+
+            nuek1 = c1 + c2/bk1
+            nuek = np.concatenate(([nuek0], nuek1))
+            bk2 = np.concatenate(([bk02], bk12))
+            curve['a'] = (MUE0*(bk2[1:]*nuek[:-1] -
+                                bk2[:-1]*nuek[1:])/db2).tolist()
+            curve['b'] = (MUE0*(nuek[1:] - nuek[:-1])/db2).tolist()
+            curve['nuer'] = (MUE0*nuek).tolist()
+            curve['bi2'] = bk2.tolist()
 
             curve['a'].append(1.0)
             curve['b'].append(MUE0*curve['hi'][-1]-curve['bi'][-1])
@@ -904,10 +913,21 @@ class MagnetizingCurve(object):
           fillfac: new fill factor (curves will be recalulated
                 if not None or 0)
 
+        The content of each file is created once per name, fillfac
+        and content of the mcv dict and copied on subsequent calls.
+
         returns filename if found else None
         """
         ext = '.MC' if sys.platform == 'win32' else '.MCV'
         mcv = self.find_by_name(name)
+        key = (name, fillfac,
+               hashlib.sha1(pickle.dumps(mcv)).hexdigest() if mcv else '')
+        if key in self._files:
+            filename, data = self._files[key]
+            with open(os.path.join(directory, filename), 'wb') as fp:
+                fp.write(data)
+            return filename
+
         if not mcv:
             bname = name
             filename = ''.join((name, ext))
@@ -937,9 +957,12 @@ class MagnetizingCurve(object):
         writer = Writer(mcv)
         writer.writeMcv(os.path.join(directory, filename),
                         fillfac=fillfac)
+        with open(os.path.join(directory, filename), 'rb') as fp:
+            self._files[key] = (filename, fp.read())
         return filename
 
     def fitLossCoeffs(self):
+        self._files = {}
         for m in self.mcv:
             if 'losses' not in self.mcv[m]:
                 continue
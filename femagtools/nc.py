@@ -17,164 +17,178 @@ class Reader(object):
     """
     Open and Read NetCDF file
 
+    The file is kept open and the variables are read on first access.
+    The element induction arrays are read by load case, move step
+    and element range with read_el_fe_induction.
+    Fill values are returned as they are (no masked arrays).
+    The file is closed with close (or Isa7.close of the model returned
+    by read).
+
     Arguments:
         filename: name of NetCDF nc file to be read
     """
+    # group: (reader attribute, netcdf variable) pairs
+    _groups = {
+        'nodes': (
+            ('NODE_ISA_NOD_EL_PNTR', 'bnd_cnd'),
+            ('NODE_ISA_NODE_REC_ND_BND_CND', 'bnd_cnd'),
+            ('NODE_ISA_NODE_REC_ND_PER_NOD', 'per_nod'),
+            ('NODE_ISA_NODE_REC_ND_CO_1', 'co_1'),
+            ('NODE_ISA_NODE_REC_ND_CO_2', 'co_2'),
+            ('NODE_ISA_ND_CO_RAD', 'co_rad'),
+            ('NODE_ISA_ND_CO_PHI', 'co_phi'),
+            ('NODE_ISA_NODE_REC_ND_VP_RE', 'vp_re'),
+            ('NODE_ISA_NODE_REC_ND_VP_IM', 'vp_im')),
+        'node_elements': (
+            ('NODE_ELE_ISA_NOD_EL_KEY', 'el_key'),
+            ('NODE_ELE_ISA_NOD_NXT_EL_PNTR', 'nxt_el_pntr')),
+        'nodechains': (
+            ('NDCHN_ISA_NDCHN_REC_NC_NOD_1', 'nod_1'),
+            ('NDCHN_ISA_NDCHN_REC_NC_NOD_2', 'nod_2'),
+            ('NDCHN_ISA_NDCHN_REC_NC_NOD_MID', 'nod_mid')),
+        'elements': (
+            ('ELEM_ISA_EL_NOD_PNTR', 'nod_pntr'),
+            ('ELEM_ISA_ELEM_REC_EL_TYP', 'type'),
+            ('ELEM_ISA_ELEM_REC_EL_SE_KEY', 'se_key'),
+            ('ELEM_ISA_ELEM_REC_EL_RELUC', 'reluc'),
+            ('ELEM_ISA_ELEM_REC_EL_RELUC_2', 'reluc_2'),
+            ('ELEM_ISA_ELEM_REC_EL_MAG_1', 'mag_1'),
+            ('ELEM_ISA_ELEM_REC_EL_MAG_2', 'mag_2'),
+            ('ELEM_ISA_ELEM_REC_LOSS_DENS', 'loss_dens')),
+        'element_nodes': (
+            ('ELE_NOD_ISA_ND_KEY', 'nd_key'),
+            ('ELE_NOD_ISA_NXT_ND_PNTR', 'nxt_nd_pntr')),
+        'superelements': (
+            ('SUPEL_ISA_SE_NDCHN_PNTR', 'ndch_pntr'),
+            ('SUPEL_ISA_SE_EL_PNTR', 'el_pntr'),
+            ('SUPEL_ISA_SUPEL_REC_SE_COL', 'color'),
+            ('SUPEL_ISA_SUPEL_REC_SE_MCV_TYP', 'mcv_type'),
+            ('SUPEL_ISA_SUPEL_REC_SE_COND_TYP', 'cond_type'),
+            ('SUPEL_ISA_SUPEL_REC_SE_VEL_SYS', 'vel_sys'),
+            ('SUPEL_ISA_SUPEL_REC_SE_SR_KEY', 'sr_key'),
+            ('SUPEL_ISA_SUPEL_REC_SE_VELO_1', 'velo_1'),
+            ('SUPEL_ISA_SUPEL_REC_SE_VELO_2', 'velo_2'),
+            ('SUPEL_ISA_SUPEL_REC_SE_CONDUC', 'conduc'),
+            ('SUPEL_ISA_SUPEL_REC_SE_LENGHT', 'length'),
+            ('SUPEL_ISA_SUPEL_REC_SE_CURD_RE', 'curd_re'),
+            ('SUPEL_ISA_SUPEL_REC_SE_CURD_IM', 'curd_im')),
+        'superelement_nodechains': (
+            ('SE_NDCHN_ISA_NC_KEY', 'nc_key'),
+            ('SE_NDCHN_ISA_NXT_NC_PNTR', 'nxt_nc_pntr')),
+        'superelement_elements': (
+            ('SE_EL_ISA_EL_KEY', 'el_key'),
+            ('SE_EL_ISA_NXT_EL_PNTR', 'nxt_el_pntr')),
+        'subregions': (
+            ('SR_ISA_SR_SE_PNTR', 'se_pntr'),
+            ('SR_ISA_SR_REC_SR_TYP', 'type'),
+            ('SR_ISA_SR_REC_SR_COL', 'color'),
+            ('SR_ISA_SR_REC_SR_NAME', 'name'),
+            ('SR_ISA_SR_REC_SR_CUR_DIR', 'cur_dir'),
+            ('SR_ISA_SR_REC_SR_WB_KEY', 'wb_key'),
+            ('SR_ISA_SR_REC_SR_NTURNS', 'nturns'),
+            ('SR_ISA_SR_REC_SR_SV_PNTR', 'sv_pntr'),
+            ('SR_ISA_SR_REC_SR_ARRAY', 'array'),
+            ('SR_ISA_SR_REC_SR_GCUR_RE', 'gcur_re'),
+            ('SR_ISA_SR_REC_SR_GCUR_IM', 'gcur_im'),
+            ('SR_ISA_SR_REC_SR_VOLT_RE', 'volt_re'),
+            ('SR_ISA_SR_REC_SR_VOLT_IM', 'volt_im')),
+        'subregion_superelements': (
+            ('SR_SE_ISA_SE_KEY', 'se_key'),
+            ('SR_SE_ISA_NXT_SE_PNTR', 'nxt_se_pntr')),
+        'windings': (
+            ('WB_ISA_WB_SR_PNTR', 'sr_pntr'),
+            ('WB_ISA_WB_REC_WB_COL', 'color'),
+            ('WB_ISA_WB_REC_WB_NAME', 'name'),
+            ('WB_ISA_WB_REC_WB_TURN', 'turn'),
+            ('WB_ISA_WB_REC_WB_UNIT_RES', 'turn'),
+            ('WB_ISA_WB_REC_WB_SR_NUM', 'sr_num'),
+            ('WB_ISA_WB_REC_WB_WND_KEY', 'wnd_key'),
+            ('WB_ISA_WB_REC_WB_GCUR_RE', 'gcur_re'),
+            ('WB_ISA_WB_REC_WB_GCUR_IM', 'gcur_im'),
+            ('WB_ISA_WB_REC_WB_VOLT_RE', 'volt_re'),
+            ('WB_ISA_WB_REC_WB_VOLT_IM', 'volt_im'),
+            ('WB_ISA_WB_REC_WB_IMPDZ_RE', 'impdz_re'),
+            ('WB_ISA_WB_REC_WB_IMPDZ_IM', 'impdz_im')),
+        'winding_subregions': (
+            ('WB_SR_ISA_SR_KEY', 'sr_key'),
+            ('WB_SR_ISA_NXT_SR_PNTR', 'nxt_sr_pntr')),
+        'el_fe_induction': (
+            ('pos_el_fe_induction', 'position'),
+            ('el_fe_induction_1', 'induction_1'),
+            ('el_fe_induction_2', 'induction_2'),
+            ('eddy_cu_vpot', 'eddy_cu_vpot'))}
+    # groups with a trailing dummy entry
+    _truncated = ('nodes', 'node_elements', 'nodechains', 'elements')
 
     def __init__(self, filename):
-        ds = netCDF4.Dataset(filename)
+        self.ds = netCDF4.Dataset(filename)
+        self.ds.set_auto_mask(False)
+        self._variables = {attr: (grp, var)
+                           for grp, variables in self._groups.items()
+                           for attr, var in variables}
         self.POINT_ISA_POINT_REC_PT_CO_X = []
         self.POINT_ISA_POINT_REC_PT_CO_Y = []
         self.LINE_ISA_LINE_REC_LN_PNT_1 = []
         self.LINE_ISA_LINE_REC_LN_PNT_2 = []
-        
-        grp = ds.groups['nodes']
-        (self.NODE_ISA_NOD_EL_PNTR,
-         self.NODE_ISA_NODE_REC_ND_BND_CND,
-         self.NODE_ISA_NODE_REC_ND_PER_NOD,
-         self.NODE_ISA_NODE_REC_ND_CO_1,
-         self.NODE_ISA_NODE_REC_ND_CO_2,
-         self.NODE_ISA_ND_CO_RAD,
-         self.NODE_ISA_ND_CO_PHI,
-         self.NODE_ISA_NODE_REC_ND_VP_RE,
-         self.NODE_ISA_NODE_REC_ND_VP_IM) = [
-             grp.variables[k][:-1]
-             for k in ('bnd_cnd', 'bnd_cnd', 'per_nod',
-                       'co_1', 'co_2', 'co_rad', 'co_phi', 'vp_re', 'vp_im')]
-
-        grp = ds.groups['node_elements']
-        (self.NODE_ELE_ISA_NOD_EL_KEY,
-         self.NODE_ELE_ISA_NOD_NXT_EL_PNTR) = [
-             grp.variables[k][:-1]
-             for k in ('el_key', 'nxt_el_pntr')]
-
-        grp = ds.groups['nodechains']
-        (self.NDCHN_ISA_NDCHN_REC_NC_NOD_1,
-         self.NDCHN_ISA_NDCHN_REC_NC_NOD_2,
-         self.NDCHN_ISA_NDCHN_REC_NC_NOD_MID) = [
-             grp.variables[k][:-1]
-             for k in ('nod_1', 'nod_2', 'nod_mid')]
-
-        grp = ds.groups['elements']
-        (self.ELEM_ISA_EL_NOD_PNTR,
-         self.ELEM_ISA_ELEM_REC_EL_TYP,
-         self.ELEM_ISA_ELEM_REC_EL_SE_KEY,
-         self.ELEM_ISA_ELEM_REC_EL_RELUC,
-         self.ELEM_ISA_ELEM_REC_EL_RELUC_2,
-         self.ELEM_ISA_ELEM_REC_EL_MAG_1,
-         self.ELEM_ISA_ELEM_REC_EL_MAG_2,
-         self.ELEM_ISA_ELEM_REC_LOSS_DENS) = [
-             grp.variables[k][:-1]
-             for k in ('nod_pntr', 'type', 'se_key', 'reluc', 'reluc_2',
-                       'mag_1', 'mag_2', 'loss_dens')]
-             
-        grp = ds.groups['element_nodes']
-        (self.ELE_NOD_ISA_ND_KEY,
-         self.ELE_NOD_ISA_NXT_ND_PNTR) = [
-             grp.variables[k]
-             for k in ('nd_key', 'nxt_nd_pntr')]
-                        
-        grp = ds.groups['superelements']
-        (self.SUPEL_ISA_SE_NDCHN_PNTR,
-         self.SUPEL_ISA_SE_EL_PNTR,
-         self.SUPEL_ISA_SUPEL_REC_SE_COL,
-         self.SUPEL_ISA_SUPEL_REC_SE_MCV_TYP,
-         self.SUPEL_ISA_SUPEL_REC_SE_COND_TYP,
-         self.SUPEL_ISA_SUPEL_REC_SE_VEL_SYS,
-         self.SUPEL_ISA_SUPEL_REC_SE_SR_KEY,
-         self.SUPEL_ISA_SUPEL_REC_SE_VELO_1,
-         self.SUPEL_ISA_SUPEL_REC_SE_VELO_2,
-         self.SUPEL_ISA_SUPEL_REC_SE_CONDUC,
-         self.SUPEL_ISA_SUPEL_REC_SE_LENGHT,
-         self.SUPEL_ISA_SUPEL_REC_SE_CURD_RE,
-         self.SUPEL_ISA_SUPEL_REC_SE_CURD_IM) = [
-            grp.variables[k][:]
-            for k in ('ndch_pntr', 'el_pntr', 'color', 'mcv_type',
-                      'cond_type', 'vel_sys', 'sr_key', 'velo_1',
-                      'velo_2', 'conduc', 'length', 'curd_re', 'curd_im')]
- 
-        grp = ds.groups['superelement_nodechains']
-        (self.SE_NDCHN_ISA_NC_KEY,
-         self.SE_NDCHN_ISA_NXT_NC_PNTR) = [
-            grp.variables[k][:]
-            for k in ('nc_key', 'nxt_nc_pntr')]
-        
-        grp = ds.groups['superelement_elements']
-        (self.SE_EL_ISA_EL_KEY,
-         self.SE_EL_ISA_NXT_EL_PNTR) = [
-            grp.variables[k][:]
-            for k in ('el_key', 'nxt_el_pntr')]
-
-        grp = ds.groups['subregions']
-        (self.SR_ISA_SR_SE_PNTR,
-         self.SR_ISA_SR_REC_SR_TYP,
-         self.SR_ISA_SR_REC_SR_COL,
-         names,
-         self.SR_ISA_SR_REC_SR_CUR_DIR,
-         self.SR_ISA_SR_REC_SR_WB_KEY,
-         self.SR_ISA_SR_REC_SR_NTURNS,
-         self.SR_ISA_SR_REC_SR_SV_PNTR,
-         self.SR_ISA_SR_REC_SR_ARRAY,
-         self.SR_ISA_SR_REC_SR_GCUR_RE,
-         self.SR_ISA_SR_REC_SR_GCUR_IM,
-         self.SR_ISA_SR_REC_SR_VOLT_RE,
-         self.SR_ISA_SR_REC_SR_VOLT_IM) = [
-            grp.variables[k][:]
-            for k in ('se_pntr', 'type', 'color', 'name', 'cur_dir',
-                      'wb_key', 'nturns', 'sv_pntr', 'array',
-                      'gcur_re', 'gcur_im', 'volt_re', 'volt_im')]
-        self.SR_ISA_SR_REC_SR_NAME = [''.join(str(n, encoding='utf-8'))
-                                      for n in names]
-        grp = ds.groups['subregion_superelements']
-        (self.SR_SE_ISA_SE_KEY,
-         self.SR_SE_ISA_NXT_SE_PNTR) = [
-            grp.variables[k][:]
-            for k in ('se_key', 'nxt_se_pntr')]
-
-        grp = ds.groups['windings']
-        (self.WB_ISA_WB_SR_PNTR,
-         self.WB_ISA_WB_REC_WB_COL,
-         names,
-         self.WB_ISA_WB_REC_WB_TURN,
-         self.WB_ISA_WB_REC_WB_SR_NUM,
-         self.WB_ISA_WB_REC_WB_WND_KEY,
-         self.WB_ISA_WB_REC_WB_GCUR_RE,
-         self.WB_ISA_WB_REC_WB_GCUR_IM,
-         self.WB_ISA_WB_REC_WB_VOLT_RE,
-         self.WB_ISA_WB_REC_WB_VOLT_IM,
-         self.WB_ISA_WB_REC_WB_IMPDZ_RE,
-         self.WB_ISA_WB_REC_WB_IMPDZ_IM) = [
-            grp.variables[k][:]
-            for k in ('sr_pntr', 'color', 'name', 'turn', 'sr_num',
-                      'wnd_key', 'gcur_re', 'gcur_im',
-                      'volt_re', 'volt_im', 'impdz_re', 'impdz_im')]
-        self.WB_ISA_WB_REC_WB_UNIT_RES = self.WB_ISA_WB_REC_WB_TURN
-        self.WB_ISA_WB_REC_WB_NAME = [''.join(str(n, encoding='utf-8'))
-                                      for n in names]
-        grp = ds.groups['winding_subregions']
-        (self.WB_SR_ISA_SR_KEY,
-         self.WB_SR_ISA_NXT_SR_PNTR) = [
-            grp.variables[k][:]
-            for k in ('sr_key', 'nxt_sr_pntr')]
-
-        self.FC_RADIUS = float(ds.variables['fc_radius'].getValue().data)
-        self.POLPAAR_ZAHL = int(ds.variables['pole_pairs'].getValue().data)
-        self.NO_POLES_SIM = int(ds.variables['poles_sim'].getValue().data)
-
-        grp = ds.groups['el_fe_induction']
-        (self.pos_el_fe_induction,
-            self.el_fe_induction_1,
-            self.el_fe_induction_2,
-            self.eddy_cu_vpot) = [grp.variables[k][:]
-                                  for k in ('position',
-                                            'induction_1',
-                                            'induction_2',
-                                            'eddy_cu_vpot')]
+
+        self.FC_RADIUS = float(self.ds.variables['fc_radius'].getValue())
+        self.POLPAAR_ZAHL = int(self.ds.variables['pole_pairs'].getValue())
+        self.NO_POLES_SIM = int(self.ds.variables['poles_sim'].getValue())
+        try:
+            self.ARM_LENGTH = float(
+                self.ds.variables['arm_length'].getValue())
+        except KeyError:
+            self.ARM_LENGTH = 0
+
+    def __getattr__(self, name):
+        """read variable on first access"""
+        if name.startswith('_') or name not in self._variables:
+            raise AttributeError(name)
+        grp, var = self._variables[name]
+        v = self.ds.groups[grp].variables[var]
+        values = v[:-1] if grp in self._truncated else v[:]
+        if var == 'name':
+            values = [n if isinstance(n, str) else str(n, encoding='utf-8')
+                      for n in values]
+        setattr(self, name, values)
+        return values
+
+    def read_el_fe_induction(self, icase=0, steps=slice(None),
+                             elements=slice(None)):
+        """return both components of the element induction
+        (unscaled) of load case icase as arrays with
+        shape (num elements, num steps)
+
+        Arguments:
+            icase: index of load case
+            steps: index or slice of move steps
+            elements: index, slice or list of element indexes
+        """
+        grp = self.ds.groups['el_fe_induction']
+        b = []
+        for var in ('induction_1', 'induction_2'):
+            v = grp.variables[var]
+            if v.ndim > 3:
+                b.append(v[icase, 0, steps, elements].T)
+            else:
+                b.append(v[icase, steps, elements].T)
+        return b
+
+    def close(self):
+        """close the NetCDF file"""
+        self.ds.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
 
 def read(filename):
     """
-    Read nc file and return NcModel object.
+    Read nc file and return Isa7 object
+    that must be closed after use (see Isa7.close).
 
     Arguments:
         filename: name of nc file to be read
@@ -9,6 +9,7 @@
 """
 import logging
 import math
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -34,60 +35,58 @@ def toFloat(s, fac=1.0):
 
 
 
-def read_los_content(content):
-    """return dict of losses in LOS-file content"""
-    result = dict(speed=[],
-                  torque=[],
-                  i1=[],
-                  beta=[],
-                  stajo=[],
-                  staza=[],
-                  rotfe=[],
-                  magnet=[],
-                  winding=[],
-                  total=[])
+LOS_COLUMNS = ('speed', 'torque', 'i1', 'beta',
+               'stajo', 'staza', 'rotfe', 'magnet', 'winding')
+
+
+def _los_row(r):
+    """return row of LOS table with 9 columns (staza is 0 if missing)"""
+    if len(r) > 8:
+        return [toFloat(x) for x in r[:9]]
+    return [toFloat(x) for x in r[:5]] + [0.0] + [
+        toFloat(x) for x in r[5:8]]
+
+
+def read_los_content(content, aslist=False):
+    """return dict of losses in LOS-file content
+
+    Args:
+      content: list of lines
+      aslist: return lists instead of arrays
+    """
+    rows = []
     started = False
     for l in content:
         if not started and l.startswith('[1/min]   '):
             started = True
         elif started:
-            r = l.strip().split()
-            if len(r) > 7:
-                result['speed'].append(toFloat(r[0], 1./60))
-                result['torque'].append(toFloat(r[1]))
-                result['i1'].append(toFloat(r[2]))
-                result['beta'].append(toFloat(r[3]))
-                pfe1 = toFloat(r[4])
-                pfe2 = 0
-                p = 4
-                if len(r) > 8:
-                    pfe2 = toFloat(r[5])
-                    p = 5
-                result['stajo'].append(pfe1)
-                result['staza'].append(pfe2)
-                result['rotfe'].append(toFloat(r[p+1]))
-                result['magnet'].append(toFloat(r[p+2]))
-                result['winding'].append(toFloat(r[p+3]))
-
-                try:
-                    result['stafe'] = result['stajo'] + result['staza']
-                    result['total'].append(sum([result[k][-1]
-                                                for k in ('stajo',
-                                                          'staza',
-                                                          'rotfe',
-                                                          'magnet',
-                                                          'winding')]))
-                except KeyError:
-                    result['total'].append(None)
+            if len(l.split()) > 7:
+                rows.append(l)
+    try:
+        m = np.loadtxt(rows, ndmin=2) if rows else np.zeros((0, 9))
+        if m.shape[1] == 8:
+            m = np.insert(m, 5, 0.0, axis=1)
+        m = m[:, :9]
+    except ValueError:
+        # non numeric values or rows of different length
+        m = np.array([_los_row(l.split()) for l in rows],
+                     dtype=float).reshape(-1, 9)
+
+    result = {k: m[:, i] for i, k in enumerate(LOS_COLUMNS)}
+    result['speed'] = result['speed']*(1./60)
+    result['stafe'] = result['stajo'] + result['staza']
+    result['total'] = np.sum(m[:, 4:9], axis=1)
     logger.info("num rows %d", len(result['total']))
+    if aslist:
+        return {k: v.tolist() for k, v in result.items()}
     return result
 
 
-def read_los(filename):
+def read_los(filename, aslist=False):
     """return dict of losses in LOS-file"""
     logger.info("read loss file: %s", filename)
     with open(filename) as f:
-        return read_los_content(f.readlines())
+        return read_los_content(f.readlines(), aslist)
 
     # empty
     return dict(speed=[],
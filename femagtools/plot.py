@@ -8,6 +8,9 @@
 
 
 """
+import os
+import glob
+import multiprocessing
 import numpy as np
 import scipy.interpolate as ip
 import logging
@@ -21,6 +24,8 @@ try:
 except ImportError:   # ModuleNotFoundError:
     matplotlibversion = 0
 
+logger = logging.getLogger(__name__)
+
 
 def _create_3d_axis():
     """creates a subplot with 3d projection if one does not already exist"""
@@ -378,9 +383,7 @@ def mtpa(pmrel, i1max, title='', projection=''):
     id = np.linspace(idmin, idmax, nsamples)
     iq = np.linspace(iqmin, iqmax, nsamples)
 
-    torque_iqd = np.array(
-        [[pmrel.torque_iqd(x, y)
-          for y in id] for x in iq])
+    torque_iqd = pmrel.torque_iqd(*np.meshgrid(iq, id, indexing='ij'))
     if projection == '3d':
         idq_torque(id, iq, torque_iqd)
         ax = pl.gca()
@@ -417,17 +420,14 @@ def mtpv(pmrel, u1max, i1max, title='', projection=''):
     iqmin, idmin = pmrel.iqdmin(i1max)
     id = np.linspace(idmin, idmax, nsamples)
     iq = np.linspace(iqmin, iqmax, nsamples)
-    u1_iqd = np.array(
-        [[np.linalg.norm(pmrel.uqd(w1, iqx, idx))/np.sqrt(2)
-          for idx in id] for iqx in iq])
+    iqx, idx = np.meshgrid(iq, id, indexing='ij')
+    u1_iqd = np.hypot(*pmrel.uqd(w1, iqx, idx))/np.sqrt(2)
     u1 = np.mean(u1_iqd)
     imtpv = np.array([pmrel.mtpv(wx, u1, i1max)
                       for wx in np.linspace(w1, 20*w1, nsamples)]).T
     
     if projection == '3d':
-        torque_iqd = np.array(
-            [[pmrel.torque_iqd(x, y)
-              for y in id] for x in iq])
+        torque_iqd = pmrel.torque_iqd(iqx, idx)
         idq_torque(id, iq, torque_iqd)
         ax = pl.gca()
         ax.plot(imtpv[1], imtpv[0], imtpv[2],
@@ -1002,14 +1002,17 @@ def spel(isa, with_axis=False):
     Args:
       isa: Isa7 object
     """
-    from matplotlib.patches import Polygon
+    from matplotlib.collections import PolyCollection
     ax = pl.gca()
     ax.set_aspect('equal')
-    for se in isa.superelements:
-        ax.add_patch(Polygon([n.xy
-                              for nc in se.nodechains
-                              for n in nc.nodes],
-                             color=isa.color[se.color], lw=0))
+    verts = [isa.node_pos[[n.key - 1
+                           for nc in se.nodechains
+                           for n in nc.nodes]]
+             for se in isa.superelements]
+    ax.add_collection(PolyCollection(
+        verts, facecolors=[isa.color[se.color]
+                           for se in isa.superelements],
+        lw=0))
 
     ax.autoscale(enable=True)
     if not with_axis:
@@ -1021,27 +1024,182 @@ def mesh(isa, with_axis=False):
     Args:
       isa: Isa7 object
     """
-    from matplotlib.lines import Line2D
+    from matplotlib.collections import LineCollection
     ax = pl.gca()
     ax.set_aspect('equal')
-    for el in isa.elements:
-        pts = [list(i) for i in zip(*[v.xy for v in el.vertices])]
-        ax.add_line(Line2D(pts[0], pts[1], color='b', ls='-', lw=0.25))
-
-    #for nc in isa.nodechains:
-    #    pts = [list(i) for i in zip(*[(n.x, n.y) for n in nc.nodes])]
-    #    ax.add_line(Line2D(pts[0], pts[1], color="b", ls="-", lw=0.25, 
-    #                       marker=".", ms="2", mec="None"))
-    
-    #for nc in isa.nodechains:
-    #    if nc.nodemid is not None:
-    #        plt.plot(*nc.nodemid.xy, "rx")
-    
+    for nv, (el_idx, nd_idx) in isa.element_connectivity().items():
+        # closed polylines of all elements with nv vertices
+        ax.add_collection(LineCollection(
+            isa.node_pos[np.hstack((nd_idx, nd_idx[:, :1]))],
+            colors='b', linestyles='-', lw=0.25))
+
     ax.autoscale(enable=True)
     if not with_axis:
         ax.axis('off')
 
 
+def _triangles(isa):
+    """return node indexes of triangles and their element indexes
+    (quadrilaterals are split into 2 triangles)"""
+    triangles, elements = [], []
+    for nv, (el_idx, nd_idx) in isa.element_connectivity().items():
+        corners = nd_idx[:, ::2] if nv > 4 else nd_idx
+        for k in range(1, corners.shape[1] - 1):
+            triangles.append(corners[:, [0, k, k+1]])
+            elements.append(el_idx)
+    return np.vstack(triangles), np.concatenate(elements)
+
+
+def flux_density(isa, title='', cmap='viridis', with_axis=False):
+    """plot flux density of all elements of I7/ISA7 model
+    Args:
+      isa: Isa7 object
+    """
+    ax = pl.gca()
+    ax.set_aspect('equal')
+    triangles, elements = _triangles(isa)
+    b = np.linalg.norm(isa.element_induction(), axis=1)
+    tpc = ax.tripcolor(isa.node_pos[:, 0], isa.node_pos[:, 1], triangles,
+                       facecolors=b[elements], cmap=cmap)
+    pl.colorbar(tpc, ax=ax, label='B / T')
+    if title:
+        ax.set_title(title)
+    if not with_axis:
+        ax.axis('off')
+
+
+def flux_lines(isa, num_lines=25, title='', with_axis=False):
+    """plot contour lines of vector potential of I7/ISA7 model
+    Args:
+      isa: Isa7 object
+      num_lines: number of contour lines
+    """
+    ax = pl.gca()
+    ax.set_aspect('equal')
+    triangles, _ = _triangles(isa)
+    vpot = np.array([n.vpot[0] for n in isa.nodes])
+    ax.tricontour(isa.node_pos[:, 0], isa.node_pos[:, 1], triangles,
+                  vpot, num_lines, colors='k', linewidths=0.5)
+    if title:
+        ax.set_title(title)
+    if not with_axis:
+        ax.axis('off')
+
+
+def bchplot(bch):
+    """create the plots of a BCH reader object according to its type"""
+    bchtype = bch.type.lower()
+    if (bchtype.find('pm-synchronous-motor simulation') >= 0 or
+            bchtype.find('permanet-magnet-synchronous-motor') >= 0):
+        pmrelsim(bch, bch.filename)
+    elif bchtype.find('multiple calculation of forces and flux') >= 0:
+        multcal(bch, bch.filename)
+    elif bchtype.find('cogging calculation') >= 0:
+        cogging(bch, bch.filename)
+    elif bchtype.find('ld-lq-identification') >= 0:
+        ldlq(bch)
+    elif bchtype.find('psid-psiq-identification') >= 0:
+        psidq(bch)
+    elif bchtype.find('fast_torque calculation') >= 0:
+        fasttorque(bch)
+    elif bchtype.find('transient sc') >= 0:
+        transientsc(bch, bch.filename)
+    else:
+        raise ValueError("BCH type {} not yet supported".format(
+            bch.type))
+
+
+def _bchreport(args):
+    """read BCH file, create plots and save them to outfile
+    returns tuple of bchfile and error message (None if successful)"""
+    import io
+    from femagtools.bch import Reader
+    bchfile, outfile = args
+    # keep the figures of the caller
+    fignums = pl.get_fignums()
+    try:
+        bch = Reader()
+        with io.open(bchfile, encoding='latin1', errors='ignore') as f:
+            bch.read(f.readlines())
+        bchplot(bch)
+        pl.savefig(outfile)
+        logger.info("%s: %s", bchfile, outfile)
+        return bchfile, None
+    except Exception as e:
+        logger.error("%s: %s", bchfile, e)
+        return bchfile, str(e)
+    finally:
+        for n in pl.get_fignums():
+            if n not in fignums:
+                pl.close(n)
+
+
+def _init_worker():
+    """use non-interactive backend in batch report processes"""
+    pl.switch_backend('Agg')
+
+
+def _outnames(bchfiles, outdir, fmt):
+    """return names of plot files (prefixed with the name of the
+    BCH file directory if several BCH files have the same name)"""
+    if not outdir:
+        return [os.path.splitext(b)[0] + '.' + fmt for b in bchfiles]
+    names = [os.path.splitext(os.path.basename(b))[0] for b in bchfiles]
+    names = ['{}_{}'.format(os.path.basename(os.path.dirname(
+        os.path.abspath(b))), n) if names.count(n) > 1 else n
+             for b, n in zip(bchfiles, names)]
+    outnames = []
+    for n in names:
+        name, i = n, 1
+        while name in outnames:
+            name = '{}-{}'.format(n, i)
+            i += 1
+        outnames.append(name)
+    return [os.path.join(outdir, n + '.' + fmt) for n in outnames]
+
+
+def batch_report(filenames, outdir=None, fmt='png', num_proc=0):
+    """create plot files of BCH files with one worker per file
+
+    Arguments:
+      filenames: list of BCH files or result directories
+        (the most recent BCH file of each directory is used)
+      outdir: name of output directory (directory of BCH file if None).
+        The plot files are named like the BCH files, prefixed with the
+        name of their directory if several BCH files have the same name.
+      fmt: file format of plots (png, pdf, svg)
+      num_proc: number of processes (number of cpus if 0)
+
+    returns dict of BCH file names and error message (None if successful)
+    """
+    bchfiles = []
+    for f in filenames:
+        if os.path.isdir(f):
+            b = sorted(glob.glob(os.path.join(f, '*_[0-9][0-9][0-9].B*CH')))
+            if not b:
+                logger.warning("no BCH files in %s", f)
+                continue
+            bchfiles.append(b[-1])
+        else:
+            bchfiles.append(f)
+    if not bchfiles:
+        return {}
+    tasks = list(zip(bchfiles, _outnames(bchfiles, outdir, fmt)))
+    num_proc = min(num_proc or multiprocessing.cpu_count(), len(tasks))
+    logger.info("create %d reports with %d processes",
+                len(tasks), num_proc)
+    if num_proc > 1:
+        pool = multiprocessing.Pool(num_proc, _init_worker)
+        try:
+            results = dict(pool.imap_unordered(_bchreport, tasks))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = dict([_bchreport(t) for t in tasks])
+    return {b: results[b] for b in bchfiles}
+
+
 def main():
     import io
     import sys
@@ -1051,8 +1209,19 @@ def main():
     
     argparser = argparse.ArgumentParser(
         description='Read BCH/BATCH/PLT file and create a plot')
-    argparser.add_argument('filename',
-                           help='name of BCH/BATCH/PLT file')
+    argparser.add_argument('filename', nargs='+',
+                           help='name of BCH/BATCH/PLT file or '
+                           'result directories (batch mode)')
+    argparser.add_argument('--format', '-f',
+                           help='file format of plots in batch mode',
+                           dest='format', default='png')
+    argparser.add_argument('--outdir', '-o',
+                           help='output directory in batch mode',
+                           dest='outdir', default=None)
+    argparser.add_argument('--jobs', '-j',
+                           help='number of processes in batch mode '
+                           '(number of cpus if 0)',
+                           dest='jobs', type=int, default=0)
     argparser.add_argument(
         "--version",
         "-v",
@@ -1065,9 +1234,18 @@ def main():
         sys.exit(0)
     if not args.filename:
         sys.exit(0)
-    if args.filename.split('.')[-1].startswith('PLT'):
+    if len(args.filename) > 1 or os.path.isdir(args.filename[0]):
+        results = batch_report(args.filename, args.outdir,
+                               args.format, args.jobs)
+        errors = [b for b in results if results[b]]
+        for b in errors:
+            print("{}: {}".format(b, results[b]))
+        sys.exit(1 if errors else 0)
+
+    filename = args.filename[0]
+    if filename.split('.')[-1].startswith('PLT'):
         import femagtools.forcedens
-        fdens = femagtools.forcedens.read(args.filename)
+        fdens = femagtools.forcedens.read(filename)
         cols = 1
         rows = 2
         fig, ax = pl.subplots(nrows=rows, ncols=cols,
@@ -1091,30 +1269,10 @@ def main():
         return
     
     bchresults = Reader()
-    with io.open(args.filename, encoding='latin1', errors='ignore') as f:
+    with io.open(filename, encoding='latin1', errors='ignore') as f:
         bchresults.read(f.readlines())
 
-    if (bchresults.type.lower().find(
-            'pm-synchronous-motor simulation') >= 0 or
-        bchresults.type.lower().find(
-            'permanet-magnet-synchronous-motor') >= 0):
-        pmrelsim(bchresults, bchresults.filename)
-    elif bchresults.type.lower().find(
-            'multiple calculation of forces and flux') >= 0:
-        multcal(bchresults, bchresults.filename)
-    elif bchresults.type.lower().find('cogging calculation') >= 0:
-        cogging(bchresults, bchresults.filename)
-    elif bchresults.type.lower().find('ld-lq-identification') >= 0:
-        ldlq(bchresults)
-    elif bchresults.type.lower().find('psid-psiq-identification') >= 0:
-        psidq(bchresults)
-    elif bchresults.type.lower().find('fast_torque calculation') >= 0:
-        fasttorque(bchresults)
-    elif bchresults.type.lower().find('transient sc') >= 0:
-        transientsc(bchresults, bchresults.filename)
-    else:
-        raise ValueError("BCH type {} not yet supported".format(
-            bchresults.type))
+    bchplot(bchresults)
     pl.show()
 
 
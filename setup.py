@@ -44,7 +44,8 @@ setup(
     platforms="any",
     install_requires=['numpy', 'scipy', 'mako', 'six',
                       'dxfgrabber', 'networkx'],
-    extras_require={"meshio": ["meshio", "lxml"]},
+    extras_require={"meshio": ["meshio", "lxml"],
+                    "xdmf": ["h5py"]},
     packages=['femagtools', 'femagtools.moo', 'femagtools.dxfsl'],
     package_data={'femagtools': ['templates/*.mako']},
     license=license,
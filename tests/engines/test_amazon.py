@@ -1,18 +1,214 @@
 #!/usr/bin/env python
 #
 import unittest
+import pytest
 import femagtools
 try:
     import mock
 except ImportError:
     import unittest.mock as mock
 import os
+import io
+import tarfile
+import femagtools.amazon
+
+
+class FakeS3(object):
+    """local S3 stand-in with the methods used by the amazon engine"""
+    def __init__(self):
+        self.buckets = {}
+        self.list_requests = 0
+        self.list_prefixes = []
+        self.meta = mock.Mock(client=self)
+        self.on_list = None
+
+    def create_bucket(self, Bucket, **kwargs):
+        self.buckets[Bucket] = {}
+
+    def upload_file(self, Filename, Bucket, Key, Config=None):
+        with open(Filename, 'rb') as f:
+            self.buckets[Bucket][Key] = f.read()
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, Config=None):
+        self.buckets[Bucket][Key] = Fileobj.read()
+
+    def delete_object(self, Bucket, Key):
+        self.buckets[Bucket].pop(Key, None)
+
+    def copy(self, CopySource, Bucket, Key, Config=None):
+        self.buckets[Bucket][Key] = \
+            self.buckets[CopySource['Bucket']][CopySource['Key']]
+
+    def download_file(self, Bucket, Key, Filename, Config=None):
+        with open(Filename, 'wb') as f:
+            f.write(self.buckets[Bucket][Key])
+
+    def get_paginator(self, operation):
+        assert operation == 'list_objects_v2'
+        return self
+
+    def paginate(self, Bucket, Prefix=''):
+        self.list_prefixes.append(Prefix)
+        if self.on_list and Prefix.count('/') == 1:  # job prefix
+            self.on_list()
+        keys = sorted(k for k in self.buckets[Bucket] if k.startswith(Prefix))
+        for i in range(0, max(len(keys), 1), 1000):
+            self.list_requests += 1
+            yield dict(Contents=[dict(Key=k) for k in keys[i:i+1000]])
+
+    def Bucket(self, name):
+        s3 = self
+
+        class Objects(object):
+            def filter(self, Prefix=''):
+                return mock.Mock(delete=lambda: [
+                    s3.buckets[name].pop(k) for k in list(s3.buckets[name])
+                    if k.startswith(Prefix)])
+        return mock.Mock(objects=Objects(),
+                         delete=lambda: s3.buckets.pop(name))
+
+
+class FakeEC2(object):
+    """EC2 stand-in with instance states"""
+    def __init__(self):
+        self.states = {}
+        self.terminated = []
+        self.instances = self
+        self.meta = mock.MagicMock()
+
+    def filter(self, InstanceIds):
+        ec2 = self
+
+        class Instances(list):
+            def terminate(self):
+                for i in self:
+                    ec2.terminated.append(i.id)
+                    ec2.states[i.id] = 'shutting-down'
+        return Instances(
+            mock.Mock(id=i, state=dict(Name=self.states.get(i, 'running')))
+            for i in InstanceIds)
+
+
+def create_engine(packsize=1):
+    with mock.patch.object(femagtools.amazon.Engine,
+                           '_create_amazon_resource',
+                           side_effect=[FakeS3(), FakeEC2()]), \
+            mock.patch.object(femagtools.amazon.Engine,
+                              '_create_transfer_config'):
+        return femagtools.amazon.Engine(configfile=None, num_threads=4,
+                                        packsize=packsize)
+
+
+def test_transfer(tmpdir):
+    engine = create_engine(packsize=5)
+    s3 = engine.s3_resource
+    ec2 = engine.ec2_resource
+
+    mcvfile = str(tmpdir.join('M270.MCV'))
+    with open(mcvfile, 'wb') as f:
+        f.write(os.urandom(femagtools.amazon.SHARED_MINSIZE))
+    job = engine.create_job(str(tmpdir))
+    assert job.packsize == 5
+    for i in range(20):
+        task = job.add_task()
+        task.add_file('femag.fsl', ['exit_on_end = true', 'x = {}'.format(i)])
+        task.add_file(mcvfile)
+    engine._create_data_buckets()
+    engine._upload_files_to_s3()
+
+    assert len(s3.buckets) == 1
+    bucket = list(s3.buckets)[0]
+    keys = s3.buckets[bucket]
+    shared = [k for k in keys if k.startswith(engine.shared_prefix)]
+    assert len(shared) == 1
+    jobid = job.tasks[0].prefix.split('/')[0]
+    assert [t.prefix for t in job.tasks] == [
+        '{}/{}/'.format(jobid, i) for i in range(20)]
+    assert engine.shared_prefix == jobid + '/shared/'
+    assert sorted(set(keys) - set(shared)) == sorted(
+        ['{}{}.tar.gz'.format(t.prefix, os.path.basename(t.directory))
+         for t in job.tasks] + ['{}M270.MCV'.format(t.prefix)
+                                for t in job.tasks])
+    with open(mcvfile, 'rb') as f:
+        assert keys['{}M270.MCV'.format(job.tasks[3].prefix)] == f.read()
+    with tarfile.open(fileobj=io.BytesIO(keys['{}3.tar.gz'.format(
+            job.tasks[3].prefix)])) as tar:
+        assert tar.getnames() == ['femag.fsl']
+        assert tar.extractfile('femag.fsl').read() == \
+            b'exit_on_end = true\nx = 3'
+    assert engine._s3_path(job.tasks[0]) == '{}/{}/0'.format(bucket, jobid)
+
+    # each list request of the instance finishes a pack of tasks
+    packs = list(job.packs())
+
+    def finish_pack():
+        if packs:
+            for i in packs.pop(0):
+                keys['{}exit_code'.format(job.tasks[i].prefix)] = b'0'
+                keys['{}femag.BATCH'.format(job.tasks[i].prefix)] = \
+                    str(i).encode()
+    s3.on_list = finish_pack
+    for i, t in enumerate(job.tasks):
+        t.ec2_instance = 'i-{}'.format(i//5)
+    status = engine.join(interval=0)
+    assert status == ['0']*20
+    assert [t.status for t in job.tasks] == ['C']*20
+    for i, t in enumerate(job.tasks):
+        with open(os.path.join(t.directory, 'femag.BATCH')) as f:
+            assert f.read() == str(i)
+    # one list request per poll and one per download
+    assert s3.list_requests == 4 + 20
+    # polls list the job prefix only
+    assert '' not in s3.list_prefixes
+    assert sorted(ec2.terminated) == ['i-0', 'i-1', 'i-2', 'i-3']
+
+    engine._cleanup()
+    assert not s3.buckets
+
+
+def test_upload_error(tmpdir):
+    engine = create_engine()
+    s3 = engine.s3_resource
+    job = engine.create_job(str(tmpdir))
+    task = job.add_task()
+    task.add_file('femag.fsl', ['exit_on_end = true'])
+    engine._create_data_buckets()
+
+    def write_tar(fileobj, compresslevel=1, exclude=()):
+        fileobj.write(b'partial')
+        raise IOError('disk error')
+    task.write_tar = write_tar
+    with pytest.raises(IOError, match='disk error'):
+        engine._upload(task)
+    assert s3.buckets[task.bucket] == {}
+
+
+def test_join_stopped(tmpdir):
+    engine = create_engine(packsize=2)
+    s3 = engine.s3_resource
+    ec2 = engine.ec2_resource
+    job = engine.create_job(str(tmpdir))
+    for i in range(4):
+        job.add_task()
+        job.tasks[-1].ec2_instance = 'i-{}'.format(i//2)
+    engine._create_data_buckets()
+    keys = s3.buckets[job.tasks[0].bucket]
+
+    def stop_instance():
+        # second instance reports only its first task
+        for t in job.tasks[:3]:
+            keys['{}exit_code'.format(t.prefix)] = b'0'
+        ec2.states['i-1'] = 'terminated'
+    s3.on_list = stop_instance
+    assert engine.join(interval=0) == ['0', '0', '0', None]
+    assert [t.status for t in job.tasks] == ['C', 'C', 'C', 'X']
 
 
 class PropulationTest(unittest.TestCase):
 
+    @mock.patch('femagtools.amazon.Engine._create_transfer_config')
     @mock.patch('femagtools.amazon.Engine._create_amazon_resource')
-    def setUp(self, create_amazone_resource):
+    def setUp(self, create_amazone_resource, create_transfer_config):
         create_amazone_resource = mock.Mock()
         self.engine = femagtools.amazon.Engine()
 
@@ -40,6 +236,10 @@ export BUCKET_NAME=1
         user_data = self.engine._read_cloud_init('1')
         self.assertEqual(user_data, result)
 
+        user_data = self.engine._read_cloud_init('1', ['1', '2'])
+        self.assertEqual(user_data,
+                         result + 'export BUCKET_NAMES="1 2"\n')
+
     # This test does not work, cause mock can not mock attributes in a class which are
     # not defined in the init method
     @mock.patch('femagtools.job.CloudJob')
@@ -0,0 +1,103 @@
+import os
+import shutil
+import subprocess
+import threading
+import time
+import femagtools.condor
+import femagtools.job
+
+bchfile = os.path.join(os.path.split(__file__)[0], '..',
+                       'data', 'PM_270_L8_001.BATCH')
+
+
+def write_events(logfile, events, delay=0.01):
+    """fake HTCondor user log writer"""
+    for e in events:
+        with open(logfile, 'a') as f:
+            # write each event in two chunks
+            f.write(e[:len(e)//2])
+            f.flush()
+            time.sleep(delay)
+            f.write(e[len(e)//2:])
+        time.sleep(delay)
+
+
+def event(code, cluster, proc, text, *lines):
+    return '\n'.join(['{:03d} ({}.{:03d}.000) 10/19 12:00:{:02d} {}'.format(
+        code, cluster, proc, proc, text)] + list(lines) + ['...', ''])
+
+
+def test_join(monkeypatch, tmpdir):
+    monkeypatch.setattr(femagtools.job.cfg, 'get_executable',
+                        lambda: 'xfemag64')
+    engine = femagtools.condor.Engine()
+    job = engine.create_job(str(tmpdir))
+    for i in range(4):
+        task = job.add_task()
+        task.add_file('femag.fsl', ['exit_on_end = true'])
+    submitfile = job.prepareDescription()
+    logfile = str(tmpdir.join('femag.log'))
+    with open(submitfile) as f:
+        assert 'Log          = {}\n'.format(logfile) in f.readlines()
+    for t in job.tasks[:2]:
+        shutil.copy(bchfile, t.directory)
+
+    engine.clusterId = '42'
+    events = [event(0, 42, k, 'Job submitted from host: <127.0.0.1>')
+              for k in range(4)] + [
+        event(1, 42, 1, 'Job executing on host: <127.0.0.1>'),
+        event(5, 41, 0, 'Job terminated.',
+              '\t(1) Normal termination (return value 1)'),
+        event(5, 42, 1, 'Job terminated.',
+              '\t(1) Normal termination (return value 0)',
+              '\t\tUsr 0 00:00:01, Sys 0 00:00:00  -  Run Remote Usage'),
+        event(12, 42, 2, 'Job was held.', '\tbad input'),
+        event(9, 42, 2, 'Job was aborted.', '\tvia condor_rm'),
+        event(5, 42, 3, 'Job terminated.',
+              '\t(0) Abnormal termination (signal 9)'),
+        event(5, 42, 0, 'Job terminated.',
+              '\t(1) Normal termination (return value 2)')]
+    writer = threading.Thread(target=write_events, args=(logfile, events))
+    writer.start()
+    status = engine.join(interval=0.005)
+    writer.join()
+    assert status == ['C', 'C', 'X', 'X']
+    assert engine.exit_codes == {0: 2, 1: 0}
+    assert job.tasks[1].result.machine['p'] == 4
+    assert job.tasks[2].result is None
+
+
+def test_join_packed(monkeypatch, tmpdir):
+    # fake femag: fails in task directory 2
+    femag = tmpdir.join('xfemag64')
+    femag.write('#!/bin/sh\ncase $(pwd) in */2) exit 3;; esac\n')
+    femag.chmod(0o755)
+    monkeypatch.setattr(femagtools.job.cfg, 'get_executable',
+                        lambda: str(femag))
+    engine = femagtools.condor.Engine(packsize=2)
+    workdir = tmpdir.mkdir('job')
+    job = engine.create_job(str(workdir))
+    for i in range(5):
+        task = job.add_task()
+        task.add_file('femag.fsl', ['exit_on_end = true'])
+    assert job.packs() == [[0, 1], [2, 3], [4]]
+    with open(job.prepareDescription()) as f:
+        submit = f.read().split('\n')[:-1]
+    assert submit[-5:] == ['Queue taskdirs from (', '0 1', '2 3', '4', ')']
+
+    # run first two packs, the third is aborted
+    script = str(workdir.join('femag-pack.sh'))
+    for pack in ('0 1', '2 3'):
+        subprocess.check_call([script] + pack.split(), cwd=str(workdir))
+    for t in job.tasks[:4]:
+        shutil.copy(bchfile, t.directory)
+    write_events(str(workdir.join('femag.log')), [
+        event(5, 7, 0, 'Job terminated.',
+              '\t(1) Normal termination (return value 0)'),
+        event(5, 7, 1, 'Job terminated.',
+              '\t(1) Normal termination (return value 0)'),
+        event(9, 7, 2, 'Job was aborted.')], delay=0)
+    engine.clusterId = '7'
+    assert engine.join(interval=0.005) == ['C', 'C', 'C', 'C', 'X']
+    assert engine.exit_codes == {0: 0, 1: 0, 2: 3, 3: 0}
+    assert job.tasks[3].result.machine['p'] == 4
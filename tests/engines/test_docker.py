@@ -0,0 +1,74 @@
+import pytest
+import os
+import femagtools.docker
+import femagtools.femag
+
+
+def test_docker_results(monkeypatch, tmpdir):
+    bchfile = os.path.join(os.path.split(__file__)[0], '..',
+                           'data', 'PM_270_L8_001.BATCH')
+    with open(bchfile, 'rb') as f:
+        content = f.read()
+
+    def mock_send_fsl(self, fslcmds, pub_consumer=None, timeout=None):
+        return [b'{"status": "ok", "result_file": ["PM_270_L8_001.BATCH"]}']
+
+    zmqfemag = femagtools.femag.ZmqFemag
+    monkeypatch.setattr(zmqfemag, "_ZmqFemag__req_socket",
+                        lambda self: None)
+    monkeypatch.setattr(zmqfemag, "cleanup",
+                        lambda self, timeout=0: ['{"status": "ok"}'])
+    monkeypatch.setattr(zmqfemag, "release", lambda self: [])
+    monkeypatch.setattr(zmqfemag, "send_fsl", mock_send_fsl)
+    monkeypatch.setattr(zmqfemag, "getfile",
+                        lambda self, filename='': ['{"status": "ok"}',
+                                                   content])
+
+    for num_parsers, keep_files in ((0, False), (2, True)):
+        workdir = tmpdir.mkdir(str(num_parsers))
+        engine = femagtools.docker.Engine(num_threads=2,
+                                          num_parsers=num_parsers,
+                                          keep_files=keep_files)
+        job = engine.create_job(str(workdir))
+        for i in range(3):
+            task = job.add_task()
+            task.add_file('femag.fsl', ['exit_on_end = true'])
+        assert engine.submit() == 3
+        assert engine.join() == ['C']*3
+        for t in job.tasks:
+            assert os.path.exists(os.path.join(
+                t.directory, 'PM_270_L8_001.BATCH')) == keep_files
+            assert t.get_results().machine['p'] == 4
+
+
+@pytest.mark.parametrize("num_parsers", [0, 2])
+def test_docker_parse_error(monkeypatch, tmpdir, num_parsers):
+    bchfile = os.path.join(os.path.split(__file__)[0], '..',
+                           'data', 'PM_270_L8_001.BATCH')
+    with open(bchfile, 'rb') as f:
+        content = f.read()
+    # date line with unexpected fields
+    content = content.replace(b'13.32 h.min', b'13.32 h.min x')
+
+    def mock_send_fsl(self, fslcmds, pub_consumer=None, timeout=None):
+        return [b'{"status": "ok", "result_file": ["PM_270_L8_001.BATCH"]}']
+
+    zmqfemag = femagtools.femag.ZmqFemag
+    monkeypatch.setattr(zmqfemag, "_ZmqFemag__req_socket",
+                        lambda self: None)
+    monkeypatch.setattr(zmqfemag, "cleanup",
+                        lambda self, timeout=0: ['{"status": "ok"}'])
+    monkeypatch.setattr(zmqfemag, "release", lambda self: [])
+    monkeypatch.setattr(zmqfemag, "send_fsl", mock_send_fsl)
+    monkeypatch.setattr(zmqfemag, "getfile",
+                        lambda self, filename='': ['{"status": "ok"}',
+                                                   content])
+
+    engine = femagtools.docker.Engine(num_threads=2,
+                                      num_parsers=num_parsers)
+    job = engine.create_job(str(tmpdir))
+    for i in range(3):
+        task = job.add_task()
+        task.add_file('femag.fsl', ['exit_on_end = true'])
+    assert engine.submit() == 3
+    assert engine.join() == ['X']*3
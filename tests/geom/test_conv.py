@@ -0,0 +1,26 @@
+import os
+import shutil
+import femagtools.dxfsl.conv as conv
+import femagtools.dxfsl.converter as cv
+
+dxfile = os.path.join(os.path.dirname(__file__), '..', '..', 'examples',
+                      'model-creation', 'ipm4.dxf')
+
+
+def test_convert_dir(tmp_path, monkeypatch):
+    indir = tmp_path / 'dxf'
+    indir.mkdir()
+    shutil.copy(dxfile, str(indir))
+    (indir / 'bad.dxf').write_text('garbage')
+    results = conv.convert_dir(str(indir), num_proc=2, write_fsl=True)
+    assert [os.path.basename(f) for f in results] == ['bad.dxf', 'ipm4.dxf']
+    assert 'error' in results[str(indir / 'bad.dxf')]
+    fsl = results[str(indir / 'ipm4.dxf')]['fsl']
+
+    # parallel symmetry search creates the same fsl
+    assert cv.convert(dxfile, write_fsl=True, num_proc=2)['fsl'] == fsl
+
+    monkeypatch.chdir(tmp_path)
+    for f, res in results.items():
+        conv.write_fsl(f, res)
+    assert sorted(p.name for p in tmp_path.glob('*.fsl')) == ['ipm4.fsl']
@@ -0,0 +1,64 @@
+import os
+import collections
+import functools
+import femagtools.dxfsl.converter as cv
+
+dxfile = os.path.join(os.path.dirname(__file__), '..', '..', 'examples',
+                      'model-creation', 'ipm4.dxf')
+
+
+def test_convert_cached(tmp_path, monkeypatch):
+    calls = []
+    convert = cv.convert
+
+    @functools.wraps(convert)
+    def counting_convert(*args, **kwargs):
+        calls.append(args)
+        return convert(*args, **kwargs)
+
+    monkeypatch.setattr(cv, 'convert', counting_convert)
+    monkeypatch.setattr(cv, '_conv_cache', collections.OrderedDict())
+    conv = cv.convert_cached(dxfile, cachedir=str(tmp_path))
+    assert len(calls) == 1
+    assert len(list(tmp_path.glob('*.pkl'))) == 1
+
+    assert cv.convert_cached(dxfile, cachedir=str(tmp_path)) == conv
+    monkeypatch.setattr(cv, '_conv_cache', collections.OrderedDict())
+    assert cv.convert_cached(dxfile, cachedir=str(tmp_path)) == conv
+    assert len(calls) == 1
+
+    cv.convert_cached(dxfile, cachedir=str(tmp_path), nodedist=2)
+    assert len(calls) == 2
+    assert cv.cache_key(dxfile) != cv.cache_key(dxfile, symtol=0.01)
+
+
+def test_convert_cached_write_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(cv, '_conv_cache', collections.OrderedDict())
+
+    def replace(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(cv.os, 'replace', replace)
+    assert cv.convert_cached(dxfile, cachedir=str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_evict_cache(tmp_path):
+    for i in range(4):
+        f = tmp_path / '{}.pkl'.format(i)
+        f.write_bytes(b'')
+        os.utime(str(f), (i, i))
+    cv._evict_cache(str(tmp_path), size=2)
+    assert sorted(f.name for f in tmp_path.iterdir()) == ['2.pkl', '3.pkl']
+
+
+def test_memory_cache_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(cv, '_conv_cache', collections.OrderedDict())
+    monkeypatch.setattr(cv, 'DXFCACHE_SIZE', 2)
+    for k in 'abc':
+        cv._remember(k, k.encode())
+    assert list(cv._conv_cache) == ['b', 'c']
+    cv._remember('b', b'b')
+    cv._remember('d', b'd')
+    assert list(cv._conv_cache) == ['b', 'd']
+    cv.clear_cache()
+    assert not cv._conv_cache
@@ -0,0 +1,91 @@
+import femagtools.dxfsl.geom as g
+import numpy as np
+import pytest
+
+
+def polygon(n, r=10.0, jitter=0.0, seed=1):
+    rng = np.random.RandomState(seed)
+    phi = np.linspace(0, 2*np.pi, n+1)
+    x, y = r*np.cos(phi), r*np.sin(phi)
+    d = rng.uniform(-jitter, jitter, (n, 4))
+    return [g.Line(g.Element(start=(x[k]+d[k, 0], y[k]+d[k, 1]),
+                             end=(x[k+1]+d[k, 2], y[k+1]+d[k, 3])))
+            for k in range(n)]
+
+
+def test_find_nodes():
+    geom = g.Geometry(polygon(36, jitter=3e-4), atol=1e-3)
+    assert geom.number_of_nodes() == 36
+    assert geom.number_of_edges() == 36
+
+    n = list(geom.g.nodes())[5]
+    p = (n[0] + 4e-4, n[1] - 4e-4)
+    assert geom.find_nodes(p) == [n]
+    assert geom.find_nodes(p, g=geom.g) == [n]
+    q = (n[0] + 2e-3, n[1])
+    assert geom.find_nodes(q) == [(round(q[0], 6), round(q[1], 6))]
+
+
+def test_find_nodes_after_move():
+    geom = g.Geometry(polygon(12), atol=1e-3)
+    geom.move((1.0, 2.0))
+    n = list(geom.g.nodes())[3]
+    assert geom.find_nodes((n[0] + 1e-4, n[1])) == [n]
+
+
+def split_all(elements, rtol, atol):
+    out = []
+    for e in elements:
+        g.intersect_and_split_element(e, out, 0, len(out), rtol, atol)
+    return out
+
+
+def test_intersect_and_split():
+    rng = np.random.RandomState(3)
+    p = rng.uniform(0, 20, (16, 4))
+    elements = [g.Line(g.Element(start=(x0, y0), end=(x1, y1)))
+                for x0, y0, x1, y1 in p]
+    elements += [g.Arc(g.Element(center=(10.0, 10.0), radius=6.0,
+                                 start_angle=0.0, end_angle=200.0)),
+                 g.Circle(g.Element(center=(5.0, 12.0), radius=3.0))]
+    expected = [(e.p1, e.p2) if e else None
+                for e in split_all(elements, 1e-3, 1e-3)]
+    result = [(e.p1, e.p2) if e else None
+              for e in g.intersect_and_split(elements, 1e-3, 1e-3)]
+    assert len(result) > len(elements)
+    assert result == expected
+
+
+def test_create_list_of_areas():
+    n = 3
+    elements = []
+    for i in range(n+1):
+        for k in range(n):
+            elements.append(g.Line(g.Element(start=(10.0+i, 1.0+k),
+                                             end=(10.0+i, 2.0+k))))
+            elements.append(g.Line(g.Element(start=(10.0+k, 1.0+i),
+                                             end=(11.0+k, 1.0+i))))
+    geom = g.Geometry(elements)
+    geom.center = (0.0, 0.0)
+    areas = geom.list_of_areas()
+    assert len(areas) == n*n
+    assert [round(a.area_size(), 6) for a in areas] == [1.0]*n*n
+    assert geom._half_edges is None
+
+
+def test_find_symmetry():
+    n, r = 12, 20.0
+    square = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1), (-1, -1)],
+                      dtype=float) + (r, 0)
+    elements = []
+    for k in range(n):
+        phi = 2*np.pi*k/n
+        p = square.dot(np.array([[np.cos(phi), np.sin(phi)],
+                                 [-np.sin(phi), np.cos(phi)]]))
+        elements += [g.Line(g.Element(start=tuple(p[i]), end=tuple(p[i+1])))
+                     for i in range(4)]
+    geom = g.Geometry(elements)
+    geom.center = (0.0, 0.0)
+    assert geom.find_symmetry(geom.center, r+5, 0.0, 2*np.pi, 0.01)
+    assert geom.sym_area.symmetry == n
+    assert geom.sym_area.count == n
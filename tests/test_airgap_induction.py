@@ -3,6 +3,7 @@
 import femagtools.airgap as ag
 import numpy as np
 import os
+import shutil
 
 
 def test_airgap_induction():
@@ -11,3 +12,43 @@ def test_airgap_induction():
         testPath = os.path.join(os.path.abspath('.'), 'data')
     r = ag.read(os.path.join(testPath, 'bag.dat'), 1)
     np.testing.assert_almost_equal(r['Bamp'], 1.26914, 3)
+
+
+def test_harmonics():
+    pos = np.linspace(0, 45, 91)
+    alfa = np.pi*pos/180
+    B = np.array([np.cos(4*alfa + 0.5) + 0.1*np.cos(12*alfa),
+                  0.8*np.sin(4*alfa)])
+    r = ag.harmonics(pos, B, 1)
+    assert r['npoles'] == 8
+    assert r['order'].tolist() == [4, 4]
+    np.testing.assert_almost_equal(r['Bamp'], [1.0, 0.8])
+    np.testing.assert_almost_equal(r['phi0'], [0.5, -np.pi/2])
+    np.testing.assert_almost_equal(r['B_nue'][0, 12], 0.1)
+    assert r['B_nue'].shape == (2, 72)
+
+    # non uniform positions
+    pos = 45*np.linspace(0, 1, 181)**1.5
+    r = ag.harmonics(pos, np.cos(4*np.pi*pos/180), 1, order=4)
+    np.testing.assert_almost_equal(r['Bamp'], 1.0, 2)
+
+
+def test_readall(tmpdir):
+    testPath = os.path.join(os.path.split(__file__)[0], 'data')
+    dirs = []
+    for i in range(3):
+        d = tmpdir.mkdir(str(i))
+        shutil.copy(os.path.join(testPath, 'bag.dat'), str(d))
+        dirs.append(str(d))
+    dirs.append(str(tmpdir.mkdir('3')))  # no bag.dat
+    bag = np.loadtxt(os.path.join(testPath, 'bag.dat'))
+    d = tmpdir.mkdir('4')  # less positions
+    np.savetxt(str(d.join('bag.dat')), bag[:-10])
+    dirs.append(str(d))
+    d = tmpdir.mkdir('5')  # other positions
+    np.savetxt(str(d.join('bag.dat')), bag + [[1] + [0]*(bag.shape[1] - 1)])
+    dirs.append(str(d))
+    r = ag.readall(dirs, 1, num_proc=2)
+    assert r['dirs'] == dirs[:3]
+    assert r['B'].shape == (3, 229)
+    np.testing.assert_almost_equal(r['Bamp'], 1.26914, 3)
@@ -1,8 +1,57 @@
 import meshio
+import numpy as np
+import pytest
 from femagtools import convert, isa7
 import xml.etree.ElementTree as ET
 
 
+@pytest.fixture
+def isa():
+    """3x2 grid of quadrilaterals with 2 superelements
+    and element induction of 4 move steps"""
+    nx, ny = 4, 3
+    isa = isa7.Isa7.__new__(isa7.Isa7)
+    isa.nodes = [isa7.Node(k + 1, 0, 0, 0, 0, k % nx, k // nx,
+                           0.01*(k % nx), 0)
+                 for k in range(nx*ny)]
+    isa.node_pos = np.array([n.xy for n in isa.nodes])
+    isa._connectivity = None
+    isa.elements = []
+    for j in range(ny - 1):
+        for i in range(nx - 1):
+            k = j*nx + i
+            isa.elements.append(isa7.Element(
+                len(isa.elements) + 1, 2, j,
+                [isa.nodes[n] for n in (k, k + 1, k + nx + 1, k + nx)],
+                (1.0, 1.0), (0.0, 0.0), 0))
+    n = isa.nodes
+    isa.nodechains = [isa7.NodeChain(1, (n[0], None, n[3])),
+                      isa7.NodeChain(2, (n[7], None, n[4])),
+                      isa7.NodeChain(3, (n[4], None, n[7])),
+                      isa7.NodeChain(4, (n[11], None, n[8]))]
+    isa.superelements = [
+        isa7.SuperElement(1, -1, isa.elements[:3], isa.nodechains[:2],
+                          1, [], 0, 0, 0, 1.0, 0, 0, 0, 0, 0),
+        isa7.SuperElement(2, -1, isa.elements[3:], isa.nodechains[2:],
+                          2, [], 0, 0, 0, 1.0, 0, 0, 0, 0, 0)]
+    for se in isa.superelements:
+        for e in se.elements:
+            e.superelement = se
+    isa.subregions = []
+    isa.windings = []
+    isa.FC_RADIUS = 10.0
+    isa._reader = None
+    # induction of element i at step k: (i + k, -k)/100
+    steps = np.arange(4)
+    isa._el_fe_induction = [
+        b[:, :, np.newaxis, np.newaxis]
+        for b in (np.add.outer(np.arange(6), steps)/100,
+                  np.tile(-steps/100, (6, 1)),
+                  np.zeros((6, 4)))]
+    isa.pos_el_fe_induction = np.linspace(0, 3, 4)
+    return isa
+
+
 def test_msh(tmpdir):
     msh = str(tmpdir.join("magnsec.msh"))
     msh2 = str(tmpdir.join("magnsec2.msh"))
@@ -151,3 +200,34 @@ def test_geo_extrude(tmpdir):
     convert.to_geo("tests/data/magnsec.ISA7", geo, 0.01, 3, True)
     with open(geo) as f:
         assert len(f.readlines()) == 2981
+
+
+def test_xdmf(isa, tmpdir):
+    h5py = pytest.importorskip('h5py')
+    xdmf = str(tmpdir.join("grid.xdmf"))
+    convert.to_xdmf(isa, xdmf)
+
+    root = ET.parse(xdmf).getroot()
+    steps = root.findall('./Domain/Grid/Grid')
+    assert len(steps) == 4
+    assert [float(g.find('Time').get('Value')) for g in steps] == [
+        0.0, 1.0, 2.0, 3.0]
+    assert steps[2].find("Attribute[@Name='b']/DataItem").text == \
+        'grid.h5:/b/2'
+    # mesh is shared by all steps
+    assert len(set(g.find('Geometry/DataItem').text for g in steps)) == 1
+
+    with h5py.File(str(tmpdir.join("grid.h5")), 'r') as h5:
+        points = h5['points'][()]
+        assert points.shape == (12, 3)
+        np.testing.assert_allclose(points[:, :2], isa.node_pos)
+        topology = h5['topology'][()]
+        quads = topology[-6*5:].reshape(6, 5)
+        assert (quads[:, 0] == 5).all()  # xdmf mixed quadrilateral
+        assert quads[0, 1:].tolist() == [0, 1, 5, 4]
+        assert quads[-1, 1:].tolist() == [6, 7, 11, 10]
+        for k in range(4):
+            b = h5['b/{}'.format(k)][()][-6:]
+            np.testing.assert_allclose(b[:, 0], (np.arange(6) + k)/100)
+            np.testing.assert_allclose(b[:, 1], -k/100)
+            np.testing.assert_allclose(b[:, 2], 0)
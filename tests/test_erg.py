@@ -5,11 +5,11 @@ import femagtools.erg
 import numpy as np
 
 
-def read_erg(filename):
+def read_erg(filename, aslist=False):
     testPath = os.path.join(os.path.split(__file__)[0], 'data')
     if len(testPath) == 0:
         testPath = os.path.join(os.path.abspath('.'), 'data')
-    r = femagtools.erg.read(os.path.join(testPath, filename))
+    r = femagtools.erg.read(os.path.join(testPath, filename), aslist)
     return r
 
 
@@ -18,5 +18,6 @@ def test_read_erg():
     assert len(r.keys()) == 14
     assert min(r['beta']) == -90.0
     assert max(r['beta']) == 0.0
-    np.array(r['M_FE']).shape == (10, 10)
-
+    assert r['M_FE'].shape == (10, 10)
+    assert isinstance(r['i1'], np.ndarray)
+    assert read_erg('ldlq.erg', aslist=True)['beta'] == r['beta'].tolist()
@@ -1,3 +1,5 @@
+import os
+import pytest
 import femagtools.femag
 
 
@@ -10,3 +12,39 @@ def test_run_script(monkeypatch, tmpdir):
     assert r['status'] == 'ok'
     assert tmpdir.join("femag.fsl").exists()
   
+
+
+def test_zmq_session(monkeypatch, tmpdir):
+    bchfile = os.path.join(os.path.split(__file__)[0],
+                           'data', 'PM_270_L8_001.BATCH')
+    with open(bchfile, 'rb') as f:
+        content = f.read()
+    fsl = []
+
+    def mock_send_fsl(self, fslcmds, pub_consumer=None, timeout=None):
+        fsl.append(fslcmds)
+        if len(fsl) == 3:
+            return ['{"status": "error", "message": "failed"}']
+        return ['{"status": "ok", "result_file": ["x.BATCH"]}']
+
+    def mock_getfile(self, filename=''):
+        return ['{"status": "ok"}', content]
+
+    monkeypatch.setattr(femagtools.femag.ZmqFemag,
+                        "_ZmqFemag__req_socket", lambda self: None)
+    monkeypatch.setattr(femagtools.femag.ZmqFemag, "send_fsl", mock_send_fsl)
+    monkeypatch.setattr(femagtools.femag.ZmqFemag, "getfile", mock_getfile)
+    femag = femagtools.femag.ZmqFemag(0, workdir=str(tmpdir))
+    with pytest.raises(femagtools.femag.FemagError):
+        femag.run_analysis(dict(calculationMode='cogg_calc'))
+
+    femag.load_model(dict(name='PM_270_L8', lfe=0.1))
+    assert fsl[0][0] == 'save_model("close")'
+    assert fsl[0][-1] == 'save_model("cont")'
+
+    simulation = dict(calculationMode='cogg_calc', speed=50)
+    r = femag.run_analyses([simulation, simulation])
+    assert len(fsl) == 3
+    assert not any('save_model' in c for c in fsl[1])
+    assert r[0].machine['p'] == 4
+    assert r[1] == dict(error='failed')
@@ -1,3 +1,5 @@
+import shutil
+import numpy as np
 
 from femagtools import forcedens
 
@@ -14,3 +16,27 @@ def test_plt_read():
                                                  'column_units', 'position',
                                                  'unit']
 
+
+
+def test_fft():
+    fdens = forcedens.ForceDensity()
+    rng = np.random.RandomState(1)
+    for ntiles, P, M in ((8, 30, 180), (2, 40, 10)):
+        X = np.linspace(0, 360/ntiles, M + 1)
+        FN = rng.rand(P + 1, M + 1)
+        fdens.positions = [dict(X=tuple(X), FN=tuple(f)) for f in FN]
+        # reference: transform of all periods
+        N = ntiles*P
+        fd = np.abs(np.fft.fft2(np.tile(FN[:-1, :-1], (ntiles, ntiles))))
+        dim = N//ntiles//2
+        np.testing.assert_allclose(fdens.fft(), fd[1:dim, 1:dim]/N,
+                                   atol=1e-9)
+
+
+def test_readall(tmpdir):
+    for k in (1, 2):
+        shutil.copy('tests/data/PLT.0',
+                    str(tmpdir.join('model_001.PLT{}'.format(k))))
+    plt = forcedens.readall(str(tmpdir), num_proc=2)
+    assert list(plt) == ['model']
+    assert [len(p.positions) for p in plt['model']] == [31, 31]
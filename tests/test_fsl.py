@@ -5,6 +5,9 @@ import femagtools.fsl
 import femagtools.magnet
 import copy
 import re
+import os
+import shutil
+import tempfile
 
 modelpars = dict(
     name="PM 130 L4",
@@ -467,6 +470,21 @@ class FslBuilderTest(unittest.TestCase):
         brem = [l.strip() for l in fsl
                 if l.split('=')[0].strip() == 'm.remanenc'][0]
         self.assertEqual(brem.split('=')[-1].strip(), '1.1')
-        
+
+    def test_template_cache(self):
+        self.assertIs(femagtools.fsl.Builder().lookup, self.builder.lookup)
+        moddir = tempfile.mkdtemp()
+        try:
+            builder = femagtools.fsl.Builder(module_directory=moddir)
+            self.assertIsNot(builder.lookup, self.builder.lookup)
+            fsl = builder.create_analysis(dict(feapars,
+                                               calculationMode='cogg_calc'))
+            self.assertEqual(len(fsl), 26)
+            self.assertTrue(os.path.isfile(
+                os.path.join(moddir, 'cogg_calc.mako.py')))
+        finally:
+            shutil.rmtree(moddir)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -72,3 +72,53 @@ def test_report():
                                                   objective_vars, objectives, domain)
 
     
+
+def test_fsl_template(tmpdir):
+    import femagtools.fsl
+    import femagtools.job
+    import femagtools.model
+    import femagtools.moproblem
+    decision_vars = [
+        {"bounds": [-50, 0], "name": "angl_i_up"},
+        {"bounds": [100, 200], "name": "current"}]
+    fea = femagtools.model.FeaModel(dict(
+        calculationMode='pm_sym_fast', speed=50.0, current=10.0,
+        angl_i_up=0.0, nu_move_steps=49, num_cur_steps=5, magn_temp=20.0,
+        calc_fe_loss=1, lfe=0.1, num_layers=1, culength=1.4,
+        cufilfact=0.45))
+    prob = femagtools.moproblem.FemagMoProblem(decision_vars, [])
+    builder = femagtools.fsl.Builder()
+
+    def render(x):
+        prob.prepare(x, fea)
+        return builder.create_analysis(fea)
+
+    par_range = femagtools.grid.create_parameter_range(
+        [list(np.linspace(-50, 0, 3)), list(np.linspace(100, 200, 3))])
+    create_fsl = femagtools.grid.fsl_template(render, par_range[[0, -1]])
+    assert create_fsl
+    for x in par_range:
+        assert create_fsl(x) == render(x)
+
+    def render_scaled(x):
+        prob.prepare(2*np.asarray(x), fea)
+        return builder.create_analysis(fea)
+    assert femagtools.grid.fsl_template(render_scaled,
+                                        par_range[[0, -1]]) is None
+
+    def render_mm(x):
+        return ['m.height = {}'.format(x[0]*1e3),
+                'm.width = {} -- {}'.format(x[1]*100, x[0])]
+    create_fsl_mm = femagtools.grid.fsl_template(render_mm,
+                                                 par_range[[0, -1]])
+    for x in par_range:
+        assert create_fsl_mm(x) == render_mm(x)
+
+    tasks = [(femagtools.job.Task(i, str(tmpdir.join(str(i)))),
+              [('femag.fsl', create_fsl(x))])
+             for i, x in enumerate(par_range)]
+    femagtools.grid.write_task_files(tasks, 3)
+    for (t, files), x in zip(tasks, par_range):
+        assert t.fsl_file == 'femag.fsl'
+        assert tmpdir.join(str(t.id), 'femag.fsl').read() == \
+            '\n'.join(render(x))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+#
+import os
+import numpy as np
+import pytest
+from femagtools import ironloss, mcv
+
+
+class Obj(object):
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+
+@pytest.fixture
+def model():
+    """two iron elements and one air element with sinusoidal induction"""
+    iron = Obj(subregion=Obj(name='Iron'))
+    air = Obj(subregion=None)
+    elements = [Obj(superelement=iron, reluc=(0.001, 0.001), mag=(0.0, 0.0),
+                    area=1.0),
+                Obj(superelement=iron, reluc=(0.001, 0.001), mag=(0.0, 0.0),
+                    area=2.0),
+                Obj(superelement=air, reluc=(1.0, 1.0), mag=(0.0, 0.0),
+                    area=1.0)]
+    n = 64
+    x = 2*np.pi*np.arange(n + 1)/n
+    b1 = np.array([1.5*np.cos(x), np.cos(x) + 0.5*np.cos(3*x),
+                   0*x])
+    b2 = np.array([1.5*np.sin(x), 0*x, 0*x])
+
+    def get_el_fe_induction(icase=0, steps=slice(None),
+                            elements=slice(None)):
+        return [b1[elements][:, steps], b2[elements][:, steps]]
+
+    return Obj(elements=elements, ARM_LENGTH=0.1,
+               POLPAAR_ZAHL=2, NO_POLES_SIM=1,
+               get_el_fe_induction=get_el_fe_induction)
+
+
+def test_harmonics():
+    x = 2*np.pi*np.arange(32)/32
+    bk = ironloss.harmonics(np.array([np.sin(x) + 0.2*np.cos(5*x)]))
+    assert bk.shape == (1, 16)
+    np.testing.assert_almost_equal(bk[0, [0, 4]], [1.0, 0.2])
+    assert ironloss.harmonics(np.array([np.sin(x)]), nmax=3).shape == (1, 3)
+
+
+def test_element_losses(model):
+    c = dict(ch=2.0, ch_freq=1.0, cw=1.0, cw_freq=2.0, b_coeff=2.0,
+             fo=50.0, Bo=1.5, rho=7.6)
+    r = ironloss.element_losses(model, c, 100.0)
+    assert r['elements'].tolist() == [0, 1]
+    mass = np.array([1.0, 2.0])*1e-6*0.1*7.6e3
+    # rotating field (B=1.5 T in both components) at 100 Hz
+    p0 = 2*(2.0*2 + 1.0*4)
+    # alternating field with 3rd harmonic
+    p1 = (2.0*2 + 1.0*4)/1.5**2 + (2.0*6 + 1.0*36)*(0.5/1.5)**2
+    np.testing.assert_almost_equal(r['total'], np.array([p0, p1])*mass)
+    np.testing.assert_almost_equal(r['hysteresis'] + r['eddy'], r['total'])
+    np.testing.assert_almost_equal(r['subregions']['Iron']['total'],
+                                   4*np.sum(r['total']))
+
+    r1 = ironloss.element_losses(model, {'Iron': c}, 100.0, chunksize=1)
+    np.testing.assert_almost_equal(r1['total'], r['total'])
+
+    with pytest.raises(ValueError):
+        ironloss.element_losses(model, {'Rotor': c}, 100.0)
+
+
+def test_losscoeffs():
+    testPath = os.path.join(os.path.split(__file__)[0], 'data')
+    m = mcv.read(os.path.join(testPath, 'TKM270-50A-LOSS.MCV'))
+    c = ironloss.losscoeffs(m)
+    assert c['cw'] == pytest.approx(1.5532, abs=1e-4)
+    assert c['Bo'] == pytest.approx(1.5)
+    assert c['fo'] == pytest.approx(50.0)
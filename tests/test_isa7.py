@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from femagtools import isa7
 
 
@@ -89,7 +90,67 @@ def test_superelements(isa):
         assert type(nc) == isa7.NodeChain
         assert nc.key == se.nc_keys[se.nodechains.index(nc)]
 
-        
+
+
+@pytest.fixture
+def mesh():
+    """4x3 grid of distorted nodes with quadrilaterals in the
+    lower and triangles in the upper row, 2 superelements"""
+    nx, ny = 4, 3
+    rng = np.random.default_rng(1)
+    xy = (np.array([(k % nx, k // nx) for k in range(nx*ny)], dtype=float) +
+          rng.uniform(-0.2, 0.2, (nx*ny, 2)))/100
+    vpot = rng.uniform(-0.01, 0.01, nx*ny)
+    isa = isa7.Isa7.__new__(isa7.Isa7)
+    isa.nodes = [isa7.Node(k + 1, 0, 0, 0, 0, x, y, a, 0)
+                 for k, ((x, y), a) in enumerate(zip(xy, vpot))]
+    isa.node_pos = np.array([n.xy for n in isa.nodes])
+    isa._connectivity = None
+    n = isa.nodes
+    isa.elements = []
+    for i in range(nx - 1):
+        isa.elements.append(isa7.Element(
+            len(isa.elements) + 1, 2, 0,
+            [n[k] for k in (i, i + 1, i + nx + 1, i + nx)],
+            (1.0, 1.0), (0.0, 0.0), 0))
+    for i in range(nx - 1):
+        k = nx + i
+        for v in ((k, k + 1, k + nx + 1), (k, k + nx + 1, k + nx)):
+            isa.elements.append(isa7.Element(
+                len(isa.elements) + 1, 1, 1, [n[j] for j in v],
+                (1.0, 1.0), (0.0, 0.0), 0))
+    isa.superelements = [
+        isa7.SuperElement(1, -1, isa.elements[:nx - 1], [],
+                          1, [], 0, 0, 0, 1.0, 0, 0, 0, 0, 0),
+        isa7.SuperElement(2, -1, isa.elements[nx - 1:], [],
+                          2, [], 0, 0, 0, 0.5, 0, 0, 0, 0, 0)]
+    for se in isa.superelements:
+        for e in se.elements:
+            e.superelement = se
+    return isa
+
+
+def test_element_connectivity(mesh):
+    conn = mesh.element_connectivity()
+    assert sorted(conn) == [3, 4]
+    assert sum(len(el_idx) for el_idx, nd_idx in conn.values()) == len(
+        mesh.elements)
+    for nv, (el_idx, nd_idx) in conn.items():
+        assert nd_idx.shape == (len(el_idx), nv)
+        for i, nd in zip(el_idx, nd_idx):
+            e = mesh.elements[i]
+            assert len(e.vertices) == nv
+            assert [v.key - 1 for v in e.vertices] == list(nd)
+
+
+def test_element_induction(mesh):
+    b = mesh.element_induction()
+    assert b.shape == (len(mesh.elements), 2)
+    assert {e.el_type for e in mesh.elements} == {1, 2}
+    expected = [e.induction() for e in mesh.elements]
+    assert b == pytest.approx(np.array(expected))
+
+
 @pytest.fixture
 def disp_stat():
     filename = 'tests/data/test_disp_stat.ISA7'
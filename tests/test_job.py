@@ -3,6 +3,8 @@
 import femagtools.job
 import tempfile
 import os
+import io
+import tarfile
 
 
 def test_condor():
@@ -35,3 +37,36 @@ def test_job():
         x = [l.strip().split('=') for l in f]
     d = {k: v for k, v in x}
     d['exit_on_end'] == 'True'
+
+
+def test_pack_size():
+    assert femagtools.job.pack_size(10, 120) == 48
+    assert femagtools.job.pack_size(10, 120, num_tasks=100,
+                                    num_slots=10) == 10
+    assert femagtools.job.pack_size(1000, 120) == 1
+
+
+def test_cloud_task(tmpdir):
+    job = femagtools.job.CloudJob(str(tmpdir))
+    mcvfile = str(tmpdir.join('M270.MCV'))
+    with open(mcvfile, 'w') as f:
+        f.write('M270')
+    for i in range(3):
+        task = job.add_task()
+        task.add_file('femag.fsl', ['-- Ü {}'.format(i)])
+        task.add_file(mcvfile)
+        task.add_file('model.poc', ['poc'])
+
+    fileobj = io.BytesIO()
+    job.tasks[1].write_tar(fileobj, exclude=['model.poc'])
+    fileobj.seek(0)
+    with tarfile.open(fileobj=fileobj, mode='r:gz') as tar:
+        assert tar.getnames() == ['femag.fsl', 'M270.MCV']
+        assert tar.extractfile('femag.fsl').read().decode(
+            'utf-8') == '-- Ü 1'
+
+    shared = job.shared_files()
+    assert [(name, data, len(tasks))
+            for name, digest, data, tasks in shared] == [
+                    ('M270.MCV', mcvfile, 3), ('model.poc', b'poc', 3)]
+    assert job.shared_files(minsize=5) == []
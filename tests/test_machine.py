@@ -213,6 +213,21 @@ class PmMachineTest(unittest.TestCase):
                                             i1=i1)
     self.assertAlmostEqual(m2.torque_iqd(iq, id), 215.87, 2)
 
+  def test_torque_iqd_array(self):
+    testPath = os.path.join(os.path.split(__file__)[0], 'data')
+    bch = femagtools.read_bchfile(os.path.join(testPath, 'ldq.BATCH'))
+    pm = femagtools.machine.create(bch, r1=0.1, ls=0)
+    iq, id = femagtools.machine.iqd(-30*math.pi/180, 100)
+    iqx = [[iq, iq], [iq, 0.0]]
+    idx = [[id, id], [id, 100.0]]
+    tq = pm.torque_iqd(iqx, idx)
+    self.assertEqual(tq.shape, (2, 2))
+    self.assertAlmostEqual(tq[0][0], pm.torque_iqd(iq, id), 6)
+    self.assertTrue(math.isnan(tq[1][1]))
+    uq, ud = pm.uqd(100, iqx, idx)
+    self.assertEqual(uq.shape, (2, 2))
+    self.assertAlmostEqual(uq[1][0], pm.uqd(100, iq, id)[0], 6)
+
   def test_psidq_shortcircuit(self):
     psid = [[-0.51364332, -0.48331104, -0.44353648,
              -0.35671764, -0.15149428, 0.16361048]]
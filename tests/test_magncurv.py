@@ -90,4 +90,33 @@ def test_writeFile_fillfac():
     shutil.rmtree(dir)
 
 
-    
+def test_writeFile_cached():
+    ext = '.MC' if sys.platform == 'win32' else '.MCV'
+    testPath = os.path.split(__file__)[0]
+    mcv = femagtools.mcv.read(os.path.join(testPath, 'data/TKS_NO_20.MCV'))
+    m = femagtools.mcv.MagnetizingCurve(mcv)
+    dirs = [tempfile.mkdtemp() for i in range(2)]
+    results = [m.writefile('TKS_NO_20', d, fillfac=0.9) for d in dirs]
+    assert results == [mcvPars[0]['name'] + '-90' + ext]*2
+    data = []
+    for d, r in zip(dirs, results):
+        with open(os.path.join(d, r), 'rb') as fp:
+            data.append(fp.read())
+        shutil.rmtree(d)
+    assert data[0] == data[1]
+
+
+def test_writeFile_modified():
+    testPath = os.path.split(__file__)[0]
+    mcv = femagtools.mcv.read(os.path.join(testPath, 'data/TKS_NO_20.MCV'))
+    m = femagtools.mcv.MagnetizingCurve(mcv)
+    d = tempfile.mkdtemp()
+    data = []
+    for fillfac in (0.9, 0.9):
+        r = m.writefile('TKS_NO_20', d, fillfac=fillfac)
+        with open(os.path.join(d, r), 'rb') as fp:
+            data.append(fp.read())
+        # modify curve in place
+        m.mcv['TKS_NO_20']['curve'][0]['bi'][-1] *= 1.1
+    shutil.rmtree(d)
+    assert data[0] != data[1]
@@ -2,6 +2,7 @@
 #
 import unittest
 import os
+import tempfile
 import femagtools.mcv
 import numpy as np
 
@@ -12,7 +13,6 @@ class McvWriterTest(unittest.TestCase):
         if not testPath:
             testPath = '.'
         filename = "data/TKS_NO_20.MCV"
-        filename_out = "data/TKS_NO_20_out.MCV"
         reader = femagtools.mcv.Reader()
         reader.readMcv('{0}/{1}'.format(testPath, filename))
         r = reader.get_results()
@@ -25,7 +25,9 @@ class McvWriterTest(unittest.TestCase):
         # test mcv writer
         writer = femagtools.mcv.Writer(r)
         # writer.setData(r)
-        writeMcvFile = '{0}/{1}'.format(testPath, filename_out)
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        writeMcvFile = os.path.join(tmpdir.name, 'TKS_NO_20_out.MCV')
         writer.writeMcv(writeMcvFile)
         self.assertNotEqual(writer, None)
 
@@ -50,7 +52,6 @@ class McvWriterTest(unittest.TestCase):
         if not testPath:
             testPath = '.'
         filename = "data/TKM270-50A-LOSS.MCV"
-        filename_out = "data/TKS_LOSS.MCV"
         reader = femagtools.mcv.Reader()
         reader.readMcv('{0}/{1}'.format(testPath, filename))
         r = reader.get_results()
@@ -68,7 +69,9 @@ class McvWriterTest(unittest.TestCase):
         # test mcv writer
         writer = femagtools.mcv.Writer(r)
         # writer.setData(r)
-        writeMcvFile = '{0}/{1}'.format(testPath, filename_out)
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        writeMcvFile = os.path.join(tmpdir.name, 'TKS_LOSS.MCV')
         writer.writeMcv(writeMcvFile)
         self.assertNotEqual(writer, None)
 
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+#
+import numpy as np
+import pytest
+
+netCDF4 = pytest.importorskip('netCDF4')
+from femagtools import isa7, nc
+
+
+@pytest.fixture
+def ncfile(tmpdir):
+    """nc file with 4 nodes (and a dummy node) and element induction
+    of 2 load cases, 5 move steps and 3 elements"""
+    filename = str(tmpdir.join('model.nc'))
+    with netCDF4.Dataset(filename, 'w') as ds:
+        for name, value in (('fc_radius', 10.5), ('pole_pairs', 2),
+                            ('poles_sim', 1), ('arm_length', 100.0)):
+            v = ds.createVariable(name, 'f8' if type(value) is float
+                                  else 'i4')
+            v.assignValue(value)
+        grp = ds.createGroup('nodes')
+        grp.createDimension('nodes', 5)
+        for var in ('co_1', 'co_2'):
+            v = grp.createVariable(var, 'f8', ('nodes',))
+            v[:] = np.arange(5) + (0 if var == 'co_1' else 10)
+        grp = ds.createGroup('el_fe_induction')
+        grp.createDimension('cases', 2)
+        grp.createDimension('steps', 5)
+        grp.createDimension('elements', 3)
+        v = grp.createVariable('position', 'f8', ('steps',))
+        v[:] = np.linspace(0, 4, 5)
+        for k, var in enumerate(('induction_1', 'induction_2')):
+            v = grp.createVariable(var, 'i2',
+                                   ('cases', 'steps', 'elements'))
+            v[:] = np.arange(30).reshape(2, 5, 3)*(1 - 2*k)
+    return filename
+
+
+def test_lazy_attributes(ncfile):
+    with nc.Reader(ncfile) as r:
+        assert r.FC_RADIUS == 10.5
+        assert r.POLPAAR_ZAHL == 2
+        assert 'NODE_ISA_NODE_REC_ND_CO_1' not in r.__dict__
+        # dummy node is removed
+        np.testing.assert_array_equal(r.NODE_ISA_NODE_REC_ND_CO_1,
+                                      [0, 1, 2, 3])
+        assert 'NODE_ISA_NODE_REC_ND_CO_1' in r.__dict__
+        assert 'NODE_ISA_NODE_REC_ND_CO_2' not in r.__dict__
+        np.testing.assert_array_equal(r.pos_el_fe_induction,
+                                      np.linspace(0, 4, 5))
+        with pytest.raises(AttributeError):
+            r.no_such_variable
+
+
+def test_read_el_fe_induction(ncfile):
+    with nc.Reader(ncfile) as r:
+        b1, b2 = r.read_el_fe_induction(1)
+        assert b1.shape == (3, 5)
+        np.testing.assert_array_equal(
+            b1, np.arange(15, 30).reshape(5, 3).T)
+        np.testing.assert_array_equal(b2, -b1)
+        for steps in (slice(1, 4), 2):
+            for elements in (slice(None), [0, 2]):
+                b = r.read_el_fe_induction(1, steps, elements)
+                np.testing.assert_array_equal(b[0], b1[elements][:, steps])
+                np.testing.assert_array_equal(b[1], b2[elements][:, steps])
+
+
+def test_isa7_close(ncfile):
+    r = nc.Reader(ncfile)
+    isa = isa7.Isa7.__new__(isa7.Isa7)
+    isa._reader = r
+    with isa:
+        assert r.ds.isopen()
+    assert not r.ds.isopen()
+    assert isa._reader is None
+    isa.close()
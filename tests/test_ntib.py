@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+#
+import numpy as np
+import femagtools.ntib as ntib
+
+head = ['  Speed     Torque    I1     Beta   Losses',
+        '[1/min]   [Nm]      [A]    [Deg]  [W]']
+
+
+def test_read_los_content():
+    r = ntib.read_los_content(head + [
+        '  600.0   10.0   5.0  -10.0  1.0  2.0  3.0  4.0  5.0',
+        ' 1200.0   20.0   6.0  -20.0  2.0  3.0  4.0  5.0  6.0',
+        ''])
+    assert r['speed'].tolist() == [10.0, 20.0]
+    assert r['staza'].tolist() == [2.0, 3.0]
+    assert r['stafe'].tolist() == [3.0, 5.0]
+    assert r['total'].tolist() == [15.0, 20.0]
+
+    # without staza and with invalid value
+    r = ntib.read_los_content(head + [
+        '  600.0   10.0   5.0  -10.0  1.0  3.0  4.0  5.0',
+        ' 1200.0   20.0   6.0  -20.0  2.0  4.0  ***  6.0'], aslist=True)
+    assert r['staza'] == [0.0, 0.0]
+    assert r['winding'] == [5.0, 6.0]
+    assert np.isnan(r['magnet'][1])
+    assert r['total'][0] == 13.0
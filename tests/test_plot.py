@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+#
+import os
+import shutil
+import numpy as np
+import pytest
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as pl
+from femagtools import isa7, plot
+
+
+@pytest.fixture
+def isa():
+    """3x2 grid of quadrilaterals with 2 superelements"""
+    nx, ny = 4, 3
+    isa = isa7.Isa7.__new__(isa7.Isa7)
+    isa.nodes = [isa7.Node(k + 1, 0, 0, 0, 0, k % nx, k // nx,
+                           0.01*(k % nx), 0)
+                 for k in range(nx*ny)]
+    isa.node_pos = np.array([n.xy for n in isa.nodes])
+    isa._connectivity = None
+    isa.elements = []
+    for j in range(ny - 1):
+        for i in range(nx - 1):
+            k = j*nx + i
+            isa.elements.append(isa7.Element(
+                len(isa.elements) + 1, 2, 1,
+                [isa.nodes[n] for n in (k, k + 1, k + nx + 1, k + nx)],
+                (1.0, 1.0), (0.0, 0.0), 0))
+    n = isa.nodes
+    isa.superelements = [
+        isa7.SuperElement(1, 1, isa.elements[:3],
+                          [isa7.NodeChain(1, (n[0], None, n[3])),
+                           isa7.NodeChain(2, (n[7], None, n[4]))],
+                          1, [], 0, 0, 0, 1.0, 0, 0, 0, 0, 0),
+        isa7.SuperElement(2, 1, isa.elements[3:],
+                          [isa7.NodeChain(3, (n[4], None, n[7])),
+                           isa7.NodeChain(4, (n[11], None, n[8]))],
+                          2, [], 0, 0, 0, 1.0, 0, 0, 0, 0, 0)]
+    return isa
+
+
+def test_mesh(isa):
+    pl.figure()
+    plot.mesh(isa)
+    plot.spel(isa)
+    ax = pl.gca()
+    assert len(ax.collections) == 2
+    assert ax.collections[0].get_segments()[0].shape == (5, 2)
+    assert len(ax.collections[1].get_paths()) == 2
+    pl.close()
+
+
+def test_flux_density(isa):
+    pl.figure()
+    plot.flux_density(isa)
+    tpc = pl.gca().collections[0]
+    assert len(tpc.get_array()) == 12
+    np.testing.assert_allclose(tpc.get_array(), 0.01)
+    plot.flux_lines(isa, num_lines=3)
+    pl.close('all')
+
+
+def test_batch_report(tmpdir):
+    datadir = os.path.join(os.path.split(__file__)[0], 'data')
+    resultdir = tmpdir.mkdir('result')
+    shutil.copy(os.path.join(datadir, 'cogging.BATCH'),
+                str(resultdir.join('cogging_001.BATCH')))
+    outdir = tmpdir.mkdir('out')
+    r = plot.batch_report([str(resultdir),
+                           os.path.join(datadir, 'char.BATCH')],
+                          outdir=str(outdir), num_proc=1)
+    assert list(r.values())[0] is None
+    assert 'not yet supported' in list(r.values())[1]
+    assert outdir.join('cogging_001.png').exists()
+
+
+def test_batch_report_names(tmpdir):
+    datadir = os.path.join(os.path.split(__file__)[0], 'data')
+    resultdirs = [tmpdir.mkdir(d) for d in ('0', '1')]
+    for d in resultdirs:
+        shutil.copy(os.path.join(datadir, 'cogging.BATCH'),
+                    str(d.join('cogging_001.BATCH')))
+    outdir = tmpdir.mkdir('out')
+    fig = pl.figure()
+    r = plot.batch_report([str(d) for d in resultdirs],
+                          outdir=str(outdir), num_proc=1)
+    assert list(r.values()) == [None, None]
+    assert sorted(f.basename for f in outdir.listdir()) == [
+        '0_cogging_001.png', '1_cogging_001.png']
+    # figures of caller are kept
+    assert pl.get_fignums() == [fig.number]
+    pl.close('all')